@@ -0,0 +1,154 @@
+"""Anytime 求解：墙钟时间预算、停滞检测、协作式取消与随时可读的当前最优解
+
+SearchBudget 在求解开始时确定截止时间，退火循环每次迭代前询问 stop_reason：
+超过截止时间，或最优解连续 stall_iterations 次迭代 / stall_seconds 秒没有改进时提前停止，
+关联的 CancellationToken 被取消时同样立即停止（随后由求解器抛出 OptimizationCancelled）。
+Incumbent 由求解器在最优解改进时更新，其他线程（界面、服务、信号处理）可以随时用 snapshot 取得
+当前可行的最优解，满足硬性截止时间时直接取用，不必等待求解返回。
+"""
+import math
+import threading
+import time
+from typing import Any, Dict, Optional
+
+STOP_REASONS = {
+    "time_limit": "达到时间预算",
+    "stall_iterations": "最优解连续多次迭代无改进",
+    "stall_seconds": "最优解长时间无改进",
+    "cancelled": "已取消",
+}
+
+
+class OptimizationCancelled(Exception):
+    """求解因 CancellationToken 被取消而中止"""
+
+
+class CancellationToken:
+    """协作式取消标记：任意线程调用 cancel，求解器在下一次迭代或下一个组合前检查并中止"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: Optional[str] = None) -> None:
+        self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise OptimizationCancelled(self.reason or "求解已取消")
+
+
+class SearchBudget:
+    """求解预算
+
+    time_limit 为整个求解的墙钟秒数（构造时开始计时），stall_iterations / stall_seconds 为停滞阈值，
+    停滞由每次退火各自计算（见 stop_reason 的参数）。cancel_token 被取消时 stop_reason 返回 "cancelled"。均可为空。
+    """
+
+    def __init__(
+        self,
+        time_limit: Optional[float] = None,
+        stall_iterations: Optional[int] = None,
+        stall_seconds: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        if time_limit is not None and time_limit < 0:
+            raise ValueError("time_limit 不能为负数")
+        if stall_iterations is not None and stall_iterations <= 0:
+            raise ValueError("stall_iterations 必须大于0")
+        if stall_seconds is not None and stall_seconds <= 0:
+            raise ValueError("stall_seconds 必须大于0")
+
+        self.time_limit = time_limit
+        self.stall_iterations = stall_iterations
+        self.stall_seconds = stall_seconds
+        self.cancel_token = cancel_token
+        self.started = time.monotonic()
+        self.deadline = self.started + time_limit if time_limit is not None else None
+
+    @classmethod
+    def from_options(
+        cls,
+        time_limit: Optional[float] = None,
+        stall_iterations: Optional[int] = None,
+        stall_seconds: Optional[float] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> Optional["SearchBudget"]:
+        """各项均未指定时返回 None，求解循环中不产生任何额外开销"""
+        if time_limit is None and stall_iterations is None and stall_seconds is None and cancel_token is None:
+            return None
+        return cls(time_limit, stall_iterations, stall_seconds, cancel_token)
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def remaining(self) -> Optional[float]:
+        """距截止时间的剩余秒数（不小于0）；没有时间预算时返回 None"""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def stop_reason(self, iteration: int, last_improvement: int, last_improvement_time: float) -> Optional[str]:
+        """iteration 为已完成的迭代数，last_improvement / last_improvement_time 为最近一次最优解改进的迭代与时刻"""
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            return "cancelled"
+        now = time.monotonic()
+        if self.deadline is not None and now >= self.deadline:
+            return "time_limit"
+        if self.stall_iterations is not None and iteration - last_improvement >= self.stall_iterations:
+            return "stall_iterations"
+        if self.stall_seconds is not None and now - last_improvement_time >= self.stall_seconds:
+            return "stall_seconds"
+        return None
+
+
+class Incumbent:
+    """求解过程中持续更新的当前最优解（线程安全）
+
+    求解器只在改进时调用 offer，传入的方案对象之后不再原地修改；stop_reason 在求解提前停止时设置。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cost = math.inf
+        self.solution: Any = None
+        self.iteration: Optional[int] = None
+        self.improvements = 0
+        self.stop_reason: Optional[str] = None
+        self.started = time.monotonic()
+        self.updated_at: Optional[float] = None
+
+    def offer(self, cost: float, solution: Any, iteration: Optional[int] = None) -> bool:
+        """成本低于当前最优时替换并返回 True"""
+        with self._lock:
+            if cost >= self.cost:
+                return False
+            self.cost = cost
+            self.solution = solution
+            self.iteration = iteration
+            self.improvements += 1
+            self.updated_at = time.monotonic()
+            return True
+
+    def finish(self, stop_reason: Optional[str]) -> None:
+        with self._lock:
+            self.stop_reason = stop_reason
+
+    def snapshot(self) -> Optional[Dict]:
+        """当前最优解及其成本；尚无可行解时返回 None"""
+        with self._lock:
+            if self.solution is None:
+                return None
+            return {
+                "cost": self.cost,
+                "solution": self.solution,
+                "iteration": self.iteration,
+                "improvements": self.improvements,
+                "elapsed": self.updated_at - self.started,
+                "stop_reason": self.stop_reason,
+            }
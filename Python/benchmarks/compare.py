@@ -0,0 +1,246 @@
+"""基准回归门禁：将新一轮基准结果与基线 JSON 比较
+
+用法（在仓库根目录）:
+    python Python/benchmarks/compare.py baseline.json candidate.json
+    python Python/benchmarks/compare.py baseline.json            # 按基线的配置重新运行基准后比较
+
+退出码: 0 无回归，1 检测到回归，2 输入无效（文件缺失、格式错误或没有可比较的用例）。
+"""
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scipy import stats
+
+EXIT_OK = 0
+EXIT_REGRESSION = 1
+EXIT_INVALID = 2
+
+DEFAULT_THRESHOLDS = {
+    "throughput": 0.10,   # 吞吐量下降超过 10%
+    "memory": 0.10,       # 峰值内存增量增加超过 10%
+    "quality": 0.01,      # 方案成本增加超过 1%
+}
+# 绝对变化低于该值的内存差异视为测量噪声（分配器与采样间隔带来的抖动）
+DEFAULT_MEMORY_FLOOR_MB = 5.0
+
+
+class MetricComparison:
+    """单个用例单项指标的比较结果"""
+
+    def __init__(self, case: str, scale: str, metric: str, kind: str, higher_is_better: bool,
+                 baseline: List[float], candidate: List[float], threshold: float, alpha: float, test: str,
+                 absolute_floor: float = 0.0):
+        self.case = case
+        self.scale = scale
+        self.metric = metric
+        self.kind = kind
+        self.baseline_mean = statistics.fmean(baseline)
+        self.candidate_mean = statistics.fmean(candidate)
+        self.threshold = threshold
+
+        if self.baseline_mean == 0:
+            self.change = 0.0 if self.candidate_mean == 0 else math.copysign(math.inf, self.candidate_mean)
+        else:
+            self.change = (self.candidate_mean - self.baseline_mean) / abs(self.baseline_mean)
+        # 恶化幅度：正值表示变差
+        self.degradation = -self.change if higher_is_better else self.change
+        self.p_value = _p_value(baseline, candidate, test)
+        self.significant = self.p_value is None or self.p_value < alpha
+        material = abs(self.candidate_mean - self.baseline_mean) >= absolute_floor
+        self.regression = self.degradation > threshold and self.significant and material
+
+    def as_dict(self) -> Dict:
+        return {
+            "case": self.case,
+            "scale": self.scale,
+            "metric": self.metric,
+            "kind": self.kind,
+            "baseline_mean": self.baseline_mean,
+            "candidate_mean": self.candidate_mean,
+            "change": self.change,
+            "threshold": self.threshold,
+            "p_value": self.p_value,
+            "regression": self.regression,
+        }
+
+
+def _p_value(baseline: List[float], candidate: List[float], test: str) -> Optional[float]:
+    """两组重复测量的双侧检验 p 值；任一组少于2个样本时无法检验，返回 None（仅按阈值判断）"""
+    if len(baseline) < 2 or len(candidate) < 2:
+        return None
+    if statistics.pvariance(baseline) == 0 and statistics.pvariance(candidate) == 0:
+        # 两组都是常数（如确定性的方案质量），均值不同即视为显著
+        return 0.0 if statistics.fmean(baseline) != statistics.fmean(candidate) else 1.0
+    if test == "mannwhitney":
+        return float(stats.mannwhitneyu(baseline, candidate, alternative="two-sided").pvalue)
+    return float(stats.ttest_ind(baseline, candidate, equal_var=False).pvalue)
+
+
+def _metric_series(samples: List[Dict]) -> Iterable[Tuple[str, str, bool, List[float]]]:
+    """从样本中提取 (指标名, 类别, 是否越大越好, 取值列表)"""
+    for name in samples[0].get("throughput", {}):
+        yield name, "throughput", True, [sample["throughput"][name] for sample in samples]
+    # 比较峰值相对用例开始时的增量；绝对峰值包含进程中此前加载的模块与数据。
+    # 早期版本的报告没有该字段，此时跳过内存指标
+    growths = [sample.get("rss_growth_mb") for sample in samples]
+    if all(value is not None for value in growths):
+        yield "rss_growth_mb", "memory", False, growths
+    qualities = [sample.get("quality") for sample in samples]
+    if all(value is not None for value in qualities):
+        yield "quality", "quality", False, qualities
+
+
+def _index_results(report: Dict) -> Dict[Tuple[str, str], Dict]:
+    return {
+        (record["case"], record["scale"]): record
+        for record in report.get("results", [])
+        if record.get("samples") and "skipped" not in record
+    }
+
+
+def compare_reports(
+    baseline: Dict,
+    candidate: Dict,
+    thresholds: Optional[Dict[str, float]] = None,
+    alpha: float = 0.05,
+    test: str = "welch",
+    memory_floor_mb: float = DEFAULT_MEMORY_FLOOR_MB,
+) -> Tuple[List[MetricComparison], List[Tuple[str, str]]]:
+    """逐用例比较两份基准报告，返回 (指标比较列表, 基线中有而新结果中缺失的用例)"""
+    if test not in ("welch", "mannwhitney"):
+        raise ValueError("test 只能是 welch 或 mannwhitney")
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+
+    baseline_results = _index_results(baseline)
+    candidate_results = _index_results(candidate)
+    missing = sorted(key for key in baseline_results if key not in candidate_results)
+
+    comparisons = []
+    for key in sorted(baseline_results.keys() & candidate_results.keys()):
+        case, scale = key
+        candidate_series = {
+            name: values for name, _, _, values in _metric_series(candidate_results[key]["samples"])
+        }
+        for name, kind, higher_is_better, values in _metric_series(baseline_results[key]["samples"]):
+            if name not in candidate_series:
+                continue
+            comparisons.append(MetricComparison(
+                case, scale, name, kind, higher_is_better,
+                values, candidate_series[name], thresholds[kind], alpha, test,
+                absolute_floor=memory_floor_mb if kind == "memory" else 0.0,
+            ))
+    return comparisons, missing
+
+
+def format_comparisons(comparisons: List[MetricComparison]) -> str:
+    header = f"{'用例':<24} {'规模':<6} {'指标':<24} {'基线':>14} {'当前':>14} {'变化':>9} {'p值':>8}  结论"
+    lines = [header, "-" * len(header)]
+    for item in comparisons:
+        p_value = "n/a" if item.p_value is None else f"{item.p_value:.3f}"
+        verdict = "回归" if item.regression else ("变差(不显著)" if item.degradation > item.threshold else "正常")
+        lines.append(
+            f"{item.case:<24} {item.scale:<6} {item.metric:<24} {item.baseline_mean:>14.4g} "
+            f"{item.candidate_mean:>14.4g} {item.change:>+8.1%} {p_value:>8}  {verdict}"
+        )
+    return "\n".join(lines)
+
+
+def _load_report(path: str) -> Dict:
+    with open(path, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    if not isinstance(report, dict) or "results" not in report:
+        raise ValueError(f"{path} 不是基准结果文件")
+    return report
+
+
+def _rerun_baseline_config(baseline: Dict) -> Dict:
+    """按基线记录的规模、用例、重复次数、种子与选项重新运行基准"""
+    from benchmarks.run_benchmarks import run_benchmarks
+
+    metadata = baseline.get("metadata", {})
+    return run_benchmarks(
+        metadata.get("scales", ["1k"]),
+        metadata.get("cases"),
+        metadata.get("repeats", 3),
+        metadata.get("seed", 0),
+        metadata.get("options"),
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="基准回归门禁")
+    parser.add_argument("baseline", help="基线结果 JSON")
+    parser.add_argument("candidate", nargs="?", help="新结果 JSON；省略时按基线配置重新运行基准")
+    parser.add_argument("--save-candidate", default=None, help="重新运行时将新结果另存为 JSON")
+    parser.add_argument("--throughput-threshold", type=float, default=DEFAULT_THRESHOLDS["throughput"],
+                        help="吞吐量允许的相对下降 (默认: 0.10)")
+    parser.add_argument("--memory-threshold", type=float, default=DEFAULT_THRESHOLDS["memory"],
+                        help="峰值内存增量允许的相对增加 (默认: 0.10)")
+    parser.add_argument("--memory-floor-mb", type=float, default=DEFAULT_MEMORY_FLOOR_MB,
+                        help="低于该绝对差异 (MB) 的内存变化不判为回归 (默认: 5)")
+    parser.add_argument("--quality-threshold", type=float, default=DEFAULT_THRESHOLDS["quality"],
+                        help="方案成本允许的相对增加 (默认: 0.01)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="显著性水平 (默认: 0.05)")
+    parser.add_argument("--test", choices=("welch", "mannwhitney"), default="welch",
+                        help="重复测量的检验方法；mannwhitney 每组至少需要4次重复才可能显著 (默认: welch)")
+    parser.add_argument("--fail-on-missing", action="store_true", help="基线中的用例在新结果中缺失时视为失败")
+    parser.add_argument("--output", default=None, help="将比较结果保存为 JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        baseline = _load_report(args.baseline)
+        if args.candidate:
+            candidate = _load_report(args.candidate)
+        else:
+            candidate = _rerun_baseline_config(baseline)
+            if args.save_candidate:
+                with open(args.save_candidate, "w", encoding="utf-8") as f:
+                    json.dump(candidate, f, ensure_ascii=False, indent=2)
+    except (OSError, ValueError) as exc:
+        print(f"读取基准结果失败: {exc}", file=sys.stderr)
+        return EXIT_INVALID
+
+    thresholds = {
+        "throughput": args.throughput_threshold,
+        "memory": args.memory_threshold,
+        "quality": args.quality_threshold,
+    }
+    comparisons, missing = compare_reports(
+        baseline, candidate, thresholds, args.alpha, args.test, args.memory_floor_mb
+    )
+    if not comparisons:
+        print("两份结果中没有可比较的用例", file=sys.stderr)
+        return EXIT_INVALID
+
+    print(format_comparisons(comparisons))
+    for case, scale in missing:
+        print(f"警告: 新结果中缺少用例 {case} ({scale})")
+
+    regressions = [item for item in comparisons if item.regression]
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "comparisons": [item.as_dict() for item in comparisons],
+                "missing": [list(key) for key in missing],
+                "regressions": len(regressions),
+            }, f, ensure_ascii=False, indent=2)
+
+    if regressions:
+        print(f"\n检测到 {len(regressions)} 项性能回归", file=sys.stderr)
+        return EXIT_REGRESSION
+    if missing and args.fail_on_missing:
+        print(f"\n新结果缺少基线中的 {len(missing)} 个用例", file=sys.stderr)
+        return EXIT_REGRESSION
+    print("\n未检测到性能回归")
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
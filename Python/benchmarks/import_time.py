@@ -0,0 +1,136 @@
+"""导入耗时基准：在全新的解释器进程中测量模块导入耗时并检查预算
+
+每次测量启动一个新进程运行 python -X importtime -c "import <模块>"，取该模块的累计导入耗时；
+同时检查导入后绘图、表格与求解器后端（matplotlib、pandas、scipy 等）是否仍未加载。
+
+用法（在仓库根目录）:
+    python Python/benchmarks/import_time.py
+    python Python/benchmarks/import_time.py --modules network_model,cli --repeats 9 --output import_time.json
+
+退出码: 0 全部在预算内，1 超出预算或提前加载了重量级依赖。
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+PYTHON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 模块 -> 导入耗时预算（秒，取多次测量的中位数）
+DEFAULT_BUDGETS = {
+    "network_model": 0.25,
+    "solve": 0.35,
+    "pipeline": 0.5,
+    "cli": 0.5,
+    "sweep": 0.35,
+}
+# 只应在首次使用时加载的依赖
+LAZY_DEPENDENCIES = ("matplotlib", "pandas", "scipy", "networkx", "pulp", "pyarrow")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+\d+\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure_import(module: str, python: str = sys.executable) -> Dict:
+    """在新进程中导入模块一次，返回累计耗时（秒）与导入后已加载的重量级依赖"""
+    script = (
+        f"import sys, json; import {module}; "
+        f"print(json.dumps([name for name in {LAZY_DEPENDENCIES!r} if name in sys.modules]))"
+    )
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", script],
+        cwd=PYTHON_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{completed.stderr.strip()}")
+
+    cumulative_us = None
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        # 顶层导入（无缩进）即为该模块的累计耗时
+        if match and match.group(3) == module and len(match.group(2)) == 1:
+            cumulative_us = int(match.group(1))
+    if cumulative_us is None:
+        raise RuntimeError(f"未能从 -X importtime 输出中解析 {module} 的导入耗时")
+
+    return {"seconds": cumulative_us / 1e6, "loaded": json.loads(completed.stdout.strip().splitlines()[-1])}
+
+
+def check_budgets(budgets: Dict[str, float], repeats: int = 5) -> List[Dict]:
+    """逐模块测量 repeats 次，返回每个模块的中位数耗时、预算与是否通过"""
+    if repeats <= 0:
+        raise ValueError("repeats 必须大于0")
+    results = []
+    for module, budget in budgets.items():
+        samples = [measure_import(module) for _ in range(repeats)]
+        seconds = [sample["seconds"] for sample in samples]
+        loaded = sorted({name for sample in samples for name in sample["loaded"]})
+        median = statistics.median(seconds)
+        results.append({
+            "module": module,
+            "median": median,
+            "min": min(seconds),
+            "max": max(seconds),
+            "budget": budget,
+            "eager_dependencies": loaded,
+            "passed": median <= budget and not loaded,
+            "samples": seconds,
+        })
+    return results
+
+
+def format_results(results: List[Dict]) -> str:
+    header = f"{'模块':<16} {'中位数(ms)':>11} {'最小(ms)':>10} {'预算(ms)':>10}  结论"
+    lines = [header, "-" * len(header)]
+    for item in results:
+        if item["eager_dependencies"]:
+            verdict = f"提前加载: {', '.join(item['eager_dependencies'])}"
+        else:
+            verdict = "正常" if item["passed"] else "超出预算"
+        lines.append(
+            f"{item['module']:<16} {item['median'] * 1000:>11.1f} {item['min'] * 1000:>10.1f} "
+            f"{item['budget'] * 1000:>10.1f}  {verdict}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="模块导入耗时基准")
+    parser.add_argument("--modules", default=None,
+                        help=f"逗号分隔的模块列表 (默认: {','.join(DEFAULT_BUDGETS)})")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="统一的导入耗时预算（秒），覆盖各模块的默认预算")
+    parser.add_argument("--repeats", type=int, default=5, help="每个模块的测量次数 (默认: 5)")
+    parser.add_argument("--output", default=None, help="将结果保存为 JSON")
+    args = parser.parse_args(argv)
+
+    modules = [name.strip() for name in args.modules.split(",")] if args.modules else list(DEFAULT_BUDGETS)
+    budgets = {}
+    for module in modules:
+        if args.budget is None and module not in DEFAULT_BUDGETS:
+            parser.error(f"模块 {module} 没有默认预算，请用 --budget 指定")
+        budgets[module] = args.budget if args.budget is not None else DEFAULT_BUDGETS[module]
+
+    results = check_budgets(budgets, args.repeats)
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version, "repeats": args.repeats, "results": results}, f,
+                      ensure_ascii=False, indent=2)
+
+    failed = [item["module"] for item in results if not item["passed"]]
+    if failed:
+        print(f"\n{len(failed)} 个模块未通过导入耗时检查: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    print("\n全部模块在导入耗时预算内")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,441 @@
+"""热点路径基准测试：在合成算例上计时并输出 JSON
+
+用法（在仓库根目录）:
+    python Python/benchmarks/run_benchmarks.py --scales 1k,10k --repeats 3 --output benchmark_results.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import psutil
+
+from benchmarks.synthetic import SCALES, SyntheticInstance, generate_scale, write_instance
+from network_model import LogisticsNetwork
+from optimizers.cost_model import HubCostModel
+from optimizers.kmeans_sa_optimizer import KMeansSimulatedAnnealingOptimizer
+from solve import build_initial_solution, create_data_model, evaluate_solution, solve_cvrp
+
+SCHEMA_VERSION = 1
+
+DEFAULT_OPTIONS = {
+    "max_matrix_gb": 2.0,           # 全量距离矩阵的内存上限，超过则跳过依赖它的用例
+    "routing_max_stores": 1000,     # 路径优化用例（纯 Python 距离表）的门店数上限
+    "cluster_k": 10,
+    "match_hubs": 5,                # 聚类-中转点匹配枚举 k! 种排列
+    "sa_iterations": 20000,
+    "evaluation_repeats": 20,
+    "cvrp_iterations": 1000,
+}
+
+
+class SkipCase(Exception):
+    """当前规模下不适合运行的用例"""
+
+
+class _PeakRSS:
+    """在后台线程中周期采样进程 RSS，记录代码块执行期间的峰值与相对进入时的增量"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.start = 0
+        self.peak = 0
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self) -> None:
+        self.peak = max(self.peak, self._process.memory_info().rss)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self) -> "_PeakRSS":
+        self._sample()
+        self.start = self.peak
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+class BenchmarkContext:
+    """单个规模下各用例共享的算例与预计算结果（不计入计时）"""
+
+    def __init__(self, scale: str, instance: SyntheticInstance, options: Dict, workdir: str):
+        self.scale = scale
+        self.instance = instance
+        self.options = options
+        self.workdir = workdir
+        self._network = None
+        self._routing_data = None
+
+    @property
+    def store_count(self) -> int:
+        return len(self.instance.stores)
+
+    def require_matrix(self) -> None:
+        size = len(self.instance.locations)
+        required_gb = size * size * 8 / 1024 ** 3
+        if required_gb > self.options["max_matrix_gb"]:
+            raise SkipCase(f"全量距离矩阵约需 {required_gb:.1f} GB，超过上限 {self.options['max_matrix_gb']} GB")
+
+    def require_routing(self) -> None:
+        if self.store_count > self.options["routing_max_stores"]:
+            raise SkipCase(f"门店数 {self.store_count} 超过路径优化用例上限 {self.options['routing_max_stores']}")
+
+    def network(self, with_distances: bool = False) -> LogisticsNetwork:
+        if self._network is None:
+            self._network = LogisticsNetwork(self.instance.locations)
+        if with_distances and not self._network.distance_matrix:
+            self.require_matrix()
+            self._network.calculate_distances()
+        return self._network
+
+    def routing_data(self) -> Dict:
+        if self._routing_data is None:
+            self.require_routing()
+            self._routing_data = _load_data_model(self.workdir)
+        return self._routing_data
+
+
+def _load_data_model(workdir: str) -> Dict:
+    """在算例目录下调用 create_data_model（它从当前目录读取输入文件）"""
+    cwd = os.getcwd()
+    try:
+        os.chdir(workdir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = create_data_model()
+    finally:
+        os.chdir(cwd)
+    if not data.get("distance_matrix"):
+        raise RuntimeError("create_data_model 未能读取合成算例")
+    return data
+
+
+# 每个用例返回 (被计时的函数, 由结果与耗时计算质量/吞吐量的函数)
+Case = Callable[[BenchmarkContext], Tuple[Callable[[], object], Callable[[object, float], Dict]]]
+
+
+def case_calculate_distances(ctx: BenchmarkContext):
+    ctx.require_matrix()
+    network = LogisticsNetwork(ctx.instance.locations)
+    size = len(ctx.instance.locations)
+
+    def run():
+        network.calculate_distances()
+
+    def metrics(_, wall_time):
+        return {"quality": None, "throughput": {"pairs_per_second": size * size / wall_time}}
+
+    return run, metrics
+
+
+def case_cluster_entities(ctx: BenchmarkContext):
+    network = ctx.network()
+    store_ids = [loc.id for loc in ctx.instance.stores]
+    k = ctx.options["cluster_k"]
+    points = np.array([[loc.x, loc.y] for loc in ctx.instance.stores])
+
+    def run():
+        return network.cluster_entities(store_ids, k)
+
+    def metrics(result, wall_time):
+        clusters, centroids = result
+        labels = np.empty(len(store_ids), dtype=int)
+        position = {store_id: idx for idx, store_id in enumerate(store_ids)}
+        for cluster_idx, members in clusters.items():
+            labels[[position[store_id] for store_id in members]] = cluster_idx
+        inertia = float(np.abs(points - centroids[labels]).sum())
+        return {"quality": inertia, "throughput": {"points_per_second": len(store_ids) / wall_time}}
+
+    return run, metrics
+
+
+def case_match_clusters_to_hubs(ctx: BenchmarkContext):
+    network = ctx.network()
+    hub_subset = tuple(loc.id for loc in ctx.instance.wholesalers[:ctx.options["match_hubs"]])
+    store_ids = [loc.id for loc in ctx.instance.stores]
+    clusters, centroids = network.cluster_entities(store_ids, len(hub_subset))
+    centroids = centroids.tolist()
+
+    def run():
+        return KMeansSimulatedAnnealingOptimizer._match_clusters_to_hubs(network, clusters, centroids, hub_subset)
+
+    def metrics(mapping, wall_time):
+        locations = network.locations
+        distance = sum(
+            abs(locations[store_id].x - locations[hub_id].x) + abs(locations[store_id].y - locations[hub_id].y)
+            for store_id, hub_id in mapping.items()
+        )
+        permutations = math.perm(len(hub_subset), len(clusters))
+        return {"quality": distance, "throughput": {"permutations_per_second": permutations / wall_time}}
+
+    return run, metrics
+
+
+def case_simulated_annealing(ctx: BenchmarkContext):
+    network = ctx.network(with_distances=True)
+    cost_model = HubCostModel.for_network(network)
+    hubs = tuple(loc.id for loc in ctx.instance.wholesalers[:ctx.options["match_hubs"]])
+    hub_indices = cost_model.hub_indices(hubs)
+    nearest = cost_model.store_costs[hub_indices].argmin(axis=0)
+    initial_assignments = {store_id: hubs[nearest[idx]] for idx, store_id in enumerate(cost_model.stores)}
+    iterations = ctx.options["sa_iterations"]
+
+    def run():
+        return KMeansSimulatedAnnealingOptimizer._simulated_annealing(
+            network,
+            hubs,
+            initial_assignments,
+            cost_model.suppliers,
+            1.0,
+            initial_temp=100.0,
+            cooling_rate=0.995,
+            iterations=iterations,
+            cost_model=cost_model,
+        )
+
+    def metrics(result, wall_time):
+        _, cost = result
+        return {"quality": cost["total_cost"], "throughput": {"moves_per_second": iterations / wall_time}}
+
+    return run, metrics
+
+
+def case_create_data_model(ctx: BenchmarkContext):
+    ctx.require_routing()
+
+    def run():
+        return _load_data_model(ctx.workdir)
+
+    def metrics(data, wall_time):
+        return {"quality": None, "throughput": {"nodes_per_second": len(data["demands"]) / wall_time}}
+
+    return run, metrics
+
+
+def case_evaluate_solution(ctx: BenchmarkContext):
+    data = ctx.routing_data()
+    solution = build_initial_solution(data)
+    repeats = ctx.options["evaluation_repeats"]
+
+    def run():
+        result = None
+        for _ in range(repeats):
+            result = evaluate_solution(data, solution)
+        return result
+
+    def metrics(result, wall_time):
+        cost, _ = result
+        return {"quality": cost, "throughput": {"evaluations_per_second": repeats / wall_time}}
+
+    return run, metrics
+
+
+def case_solve_cvrp(ctx: BenchmarkContext):
+    data = ctx.routing_data()
+    max_iterations = ctx.options["cvrp_iterations"]
+    iterations = _cvrp_iteration_count(max_iterations=max_iterations)
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return solve_cvrp(data, plot=False, max_iterations=max_iterations)
+
+    def metrics(result, wall_time):
+        solution, _ = result
+        cost = evaluate_solution(data, solution)[0] if solution else None
+        return {"quality": cost, "throughput": {"iterations_per_second": iterations / wall_time}}
+
+    return run, metrics
+
+
+def _cvrp_iteration_count(initial_temp=100, cooling_rate=0.995, min_temp=1, iterations_per_temp=30,
+                          max_iterations=20000) -> int:
+    """solve_cvrp 在给定参数下执行的迭代次数（与其主循环的终止条件一致）"""
+    temp, total = initial_temp, 0
+    while temp > min_temp and total < max_iterations:
+        total = min(total + iterations_per_temp, max_iterations)
+        temp *= cooling_rate
+    return total
+
+
+CASES: Dict[str, Case] = {
+    "calculate_distances": case_calculate_distances,
+    "cluster_entities": case_cluster_entities,
+    "match_clusters_to_hubs": case_match_clusters_to_hubs,
+    "simulated_annealing": case_simulated_annealing,
+    "create_data_model": case_create_data_model,
+    "evaluate_solution": case_evaluate_solution,
+    "solve_cvrp": case_solve_cvrp,
+}
+
+
+def _measure(run: Callable[[], object]) -> Tuple[object, float, float, float]:
+    """返回 (结果, 耗时, 峰值 RSS, 峰值相对开始时的增量)；增量不受同一进程中此前用例占用内存的影响"""
+    with _PeakRSS() as rss:
+        start = time.perf_counter()
+        result = run()
+        wall_time = time.perf_counter() - start
+    return result, wall_time, rss.peak / 1024 ** 2, (rss.peak - rss.start) / 1024 ** 2
+
+
+def _summarize(samples: List[Dict]) -> Dict:
+    wall_times = [sample["wall_time"] for sample in samples]
+    qualities = [sample["quality"] for sample in samples if sample["quality"] is not None]
+    throughput_names = samples[0]["throughput"].keys()
+    return {
+        "wall_time_median": statistics.median(wall_times),
+        "wall_time_mean": statistics.fmean(wall_times),
+        "wall_time_stdev": statistics.stdev(wall_times) if len(wall_times) > 1 else 0.0,
+        "wall_time_min": min(wall_times),
+        "peak_rss_mb_max": max(sample["peak_rss_mb"] for sample in samples),
+        "rss_growth_mb_max": max(sample["rss_growth_mb"] for sample in samples),
+        "quality_mean": statistics.fmean(qualities) if qualities else None,
+        "throughput_median": {
+            name: statistics.median(sample["throughput"][name] for sample in samples) for name in throughput_names
+        },
+    }
+
+
+def run_case(name: str, ctx: BenchmarkContext, repeats: int, seed: int) -> Dict:
+    """重复运行一个用例；每次重复使用不同的随机种子，算例本身保持不变"""
+    record = {"case": name, "scale": ctx.scale, "stores": ctx.store_count, "samples": []}
+    for repeat in range(repeats):
+        random.seed(seed + repeat)
+        np.random.seed(seed + repeat)
+        try:
+            run, metrics = CASES[name](ctx)
+        except SkipCase as exc:
+            record["skipped"] = str(exc)
+            return record
+
+        result, wall_time, peak_rss_mb, rss_growth_mb = _measure(run)
+        record["samples"].append({
+            "seed": seed + repeat,
+            "wall_time": wall_time,
+            "peak_rss_mb": peak_rss_mb,
+            "rss_growth_mb": rss_growth_mb,
+            **metrics(result, wall_time),
+        })
+
+    record["summary"] = _summarize(record["samples"])
+    return record
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata(scales: List[str], cases: List[str], repeats: int, seed: int, options: Dict) -> Dict:
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "cpu_count": os.cpu_count(),
+        "scales": scales,
+        "cases": cases,
+        "repeats": repeats,
+        "seed": seed,
+        "options": options,
+    }
+
+
+def run_benchmarks(
+    scales: List[str],
+    cases: Optional[List[str]] = None,
+    repeats: int = 3,
+    seed: int = 0,
+    options: Optional[Dict] = None,
+    log: Callable[[str], None] = print,
+) -> Dict:
+    """按规模依次运行各用例，返回可直接写出为 JSON 的结果字典"""
+    cases = list(cases or CASES)
+    unknown = [name for name in cases if name not in CASES]
+    if unknown:
+        raise ValueError(f"未知的基准用例: {', '.join(unknown)}")
+    if repeats <= 0:
+        raise ValueError("repeats 必须大于0")
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+
+    results = []
+    for scale in scales:
+        instance = generate_scale(scale, seed=seed)
+        with tempfile.TemporaryDirectory(prefix=f"bench-{scale}-") as workdir:
+            if len(instance.stores) <= options["routing_max_stores"]:
+                write_instance(instance, workdir)
+            ctx = BenchmarkContext(scale, instance, options, workdir)
+            for name in cases:
+                record = run_case(name, ctx, repeats, seed)
+                results.append(record)
+                if "skipped" in record:
+                    log(f"[{scale}] {name}: 跳过 ({record['skipped']})")
+                else:
+                    summary = record["summary"]
+                    log(f"[{scale}] {name}: 中位耗时 {summary['wall_time_median']:.4f}s, "
+                        f"峰值内存 {summary['peak_rss_mb_max']:.1f} MB")
+
+    return {"metadata": _metadata(scales, cases, repeats, seed, options), "results": results}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="热点路径基准测试")
+    parser.add_argument("--scales", default="1k", help=f"逗号分隔的规模 (可选: {', '.join(SCALES)}，默认: 1k)")
+    parser.add_argument("--cases", default=None, help=f"逗号分隔的用例 (默认全部: {', '.join(CASES)})")
+    parser.add_argument("--repeats", type=int, default=3, help="每个用例的重复次数 (默认: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="算例与算法的随机种子 (默认: 0)")
+    parser.add_argument("--output", default="benchmark_results.json", help="结果JSON文件 (默认: benchmark_results.json)")
+    for name, default in DEFAULT_OPTIONS.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(default), default=default)
+    args = parser.parse_args(argv)
+
+    scales = [scale.strip() for scale in args.scales.split(",") if scale.strip()]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"未知的规模: {', '.join(unknown)}")
+    cases = [case.strip() for case in args.cases.split(",")] if args.cases else None
+    options = {name: getattr(args, name) for name in DEFAULT_OPTIONS}
+
+    try:
+        report = run_benchmarks(scales, cases, args.repeats, args.seed, options)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"基准结果已保存到 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import contextlib
+import io
+import math
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from locations import Location, save_locations_to_file
+
+# 规模名称 -> 门店、批发商（候选中转点）与生产商数量
+SCALES: Dict[str, Dict[str, int]] = {
+    "1k": {"stores": 1000, "wholesalers": 20, "manufacturers": 5},
+    "10k": {"stores": 10000, "wholesalers": 50, "manufacturers": 10},
+    "100k": {"stores": 100000, "wholesalers": 200, "manufacturers": 20},
+}
+
+DEFAULT_VEHICLE_CAPACITY = 90.0
+
+
+class SyntheticInstance:
+    """可复现的合成算例：地点列表、车辆容量以及用于路径优化的仓库（中转点）"""
+
+    def __init__(self, locations: List[Location], vehicle_capacities: List[float], depot_ids: List[str], seed: int):
+        self.locations = locations
+        self.vehicle_capacities = vehicle_capacities
+        self.depot_ids = depot_ids
+        self.seed = seed
+
+    @property
+    def stores(self) -> List[Location]:
+        return [loc for loc in self.locations if loc.type == "store"]
+
+    @property
+    def wholesalers(self) -> List[Location]:
+        return [loc for loc in self.locations if loc.type == "wholesaler"]
+
+    @property
+    def total_demand(self) -> float:
+        return float(sum(loc.capacity or 0.0 for loc in self.stores))
+
+
+def generate_instance(
+    stores: int,
+    wholesalers: int = 20,
+    manufacturers: int = 5,
+    seed: int = 0,
+    extent: Optional[float] = None,
+    demand_range=(1, 20),
+    city_count: Optional[int] = None,
+    depot_count: int = 5,
+    vehicle_capacity: float = DEFAULT_VEHICLE_CAPACITY,
+    fleet_slack: float = 1.5,
+) -> SyntheticInstance:
+    """按种子生成合成算例
+
+    门店围绕 city_count 个城市中心呈正态分布（更接近真实门店的聚集分布），批发商均匀分布，生产商位于区域外围。
+    区域边长 extent 默认随门店数按平方根增长，使门店密度与规模无关；
+    车队按总需求 / 车辆容量 × fleet_slack 配置，并为每个仓库额外预留一辆车。
+    """
+    if stores <= 0 or wholesalers <= 0 or manufacturers <= 0:
+        raise ValueError("门店、批发商与生产商数量必须大于0")
+
+    rng = np.random.default_rng(seed)
+    extent = float(extent) if extent is not None else 10.0 * math.sqrt(stores)
+    city_count = city_count or max(1, int(round(math.sqrt(stores) / 5)))
+
+    centers = rng.uniform(0.1 * extent, 0.9 * extent, size=(city_count, 2))
+    spread = extent / (2.0 * math.sqrt(city_count))
+    store_xy = np.clip(
+        centers[rng.integers(city_count, size=stores)] + rng.normal(0.0, spread, size=(stores, 2)),
+        0.0,
+        extent,
+    )
+    demands = rng.integers(demand_range[0], demand_range[1] + 1, size=stores)
+    wholesaler_xy = rng.uniform(0.0, extent, size=(wholesalers, 2))
+    angles = rng.uniform(0.0, 2 * math.pi, size=manufacturers)
+    manufacturer_xy = extent / 2 + 0.6 * extent * np.column_stack([np.cos(angles), np.sin(angles)])
+
+    locations = [
+        Location(f"M-{idx}", f"生产商{idx}", "manufacturer", round(float(x), 2), round(float(y), 2))
+        for idx, (x, y) in enumerate(manufacturer_xy)
+    ]
+    locations += [
+        Location(f"W-{idx}", f"批发商{idx}", "wholesaler", round(float(x), 2), round(float(y), 2))
+        for idx, (x, y) in enumerate(wholesaler_xy)
+    ]
+    locations += [
+        Location(f"S-{idx}", f"门店{idx}", "store", round(float(x), 2), round(float(y), 2), float(demand))
+        for idx, ((x, y), demand) in enumerate(zip(store_xy, demands))
+    ]
+
+    depot_ids = [f"W-{idx}" for idx in range(min(depot_count, wholesalers))]
+    vehicle_count = int(math.ceil(demands.sum() / vehicle_capacity * fleet_slack)) + len(depot_ids)
+    return SyntheticInstance(locations, [vehicle_capacity] * vehicle_count, depot_ids, seed)
+
+
+def generate_scale(scale: str, seed: int = 0, **kwargs) -> SyntheticInstance:
+    """按 SCALES 中的规模名称生成算例"""
+    if scale not in SCALES:
+        raise ValueError(f"未知的规模: {scale}，可选: {', '.join(SCALES)}")
+    return generate_instance(seed=seed, **{**SCALES[scale], **kwargs})
+
+
+def write_instance(instance: SyntheticInstance, directory: str) -> None:
+    """写出 solve.create_data_model 读取的 locations.csv、car.xlsx 与 optimized_hubs.xlsx"""
+    os.makedirs(directory, exist_ok=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        save_locations_to_file(instance.locations, os.path.join(directory, "locations.csv"))
+
+    pd.DataFrame({"容量": instance.vehicle_capacities}).to_excel(os.path.join(directory, "car.xlsx"), index=False)
+
+    depots = {loc.id: loc for loc in instance.wholesalers if loc.id in instance.depot_ids}
+    hub_locations = [depots[depot_id] for depot_id in instance.depot_ids]
+    pd.DataFrame({
+        "序号": [loc.id for loc in hub_locations],
+        "横坐标 (X)": [loc.x for loc in hub_locations],
+        "纵坐标 (Y)": [loc.y for loc in hub_locations],
+    }).to_excel(os.path.join(directory, "optimized_hubs.xlsx"), index=False)
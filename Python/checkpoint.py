@@ -0,0 +1,145 @@
+"""长时间退火运行的检查点与断点续算
+
+求解器只在安全点调用 Checkpointer.maybe_save（CVRP 每个温度段结束、中转点优化每个组合评估完成），
+按时间或迭代间隔把完整的搜索状态连同 random / numpy 全局随机数状态写入 pickle 文件。
+写入先落到同目录的临时文件再 os.replace，进程在任意时刻被杀死都不会留下半个检查点。
+
+以同一检查点路径再次运行时，求解器从文件恢复状态与随机数并从中断处继续；
+决定搜索轨迹的参数（指纹）与文件中不一致时拒绝恢复。运行正常结束后检查点文件默认删除。
+检查点只应读取自己写出的文件（pickle 不能用于不可信来源）。
+"""
+import contextlib
+import os
+import pickle
+import random
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+CHECKPOINT_VERSION = 1
+
+
+def capture_rng_state() -> Dict:
+    """random 与 numpy 全局随机数生成器的当前状态"""
+    return {"random": random.getstate(), "numpy": np.random.get_state()}
+
+
+def restore_rng_state(state: Dict) -> None:
+    random.setstate(state["random"])
+    np.random.set_state(state["numpy"])
+
+
+class Checkpointer:
+    """检查点文件的读写与保存节奏
+
+    every_seconds 为距上次保存的最短秒数，every_iterations 为距上次保存的最少迭代数
+    （迭代单位由求解器决定：CVRP 为退火迭代，中转点优化为已评估的组合数），任一条件满足即保存；
+    两者都为空时每个安全点都保存。keep 为 True 时运行结束后保留检查点文件。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        every_seconds: Optional[float] = 60.0,
+        every_iterations: Optional[int] = None,
+        keep: bool = False,
+    ):
+        if not path:
+            raise ValueError("检查点路径不能为空")
+        if every_seconds is not None and every_seconds < 0:
+            raise ValueError("every_seconds 不能为负数")
+        if every_iterations is not None and every_iterations <= 0:
+            raise ValueError("every_iterations 必须大于0")
+
+        self.path = path
+        self.every_seconds = every_seconds
+        self.every_iterations = every_iterations
+        self.keep = keep
+        self.kind = None
+        self.fingerprint = None
+        self.saves = 0
+        self.resumed = False
+        self._last_time = time.monotonic()
+        self._last_iteration = 0
+
+    def begin(self, kind: str, fingerprint: Dict) -> Optional[Dict]:
+        """开始一次运行；存在匹配的检查点时恢复随机数状态并返回保存的求解器状态，否则返回 None"""
+        self.kind = kind
+        self.fingerprint = fingerprint
+        self.resumed = False
+        self._last_time = time.monotonic()
+        self._last_iteration = 0
+
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                payload = pickle.load(f)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError) as exc:
+            raise ValueError(f"检查点文件已损坏: {self.path}") from exc
+
+        if not isinstance(payload, dict) or payload.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"不支持的检查点格式: {self.path}")
+        if payload["kind"] != kind:
+            raise ValueError(f"检查点 {self.path} 属于 {payload['kind']}，不能用于 {kind}")
+        if payload["fingerprint"] != fingerprint:
+            raise ValueError(f"检查点 {self.path} 的运行参数与本次不一致，请删除该文件后重新开始")
+
+        restore_rng_state(payload["rng"])
+        self._last_iteration = payload["iteration"]
+        self.resumed = True
+        return payload["state"]
+
+    def due(self, iteration: int) -> bool:
+        """当前安全点是否需要保存"""
+        if self.every_seconds is None and self.every_iterations is None:
+            return True
+        if self.every_iterations is not None and iteration - self._last_iteration >= self.every_iterations:
+            return True
+        return self.every_seconds is not None and time.monotonic() - self._last_time >= self.every_seconds
+
+    def maybe_save(self, iteration: int, build_state: Callable[[], Dict]) -> bool:
+        """到达保存间隔时调用 build_state 组装状态并保存；未到间隔时不组装状态"""
+        if not self.due(iteration):
+            return False
+        self.save(iteration, build_state())
+        return True
+
+    def save(self, iteration: int, state: Dict) -> None:
+        """原子地写入检查点（随机数状态取自调用时刻，调用方须在安全点调用）"""
+        if self.kind is None:
+            raise RuntimeError("保存检查点前必须先调用 begin")
+
+        payload = {
+            "version": CHECKPOINT_VERSION,
+            "kind": self.kind,
+            "fingerprint": self.fingerprint,
+            "iteration": iteration,
+            "saved_at": time.time(),
+            "rng": capture_rng_state(),
+            "state": state,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temp_path = tempfile.mkstemp(prefix=".checkpoint-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+
+        self.saves += 1
+        self._last_iteration = iteration
+        self._last_time = time.monotonic()
+
+    def complete(self) -> None:
+        """运行正常结束：未设置 keep 时删除检查点文件"""
+        if not self.keep:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.path)
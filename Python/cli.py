@@ -0,0 +1,458 @@
+"""非交互式批处理命令行
+
+所有参数通过命令行或 JSON 配置文件给出，不读取标准输入，结果写入文件，适合脚本、定时任务与集群批量运行:
+
+    python Python/cli.py load --locations locations.csv --output summary.json
+    python Python/cli.py optimize-hubs --hub-counts 1-3 --option iterations=2000 --output result.json
+    python Python/cli.py route --hubs optimized_hubs.xlsx --car car.xlsx --max-iterations 5000 --output routes.json
+    python Python/cli.py --config scenario.json pipeline --seed 7
+
+配置文件为 JSON 对象，键与选项同名（连字符写作下划线）；顶层键对所有子命令生效，
+与子命令同名的键（如 "pipeline": {...}）只对该子命令生效；命令行显式给出的选项优先于配置文件。
+
+指定 --checkpoint-dir 时定期保存求解状态（hubs.checkpoint / routes.checkpoint），
+被中断后以相同参数重新运行即从中断处继续，适合可抢占的批处理资源。
+
+退出码: 0 成功，1 未找到可行方案，2 参数或配置无效，3 输入数据无法读取。
+"""
+import argparse
+import contextlib
+import inspect
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from locations import load_locations_from_file, save_locations_to_file
+from network_model import LogisticsNetwork
+from optimizers.base_optimizer import get_optimizer, list_optimizers
+from pipeline import (
+    DEFAULT_UNIT_PRICE,
+    DEFAULT_VEHICLE_FIXED_COST,
+    routes_to_ids,
+    run_routing_stage,
+    summarize_hub_solution,
+    summarize_routes,
+)
+from solve import create_data_model, solve_cvrp
+
+EXIT_OK = 0
+EXIT_INFEASIBLE = 1
+EXIT_USAGE = 2
+EXIT_INPUT = 3
+
+COMMANDS = ("load", "optimize-hubs", "route", "pipeline")
+
+
+class CliError(Exception):
+    """带退出码的命令行错误"""
+
+    def __init__(self, message: str, exit_code: int):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+def parse_hub_counts(text: Optional[str]) -> Optional[List[int]]:
+    """解析中转点数量集合："1,2,4"、"1-3" 或组合 "1-3,5"；空值或 "all" 表示全部数量"""
+    if text is None or str(text).strip().lower() in ("", "all"):
+        return None
+    if isinstance(text, (list, tuple)):
+        return sorted({int(value) for value in text})
+    counts = set()
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            low, high = (int(value) for value in part.split("-", 1))
+            counts.update(range(low, high + 1))
+        else:
+            counts.add(int(part))
+    return sorted(counts)
+
+
+def parse_options(specs: List[str], optimizer_cls) -> Dict:
+    """解析 --option NAME=VALUE；优化器菜单参数按其声明的类型转换，其余按 JSON 解析，失败时作为字符串"""
+    declared = {name: value_type for name, _, value_type, _ in optimizer_cls.menu_parameters}
+    options = {}
+    for spec in specs:
+        if "=" not in spec:
+            raise CliError(f"参数格式应为 NAME=VALUE: {spec}", EXIT_USAGE)
+        name, value = (part.strip() for part in spec.split("=", 1))
+        if name in declared:
+            try:
+                options[name] = declared[name](value)
+            except ValueError:
+                raise CliError(f"参数 {name} 的取值无效: {value}", EXIT_USAGE) from None
+            continue
+        try:
+            options[name] = json.loads(value)
+        except json.JSONDecodeError:
+            options[name] = value
+    return options
+
+
+def load_config(path: str, command: str) -> Tuple[Dict, Dict]:
+    """读取 JSON 配置，返回 (顶层共享键, 子命令专属键)，键名中的连字符转为下划线"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except OSError as exc:
+        raise CliError(f"无法读取配置文件 {path}: {exc}", EXIT_INPUT) from None
+    except json.JSONDecodeError as exc:
+        raise CliError(f"配置文件 {path} 不是有效的 JSON: {exc}", EXIT_USAGE) from None
+    if not isinstance(config, dict):
+        raise CliError(f"配置文件 {path} 必须是 JSON 对象", EXIT_USAGE)
+
+    section = config.get(command) or {}
+    if not isinstance(section, dict):
+        raise CliError(f"配置文件中 {command} 一节必须是 JSON 对象", EXIT_USAGE)
+    shared = {key.replace("-", "_"): value for key, value in config.items() if key not in COMMANDS}
+    return shared, {key.replace("-", "_"): value for key, value in section.items()}
+
+
+def _seed(seed: Optional[int]) -> None:
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+
+def _write_json(path: str, payload: Dict) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2, default=json_default)
+
+
+def json_default(value):
+    """json.dump 的 default：将 numpy 标量与数组转换为 Python 类型"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"无法序列化 {type(value).__name__}")
+
+
+def save_hubs(network: LogisticsNetwork, hub_ids: List[str], path: str) -> None:
+    """按 solve.create_data_model 读取的格式保存中转点表"""
+    import pandas as pd
+
+    hub_locations = [network.locations[hub_id] for hub_id in hub_ids if hub_id in network.locations]
+    pd.DataFrame({
+        "序号": [loc.id for loc in hub_locations],
+        "横坐标 (X)": [loc.x for loc in hub_locations],
+        "纵坐标 (Y)": [loc.y for loc in hub_locations],
+    }).to_excel(path, index=False)
+
+
+def _load_network(path: str) -> LogisticsNetwork:
+    locations = load_locations_from_file(path)
+    if not locations:
+        raise CliError(f"未能从 {path} 加载有效地点数据", EXIT_INPUT)
+    network = LogisticsNetwork(locations)
+    network.calculate_distances()
+    return network
+
+
+def _hub_result(best_solution: Dict, evaluated: List[Dict], optimizer: str, runtime: float) -> Dict:
+    return {"optimizer": optimizer, "runtime": runtime, **summarize_hub_solution(best_solution, evaluated)}
+
+
+def _route_result(data: Dict, solution: Dict, vehicle_plan: Dict, runtime: float) -> Dict:
+    return {"runtime": runtime, **summarize_routes(data, solution, vehicle_plan)}
+
+
+def _solver_options(args) -> Dict:
+    return {
+        "initial_temp": args.initial_temp,
+        "cooling_rate": args.cooling_rate,
+        "min_temp": args.min_temp,
+        "iterations_per_temp": args.iterations_per_temp,
+        "max_iterations": args.max_iterations,
+        "time_limit": args.time_limit,
+        "stall_iterations": args.stall_iterations,
+        "stall_seconds": args.stall_seconds,
+    }
+
+
+@contextlib.contextmanager
+def _telemetry(path: Optional[str], sample_every: int):
+    if path is None:
+        yield None
+        return
+    from telemetry import TelemetrySink
+
+    with TelemetrySink(path, sample_every=sample_every) as sink:
+        yield sink
+
+
+def _checkpointer(args, stage: str):
+    """--checkpoint-dir 下该阶段的检查点（hubs / routes），未指定目录时返回 None"""
+    if args.checkpoint_dir is None:
+        return None
+    from checkpoint import Checkpointer
+
+    os.makedirs(args.checkpoint_dir, exist_ok=True)
+    return Checkpointer(os.path.join(args.checkpoint_dir, f"{stage}.checkpoint"),
+                        every_seconds=args.checkpoint_interval)
+
+
+def _print_progress(event: Dict) -> None:
+    """--progress：把中转点优化的进度事件逐行写到标准错误（--quiet 时仍然可见）"""
+    kind = event["event"]
+    if kind == "subset":
+        return
+    done, remaining = event["subsets_done"], event["subsets_remaining"]
+    eta = f"，预计剩余 {event['eta']:.1f} 秒" if event["eta"] is not None and remaining else ""
+    if kind == "count_started":
+        message = f"开始评估 {event['hub_count']} 个中转点（{event['subsets']} 个组合）"
+    elif kind == "incumbent":
+        message = f"新的最优方案: {', '.join(event['active_hubs'])}，总成本 {event['total_cost']:.2f}"
+    elif kind == "count_finished":
+        message = f"{event['hub_count']} 个中转点" + ("被下界剪枝" if event["pruned"] else
+                                                  f"评估完成，跳过 {event['skipped']} 个组合")
+    else:
+        message = "中转点优化结束"
+    print(f"[{done}/{done + remaining}] {message}{eta}", file=sys.stderr, flush=True)
+
+
+def _optimize_hubs(args, network: LogisticsNetwork):
+    optimizer_cls = get_optimizer(args.optimizer)
+    options = {**(args.options or {}), **parse_options(args.option, optimizer_cls)}
+    accepted = inspect.signature(optimizer_cls.optimize).parameters
+    unknown = sorted(set(options) - set(accepted))
+    if unknown:
+        raise CliError(f"优化器 {args.optimizer} 不支持参数: {', '.join(unknown)}", EXIT_USAGE)
+    checkpoint = _checkpointer(args, "hubs")
+    if checkpoint is not None:
+        if "checkpoint" not in accepted:
+            raise CliError(f"优化器 {args.optimizer} 不支持检查点", EXIT_USAGE)
+        options["checkpoint"] = checkpoint
+    if args.progress:
+        if "progress" not in accepted:
+            raise CliError(f"优化器 {args.optimizer} 不支持进度输出", EXIT_USAGE)
+        options["progress"] = _print_progress
+    start = time.perf_counter()
+    try:
+        best_solution, evaluated = optimizer_cls.optimize(
+            network,
+            hub_counts=parse_hub_counts(args.hub_counts),
+            unit_transport_cost=args.unit_cost,
+            **options,
+        )
+    except RuntimeError as exc:
+        raise CliError(f"中转点优化未找到可行方案: {exc}", EXIT_INFEASIBLE) from None
+    return best_solution, evaluated, time.perf_counter() - start
+
+
+def cmd_load(args) -> int:
+    network = _load_network(args.locations)
+    summary = {
+        "locations": args.locations,
+        "manufacturers": len(network.manufacturers),
+        "wholesalers": len(network.wholesalers),
+        "stores": len(network.stores),
+        "total_demand": float(sum(network.locations[store_id].capacity or 0.0 for store_id in network.stores)),
+    }
+    if args.save:
+        if not save_locations_to_file(list(network.locations.values()), args.save):
+            raise CliError(f"保存到 {args.save} 失败", EXIT_INPUT)
+    if args.output:
+        _write_json(args.output, summary)
+    print(json.dumps(summary, ensure_ascii=False))
+    return EXIT_OK
+
+
+def cmd_optimize_hubs(args) -> int:
+    network = _load_network(args.locations)
+    best_solution, evaluated, runtime = _optimize_hubs(args, network)
+    if args.hubs_output:
+        save_hubs(network, best_solution["active_hubs"], args.hubs_output)
+    if args.output:
+        _write_json(args.output, _hub_result(best_solution, evaluated, args.optimizer, runtime))
+    print(f"启用中转点: {', '.join(best_solution['active_hubs'])}，总成本: {best_solution['total_cost']:.2f}，"
+          f"耗时 {runtime:.2f} 秒")
+    return EXIT_OK
+
+
+def cmd_route(args) -> int:
+    data = create_data_model(args.hubs, args.car, args.locations, args.unit_price, args.vehicle_fixed_cost)
+    if "distance_matrix" not in data:
+        raise CliError("读取路径优化输入失败", EXIT_INPUT)
+
+    start = time.perf_counter()
+    with _telemetry(args.telemetry, args.telemetry_every) as sink:
+        solution, vehicle_plan = solve_cvrp(data, plot=False, telemetry=sink, checkpoint=_checkpointer(args, "routes"),
+                                            **_solver_options(args))
+    runtime = time.perf_counter() - start
+    if not vehicle_plan:
+        raise CliError("路径优化未找到满足车辆限制的可行解", EXIT_INFEASIBLE)
+
+    result = _route_result(data, solution, vehicle_plan, runtime)
+    if args.output:
+        _write_json(args.output, result)
+    print(f"总成本: {result['total_cost']:.2f}，使用车辆 {result['vehicles_used']}/{result['num_vehicles']}，"
+          f"耗时 {runtime:.2f} 秒")
+    return EXIT_OK
+
+
+def cmd_pipeline(args) -> int:
+    network = _load_network(args.locations)
+    best_solution, evaluated, hub_runtime = _optimize_hubs(args, network)
+    if args.hubs_output:
+        save_hubs(network, best_solution["active_hubs"], args.hubs_output)
+
+    start = time.perf_counter()
+    try:
+        with _telemetry(args.telemetry, args.telemetry_every) as sink:
+            data, solution, vehicle_plan = run_routing_stage(
+                network,
+                best_solution,
+                car_file=args.car,
+                unit_price=args.unit_price,
+                vehicle_fixed_cost=args.vehicle_fixed_cost,
+                telemetry=sink,
+                checkpoint=_checkpointer(args, "routes"),
+                **_solver_options(args),
+            )
+    except (OSError, ValueError) as exc:
+        raise CliError(f"构建路径优化数据失败: {exc}", EXIT_INPUT) from None
+    if not vehicle_plan:
+        raise CliError("路径优化未找到满足车辆限制的可行解", EXIT_INFEASIBLE)
+
+    route_result = _route_result(data, solution, vehicle_plan, time.perf_counter() - start)
+    if args.output:
+        _write_json(args.output, {
+            "hubs": _hub_result(best_solution, evaluated, args.optimizer, hub_runtime),
+            "routes": route_result,
+            "routes_by_hub": routes_to_ids(data, solution),
+        })
+    print(f"启用中转点: {', '.join(best_solution['active_hubs'])}，中转点总成本: {best_solution['total_cost']:.2f}，"
+          f"配送总成本: {route_result['total_cost']:.2f}")
+    return EXIT_OK
+
+
+def _add_hub_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--optimizer", default="kmeans_sa",
+                        help=f"优化器名称，可选: {', '.join(cls.name for cls in list_optimizers())} (默认: kmeans_sa)")
+    parser.add_argument("--hub-counts", default=None, help="中转点数量集合，如 1,2,4 或 1-3 (默认: 全部)")
+    parser.add_argument("--unit-cost", type=float, default=1.0, help="单位距离运输成本 (默认: 1.0)")
+    parser.add_argument("--option", action="append", default=[], metavar="NAME=VALUE",
+                        help="优化器参数，可重复指定；例如 --option iterations=2000")
+    parser.add_argument("--hubs-output", default=None, help="将选定的中转点另存为 Excel（route 子命令的 --hubs 输入）")
+    parser.add_argument("--progress", action="store_true", help="在标准错误输出中转点优化的进度与预计剩余时间")
+
+
+def _add_route_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--car", default="car.xlsx", help="车辆信息表 (默认: car.xlsx)")
+    parser.add_argument("--unit-price", type=float, default=DEFAULT_UNIT_PRICE, help="配送单价 (默认: 3)")
+    parser.add_argument("--vehicle-fixed-cost", type=float, default=DEFAULT_VEHICLE_FIXED_COST,
+                        help="车辆固定使用成本 (默认: 500)")
+    parser.add_argument("--initial-temp", type=float, default=100, help="初始温度 (默认: 100)")
+    parser.add_argument("--cooling-rate", type=float, default=0.995, help="降温系数 (默认: 0.995)")
+    parser.add_argument("--min-temp", type=float, default=1, help="终止温度 (默认: 1)")
+    parser.add_argument("--iterations-per-temp", type=int, default=30, help="每个温度的迭代次数 (默认: 30)")
+    parser.add_argument("--max-iterations", type=int, default=20000, help="最大迭代次数 (默认: 20000)")
+    parser.add_argument("--time-limit", type=float, default=None, help="路径优化的墙钟时间预算（秒），到期返回当前最优解")
+    parser.add_argument("--stall-iterations", type=int, default=None, help="最优解连续多少次迭代无改进即停止")
+    parser.add_argument("--stall-seconds", type=float, default=None, help="最优解连续多少秒无改进即停止")
+    parser.add_argument("--telemetry", default=None, help="收敛遥测输出文件 (.jsonl)")
+    parser.add_argument("--telemetry-every", type=int, default=10, help="遥测采样间隔（迭代数，默认: 10）")
+
+
+def build_parser(defaults: Optional[Dict[str, Dict]] = None) -> argparse.ArgumentParser:
+    """defaults 为 {子命令: {dest: 默认值}}，用于以配置文件覆盖选项默认值"""
+    defaults = defaults or {}
+    parser = argparse.ArgumentParser(description="711便利店物流网络优化系统（批处理模式）")
+    parser.add_argument("--config", default=None, help="JSON 配置文件")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--locations", default="locations.csv", help="地点数据文件 (默认: locations.csv)")
+    common.add_argument("--output", default=None, help="结果 JSON 文件")
+    common.add_argument("--seed", type=int, default=None, help="随机种子，指定后结果可复现")
+    common.add_argument("--quiet", action="store_true", help="不输出求解过程信息，只输出错误")
+
+    checkpointing = argparse.ArgumentParser(add_help=False)
+    checkpointing.add_argument("--checkpoint-dir", default=None, help="检查点目录，已有检查点时从中断处继续")
+    checkpointing.add_argument("--checkpoint-interval", type=float, default=60.0,
+                               help="检查点保存间隔秒数 (默认: 60)")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    load_parser = subparsers.add_parser("load", parents=[common], help="读取并校验地点数据")
+    load_parser.add_argument("--save", default=None, help="将规范化后的地点数据另存为 CSV")
+    load_parser.set_defaults(handler=cmd_load, **defaults.get("load", {}))
+
+    hubs_parser = subparsers.add_parser("optimize-hubs", parents=[common, checkpointing], help="中转点选址优化")
+    _add_hub_arguments(hubs_parser)
+    hubs_parser.set_defaults(handler=cmd_optimize_hubs, **defaults.get("optimize-hubs", {}))
+
+    route_parser = subparsers.add_parser("route", parents=[common, checkpointing], help="配送路径优化 (CVRP)")
+    route_parser.add_argument("--hubs", default="optimized_hubs.xlsx", help="中转点表 (默认: optimized_hubs.xlsx)")
+    _add_route_arguments(route_parser)
+    route_parser.set_defaults(handler=cmd_route, **defaults.get("route", {}))
+
+    pipeline_parser = subparsers.add_parser("pipeline", parents=[common, checkpointing], help="中转点选址 + 路径优化，全程在内存中衔接")
+    _add_hub_arguments(pipeline_parser)
+    _add_route_arguments(pipeline_parser)
+    pipeline_parser.set_defaults(handler=cmd_pipeline, **defaults.get("pipeline", {}))
+
+    return parser
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """解析参数；指定 --config 时以配置文件的取值作为默认值再解析一次，使命令行显式给出的选项优先"""
+    args = build_parser().parse_args(argv)
+    args.options = None
+    if args.config is None:
+        return args
+
+    shared, section = load_config(args.config, args.command)
+    # options 对象直接作为优化器参数；子命令专属键必须是该子命令的选项，
+    # 顶层键只需是某个子命令的选项（其余子命令忽略它）
+    options = section.pop("options", shared.pop("options", None))
+    if options is not None and not isinstance(options, dict):
+        raise CliError("配置文件中的 options 必须是 JSON 对象", EXIT_USAGE)
+    internal = {"handler", "config", "command", "options"}
+    known = set(vars(args)) - internal
+    known_any = {dest for command in COMMANDS for dest in vars(build_parser().parse_args([command]))} - internal
+    unknown = sorted((set(section) - known) | (set(shared) - known_any))
+    if unknown:
+        raise CliError(f"配置文件中存在 {args.command} 不支持的选项: {', '.join(unknown)}", EXIT_USAGE)
+    config = {**{key: value for key, value in shared.items() if key in known}, **section}
+    if "option" in config:
+        config["option"] = list(config["option"])
+
+    args = build_parser({args.command: config}).parse_args(argv)
+    args.options = options
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    try:
+        args = parse_args(argv)
+        with contextlib.ExitStack() as stack:
+            if args.quiet:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            _seed(args.seed)
+            return args.handler(args)
+    except CliError as exc:
+        print(exc, file=sys.stderr)
+        return exc.exit_code
+    except ValueError as exc:
+        print(f"参数无效: {exc}", file=sys.stderr)
+        return EXIT_USAGE
+    except OSError as exc:
+        print(f"读写文件失败: {exc}", file=sys.stderr)
+        return EXIT_INPUT
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+from collections.abc import Mapping
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+# 全量计算时每批处理的行数，避免一次性生成 n×n×2 的临时数组
+_CHUNK_ROWS = 2048
+
+# 全量构建时预留的空行比例，使后续少量新增地点无需扩容复制整个矩阵
+_HEADROOM_RATIO = 64
+
+
+def _manhattan_rows(points: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """计算 points 中每个点到 targets 中每个点的曼哈顿距离"""
+    return (np.abs(points[:, np.newaxis, 0] - targets[np.newaxis, :, 0])
+            + np.abs(points[:, np.newaxis, 1] - targets[np.newaxis, :, 1]))
+
+
+class _DistanceRow(Mapping):
+    """距离矩阵中某个地点的一行，兼容原 dict 嵌套写法 matrix[a][b]"""
+
+    def __init__(self, matrix, from_id):
+        self._matrix = matrix
+        self._from_id = from_id
+
+    def __getitem__(self, to_id):
+        if to_id not in self._matrix:
+            raise KeyError(to_id)
+        return self._matrix.distance(self._from_id, to_id)
+
+    def __iter__(self):
+        return iter(self._matrix.ids)
+
+    def __len__(self):
+        return len(self._matrix)
+
+
+class DistanceMatrix:
+    """以 numpy 数组存储、按地点ID索引的曼哈顿距离矩阵，支持按行/列增量增删改"""
+
+    def __init__(self, ids: Sequence = (), coords=None):
+        self._ids: List = []
+        self._index = {}
+        self._coords = np.empty((0, 2), dtype=float)
+        self._values = np.empty((0, 0), dtype=float)
+        self._size = 0
+        # 每次结构或数值变化时递增，供视图判断缓存的索引是否失效
+        self.version = 0
+
+        if len(ids):
+            self.rebuild(ids, coords)
+
+    @classmethod
+    def from_locations(cls, locations: Iterable) -> "DistanceMatrix":
+        """由 Location 对象构建完整距离矩阵"""
+        locations = list(locations)
+        return cls([loc.id for loc in locations], [(loc.x, loc.y) for loc in locations])
+
+    @property
+    def ids(self) -> List:
+        return self._ids
+
+    @property
+    def values(self) -> np.ndarray:
+        """当前有效区域的距离数组（视图，不复制）"""
+        return self._values[:self._size, :self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def __contains__(self, location_id):
+        return location_id in self._index
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __getitem__(self, from_id):
+        if from_id not in self._index:
+            raise KeyError(from_id)
+        return _DistanceRow(self, from_id)
+
+    def keys(self):
+        return list(self._ids)
+
+    def index_of(self, location_id) -> int:
+        return self._index[location_id]
+
+    def indices(self, location_ids: Iterable) -> np.ndarray:
+        return np.fromiter((self._index[loc_id] for loc_id in location_ids), dtype=np.intp)
+
+    def distance(self, from_id, to_id) -> float:
+        return float(self._values[self._index[from_id], self._index[to_id]])
+
+    def submatrix(self, from_ids: Iterable, to_ids: Iterable) -> np.ndarray:
+        """按ID批量提取子矩阵（复制）"""
+        return self._values[np.ix_(self.indices(from_ids), self.indices(to_ids))]
+
+    def rebuild(self, ids: Sequence, coords) -> None:
+        """根据全部地点坐标重新计算整个矩阵"""
+        coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+        if len(ids) != len(coords):
+            raise ValueError("ids 与坐标数量不一致")
+
+        size = len(ids)
+        self._reserve(size + max(16, size // _HEADROOM_RATIO), keep=False)
+        self._coords[:size] = coords
+        for start in range(0, size, _CHUNK_ROWS):
+            stop = min(start + _CHUNK_ROWS, size)
+            self._values[start:stop, :size] = _manhattan_rows(coords[start:stop], coords)
+
+        self._ids = list(ids)
+        self._index = {loc_id: idx for idx, loc_id in enumerate(self._ids)}
+        self._size = size
+        self.version += 1
+
+    def add(self, location_id, x: float, y: float) -> None:
+        """新增一个地点，仅计算其所在的行与列；已存在时等同于 move"""
+        if location_id in self._index:
+            self.move(location_id, x, y)
+            return
+
+        self._reserve(self._size + 1)
+        idx = self._size
+        self._coords[idx] = (x, y)
+        self._size += 1
+        self._ids.append(location_id)
+        self._index[location_id] = idx
+        self._update_row(idx)
+
+    def move(self, location_id, x: float, y: float) -> None:
+        """更新地点坐标，仅重新计算其所在的行与列"""
+        idx = self._index[location_id]
+        self._coords[idx] = (x, y)
+        self._update_row(idx)
+
+    def remove(self, location_id) -> None:
+        """删除地点：将最后一行/列移动到被删除的位置，避免整体搬移数组"""
+        idx = self._index.pop(location_id)
+        last = self._size - 1
+
+        if idx != last:
+            last_id = self._ids[last]
+            self._coords[idx] = self._coords[last]
+            self._values[idx, :self._size] = self._values[last, :self._size]
+            self._values[:self._size, idx] = self._values[:self._size, last]
+            self._values[idx, idx] = 0.0
+            self._ids[idx] = last_id
+            self._index[last_id] = idx
+
+        self._ids.pop()
+        self._size -= 1
+        self.version += 1
+
+    def view(self, location_ids: Iterable) -> "DistanceMatrixView":
+        """返回只包含指定地点的索引视图，与本矩阵共享底层数组"""
+        return DistanceMatrixView(self, location_ids)
+
+    def _update_row(self, idx: int) -> None:
+        size = self._size
+        row = _manhattan_rows(self._coords[idx:idx + 1], self._coords[:size])[0]
+        self._values[idx, :size] = row
+        self._values[:size, idx] = row
+        self.version += 1
+
+    def _reserve(self, size: int, keep: bool = True) -> None:
+        """确保底层数组容量足够，按比例预留空间以摊薄扩容成本"""
+        capacity = len(self._values)
+        if size <= capacity:
+            return
+
+        new_capacity = max(size, capacity + capacity // 4 + 16)
+        values = np.zeros((new_capacity, new_capacity), dtype=float)
+        coords = np.zeros((new_capacity, 2), dtype=float)
+        if keep and self._size:
+            values[:self._size, :self._size] = self._values[:self._size, :self._size]
+            coords[:self._size] = self._coords[:self._size]
+        self._values = values
+        self._coords = coords
+
+
+class DistanceMatrixView:
+    """父距离矩阵的子集视图，支持按行/列写时复制的增删改
+
+    视图保存所含地点在父矩阵中的下标及其坐标副本，不复制距离数组。在视图上新增或移动的地点记为脏行：
+    涉及脏行的距离按视图自己的坐标现算，其余距离直接读取父矩阵。单次修改的开销与视图规模无关。
+    父矩阵在视图创建后被修改（版本变化）时，视图不再读取父矩阵，全部距离按创建时记录的坐标现算，
+    因此视图始终反映创建时刻的父网络加上视图自身的修改。
+    """
+
+    def __init__(self, parent: DistanceMatrix, location_ids: Iterable):
+        self.parent = parent
+        self._ids = [loc_id for loc_id in dict.fromkeys(location_ids) if loc_id in parent]
+        self._index = {loc_id: idx for idx, loc_id in enumerate(self._ids)}
+        self._parent_indices = parent.indices(self._ids)
+        self._coords = parent._coords[self._parent_indices].copy()
+        # 坐标与父矩阵不同（视图中新增或移动过）的地点
+        self._dirty = np.zeros(len(self._ids), dtype=bool)
+        self._parent_version = parent.version
+        self.version = 0
+
+    @property
+    def ids(self) -> List:
+        return self._ids
+
+    @property
+    def values(self) -> np.ndarray:
+        """视图范围内的距离数组（按需计算）"""
+        return self.submatrix(self._ids, self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __bool__(self):
+        return bool(self._ids)
+
+    def __contains__(self, location_id):
+        return location_id in self._index
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __getitem__(self, from_id):
+        if from_id not in self._index:
+            raise KeyError(from_id)
+        return _DistanceRow(self, from_id)
+
+    def keys(self):
+        return list(self._ids)
+
+    def index_of(self, location_id) -> int:
+        return self._index[location_id]
+
+    def indices(self, location_ids: Iterable) -> np.ndarray:
+        return np.fromiter((self._index[loc_id] for loc_id in location_ids), dtype=np.intp)
+
+    def distance(self, from_id, to_id) -> float:
+        from_idx, to_idx = self._index[from_id], self._index[to_id]
+        if self._detached() or self._dirty[from_idx] or self._dirty[to_idx]:
+            return float(np.abs(self._coords[from_idx] - self._coords[to_idx]).sum())
+        return self.parent.distance(from_id, to_id)
+
+    def submatrix(self, from_ids: Iterable, to_ids: Iterable) -> np.ndarray:
+        """按ID批量提取子矩阵：干净的部分取自父矩阵，脏行/列按坐标重算"""
+        from_idx, to_idx = self.indices(from_ids), self.indices(to_ids)
+        if self._detached():
+            return _manhattan_rows(self._coords[from_idx], self._coords[to_idx])
+
+        result = self.parent.values[np.ix_(self._parent_indices[from_idx], self._parent_indices[to_idx])]
+        dirty_rows = self._dirty[from_idx]
+        if dirty_rows.any():
+            result[dirty_rows] = _manhattan_rows(self._coords[from_idx[dirty_rows]], self._coords[to_idx])
+        dirty_columns = self._dirty[to_idx]
+        if dirty_columns.any():
+            result[:, dirty_columns] = _manhattan_rows(self._coords[from_idx], self._coords[to_idx[dirty_columns]])
+        return result
+
+    def add(self, location_id, x: float, y: float) -> None:
+        """新增一个地点（只记录坐标）；已存在时等同于 move"""
+        if location_id in self._index:
+            self.move(location_id, x, y)
+            return
+
+        self._index[location_id] = len(self._ids)
+        self._ids.append(location_id)
+        # 新地点在父矩阵中没有对应行，下标取 0 占位，读取时总按坐标重算
+        self._parent_indices = np.append(self._parent_indices, 0)
+        self._coords = np.vstack([self._coords, [(x, y)]])
+        self._dirty = np.append(self._dirty, True)
+        self.version += 1
+
+    def move(self, location_id, x: float, y: float) -> None:
+        """更新地点坐标并标记为脏行"""
+        idx = self._index[location_id]
+        self._coords[idx] = (x, y)
+        self._dirty[idx] = True
+        self.version += 1
+
+    def remove(self, location_id) -> None:
+        """删除地点：将最后一个地点移动到被删除的位置"""
+        idx = self._index.pop(location_id)
+        last = len(self._ids) - 1
+
+        if idx != last:
+            last_id = self._ids[last]
+            self._ids[idx] = last_id
+            self._index[last_id] = idx
+            self._parent_indices[idx] = self._parent_indices[last]
+            self._coords[idx] = self._coords[last]
+            self._dirty[idx] = self._dirty[last]
+
+        self._ids.pop()
+        self._parent_indices = self._parent_indices[:last]
+        self._coords = self._coords[:last]
+        self._dirty = self._dirty[:last]
+        self.version += 1
+
+    def materialize(self) -> DistanceMatrix:
+        """复制为独立的完整距离矩阵（需要 n×n 内存）"""
+        matrix = DistanceMatrix()
+        size = len(self._ids)
+        matrix._reserve(size, keep=False)
+        matrix._values[:size, :size] = self.values
+        matrix._coords[:size] = self._coords
+        matrix._ids = list(self._ids)
+        matrix._index = dict(self._index)
+        matrix._size = size
+        matrix.version += 1
+        return matrix
+
+    def _detached(self) -> bool:
+        return self.parent.version != self._parent_version
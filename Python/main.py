@@ -1,9 +1,12 @@
+import contextlib
 import os
 import sys
-import pandas as pd
+from cli import main as cli_main, save_hubs
 from locations import load_default_locations, load_locations_from_file, save_locations_to_file
 from network_model import LogisticsNetwork
-from optimizers.kmeans_sa_optimizer import KMeansSimulatedAnnealingOptimizer
+from optimizers.base_optimizer import list_optimizers
+from pipeline import run_routing_stage
+from profiling import profile
 
 def clear_screen():
     """清屏"""
@@ -22,7 +25,7 @@ def print_menu():
     print("2. 从文件加载地点数据")
     print("3. 保存地点数据到文件")
     print("4. 查看当前地点数据")
-    print("5. 运行K-means+模拟退火优化")
+    print("5. 运行中转点选址优化")
     print("6. 可视化当前网络")
     print("7. 退出")
     print("-" * 60)
@@ -124,6 +127,15 @@ def main():
             import time
 
             try:
+                optimizers = list_optimizers()
+                print("\n可用的优化算法:")
+                for index, optimizer_cls in enumerate(optimizers, 1):
+                    print(f"{index}. {optimizer_cls.display_name}")
+                optimizer_choice = int(input(f"请选择优化算法 (1-{len(optimizers)}, 默认: 1): ") or 1)
+                if not 1 <= optimizer_choice <= len(optimizers):
+                    raise ValueError("无效的优化算法编号")
+                optimizer_cls = optimizers[optimizer_choice - 1]
+
                 hub_counts_input = input("\n请输入启用中转点数量集合 (例如: 1,2,3，默认: 1-所有): ").strip()
                 if hub_counts_input:
                     hub_counts = sorted({int(x) for x in hub_counts_input.split(',') if x.strip().isdigit()})
@@ -131,24 +143,23 @@ def main():
                     hub_counts = None
 
                 unit_cost = float(input("请输入单位距离运输成本c (默认: 1.0): ") or 1.0)
-                initial_temp = float(input("请输入初始温度 (默认: 500): ") or 500)
-                cooling_rate = float(input("请输入冷却率 (0-1, 默认: 0.9): ") or 0.9)
-                iterations = int(input("请输入模拟退火迭代次数 (默认: 800): ") or 800)
-                kmeans_restarts = int(input("请输入K-means重启次数 (默认: 5): ") or 5)
+                optimizer_kwargs = {}
+                for name, prompt, value_type, default in optimizer_cls.menu_parameters:
+                    optimizer_kwargs[name] = value_type(input(f"请输入{prompt} (默认: {default}): ") or default)
+
+                profile_enabled = input("是否输出各阶段性能剖析? (y/N): ").strip().lower() == 'y'
 
                 start_time = time.time()
-                best_solution, evaluated = KMeansSimulatedAnnealingOptimizer.optimize(
-                    network,
-                    hub_counts=hub_counts,
-                    unit_transport_cost=unit_cost,
-                    initial_temp=initial_temp,
-                    cooling_rate=cooling_rate,
-                    iterations=iterations,
-                    kmeans_restarts=kmeans_restarts,
-                )
+                with (profile() if profile_enabled else contextlib.nullcontext()) as profiler:
+                    best_solution, evaluated = optimizer_cls.optimize(
+                        network,
+                        hub_counts=hub_counts,
+                        unit_transport_cost=unit_cost,
+                        **optimizer_kwargs,
+                    )
                 execution_time = time.time() - start_time
 
-                print(f"\nK-means+模拟退火优化结果 (耗时 {execution_time:.2f} 秒):")
+                print(f"\n{optimizer_cls.display_name}优化结果 (耗时 {execution_time:.2f} 秒):")
                 print("-" * 60)
                 print(f"启用中转点数量: {best_solution['hub_count']}")
                 print(f"启用的中转点: {', '.join(best_solution['active_hubs'])}")
@@ -156,25 +167,23 @@ def main():
                 print(f"供应商到中转点运输成本: {best_solution['supplier_cost']:.2f}")
                 print(f"中转点到末端节点运输成本: {best_solution['store_cost']:.2f}")
                 print(f"总成本: {best_solution['total_cost']:.2f}")
+                if 'lp_gap' in best_solution:
+                    print(f"LP 松弛下界: {best_solution['lp_bound']:.2f} (间隙 {best_solution['lp_gap']:.2%}, "
+                          f"{'已证明最优' if best_solution['proven_optimal'] else '未证明最优'})")
+                if 'warm_start_cost' in best_solution:
+                    print(f"K-means+SA 热启动成本: {best_solution['warm_start_cost']:.2f} "
+                          f"(MILP 改进 {best_solution['warm_start_gap']:.2%})")
+
+                if profiler is not None:
+                    print("\n性能剖析:")
+                    print(profiler.stats().format())
 
                 hub_filename = (input("\n请输入保存中转点的文件名 (默认: optimized_hubs.xlsx): ") or "optimized_hubs.xlsx").strip()
                 if hub_filename and not hub_filename.lower().endswith(('.xlsx', '.xls')):
                     hub_filename += ".xlsx"
-                hub_locations = [
-                    network.locations[hub_id]
-                    for hub_id in best_solution['active_hubs']
-                    if hub_id in network.locations
-                ]
-                if hub_locations:
+                if any(hub_id in network.locations for hub_id in best_solution['active_hubs']):
                     try:
-                        hub_df = pd.DataFrame(
-                            {
-                                "序号": [loc.id for loc in hub_locations],
-                                "横坐标 (X)": [loc.x for loc in hub_locations],
-                                "纵坐标 (Y)": [loc.y for loc in hub_locations],
-                            }
-                        )
-                        hub_df.to_excel(hub_filename, index=False)
+                        save_hubs(network, best_solution['active_hubs'], hub_filename)
                         print(f"选定的中转点已保存到 {hub_filename}")
                     except Exception as e:
                         print(f"保存中转点数据失败: {e}")
@@ -192,6 +201,10 @@ def main():
                 network.update_delivery_paths()
                 locations = list(network.locations.values())
 
+                # 直接在内存中衔接配送路径优化，无需重新读取导出的中转点文件
+                if input("\n是否继续进行配送路径优化? (y/N): ").strip().lower() == 'y':
+                    run_routing_stage(network, best_solution, plot=True)
+
             except Exception as e:
                 print(f"\n优化过程中出错: {e}")
 
@@ -217,4 +230,7 @@ def main():
             input("\n按Enter键继续...")
 
 if __name__ == "__main__":
+    # 带参数运行时进入非交互式批处理模式（见 cli.py），否则进入交互菜单
+    if len(sys.argv) > 1:
+        sys.exit(cli_main())
     main()
\ No newline at end of file
@@ -1,11 +1,16 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import math
-from matplotlib.font_manager import FontProperties
-from matplotlib import rcParams
 import os
+import copy
+
+from distance_matrix import DistanceMatrix
+from profiling import profiled
+from spatial_index import SpatialIndex
 
 def set_matplotlib_chinese_font_to_pingfang():
+    from matplotlib import rcParams
+    from matplotlib.font_manager import FontProperties
+
     # 字体路径
     pingfang_path = "/System/Library/Fonts/Hiragino Sans GB.ttc"
 
@@ -31,7 +36,7 @@ class LogisticsNetwork:
         self.manufacturers = []
         self.wholesalers = []
         self.stores = []
-        self.distance_matrix = {}
+        self.distance_matrix = DistanceMatrix()
         self.manufacturer_wholesaler_pairs = {}
         self.wholesaler_store_assignments = {}
         self.store_delivery_paths = {}
@@ -41,7 +46,13 @@ class LogisticsNetwork:
                 self.add_location(location)
 
     def create_filtered_network(self, selected_wholesaler_ids):
-        """基于选定批发商创建新的物流网络副本"""
+        """基于选定批发商创建新的物流网络，距离矩阵为父网络矩阵的索引视图
+
+        新网络的增删改只在视图上按行/列写时复制，不复制整个矩阵；父网络之后的修改不影响新网络。
+        """
+        if not self.distance_matrix:
+            self.calculate_distances()
+
         new_network = LogisticsNetwork()
 
         for manufacturer_id in self.manufacturers:
@@ -54,11 +65,12 @@ class LogisticsNetwork:
         for store_id in self.stores:
             new_network.add_location(self.locations[store_id])
 
-        new_network.calculate_distances()
+        new_network.distance_matrix = self.distance_matrix.view(new_network.locations.keys())
         return new_network
 
-    def cluster_entities(self, entity_ids, num_clusters, max_iterations=100, tolerance=1e-4):
-        """使用简单KMeans对给定实体进行聚类"""
+    @profiled("clustering")
+    def cluster_entities(self, entity_ids, num_clusters, max_iterations=100, tolerance=1e-4, weights=None, points=None):
+        """使用简单KMeans对给定实体进行聚类；weights 给出时按权重计算聚类中心，points 可直接提供实体坐标"""
         if not entity_ids:
             raise ValueError("没有可聚类的实体")
 
@@ -67,10 +79,15 @@ class LogisticsNetwork:
 
         num_clusters = min(num_clusters, len(entity_ids))
 
-        points = np.array([[self.locations[e_id].x, self.locations[e_id].y] for e_id in entity_ids])
+        if points is None:
+            points = np.array([[self.locations[e_id].x, self.locations[e_id].y] for e_id in entity_ids])
+        else:
+            points = np.asarray(points, dtype=float)
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float)
 
-        rng = np.random.default_rng()
-        initial_indices = rng.choice(len(entity_ids), size=num_clusters, replace=False)
+        # 使用全局随机数状态，使 np.random.seed 与检查点恢复的随机数状态对聚类同样生效
+        initial_indices = np.random.choice(len(entity_ids), size=num_clusters, replace=False)
         centroids = points[initial_indices].copy()
 
         labels = np.zeros(len(entity_ids), dtype=int)
@@ -85,11 +102,13 @@ class LogisticsNetwork:
             labels = new_labels
 
             for cluster_idx in range(num_clusters):
-                cluster_points = points[labels == cluster_idx]
-                if len(cluster_points) == 0:
+                members = labels == cluster_idx
+                if not members.any():
                     centroids[cluster_idx] = points[rng.choice(len(points))]
+                elif weights is not None and weights[members].sum() > 0:
+                    centroids[cluster_idx] = np.average(points[members], axis=0, weights=weights[members])
                 else:
-                    centroids[cluster_idx] = cluster_points.mean(axis=0)
+                    centroids[cluster_idx] = points[members].mean(axis=0)
 
         clusters = {idx: [] for idx in range(num_clusters)}
         for entity_idx, cluster_idx in enumerate(labels):
@@ -98,7 +117,10 @@ class LogisticsNetwork:
         return clusters, centroids
     
     def add_location(self, location):
-        """添加一个地点到网络中"""
+        """添加一个地点到网络中；距离矩阵已建立时只增量计算该地点的行与列"""
+        if location.id in self.locations:
+            self._unregister_location(location.id)
+
         self.locations[location.id] = location
 
         location_type = (location.type or '').lower()
@@ -108,19 +130,87 @@ class LogisticsNetwork:
             self.wholesalers.append(location.id)
         elif location_type == 'store':
             self.stores.append(location.id)
-    
+
+        if self.distance_matrix:
+            self.distance_matrix.add(location.id, location.x, location.y)
+
+    def remove_location(self, location_id):
+        """从网络中删除地点，同时删除距离矩阵中对应的行与列及相关分配"""
+        if location_id not in self.locations:
+            raise KeyError(f"网络中不存在地点: {location_id}")
+
+        self._unregister_location(location_id)
+        del self.locations[location_id]
+
+        if location_id in self.distance_matrix:
+            self.distance_matrix.remove(location_id)
+
+        # 清理引用该地点的配对与分配
+        self.manufacturer_wholesaler_pairs.pop(location_id, None)
+        for manufacturer_id, value in list(self.manufacturer_wholesaler_pairs.items()):
+            if isinstance(value, (list, tuple, set)):
+                self.manufacturer_wholesaler_pairs[manufacturer_id] = [w for w in value if w != location_id]
+            elif value == location_id:
+                self.manufacturer_wholesaler_pairs[manufacturer_id] = None
+
+        self.wholesaler_store_assignments.pop(location_id, None)
+        for store_id, value in list(self.wholesaler_store_assignments.items()):
+            if isinstance(value, (list, tuple, set)):
+                self.wholesaler_store_assignments[store_id] = [w for w in value if w != location_id]
+            elif value == location_id:
+                self.wholesaler_store_assignments[store_id] = []
+
+        self.store_delivery_paths.pop(location_id, None)
+
+    def move_location(self, location_id, x, y):
+        """修改地点坐标，仅重新计算距离矩阵中该地点的行与列"""
+        if location_id not in self.locations:
+            raise KeyError(f"网络中不存在地点: {location_id}")
+
+        # 复制后再修改，避免影响共享同一 Location 对象的父网络
+        location = copy.copy(self.locations[location_id])
+        location.x = x
+        location.y = y
+        self.locations[location_id] = location
+
+        if location_id in self.distance_matrix:
+            self.distance_matrix.move(location_id, x, y)
+
+    def _unregister_location(self, location_id):
+        """从类型列表中移除地点ID"""
+        for id_list in (self.manufacturers, self.wholesalers, self.stores):
+            if location_id in id_list:
+                id_list.remove(location_id)
+
+    def build_spatial_index(self, location_ids, metric='manhattan'):
+        """为指定地点构建空间索引，用于批量最近设施查询"""
+        return SpatialIndex.from_locations([self.locations[loc_id] for loc_id in location_ids], metric=metric)
+
+    def nearest_locations(self, source_ids, target_ids, k=1):
+        """批量查询每个源地点在目标地点中的 k 个最近地点ID（曼哈顿距离）"""
+        source_ids = list(source_ids)
+        if not source_ids:
+            return {}
+
+        index = self.build_spatial_index(target_ids)
+        points = [(self.locations[s_id].x, self.locations[s_id].y) for s_id in source_ids]
+        _, indices = index.query(points, k=k)
+
+        if indices.ndim == 1:
+            return {s_id: index.ids[idx] for s_id, idx in zip(source_ids, indices)}
+        return {
+            s_id: [index.ids[idx] for idx in row]
+            for s_id, row in zip(source_ids, indices)
+        }
+
     def calculate_distance(self, loc1, loc2):
         """计算两个地点之间的曼哈顿距离"""
         return abs(loc1.x - loc2.x) + abs(loc1.y - loc2.y)
     
+    @profiled("distance_build")
     def calculate_distances(self):
         """计算所有地点之间的距离"""
-        for loc1_id, loc1 in self.locations.items():
-            if loc1_id not in self.distance_matrix:
-                self.distance_matrix[loc1_id] = {}
-            for loc2_id, loc2 in self.locations.items():
-                if loc1_id != loc2_id:
-                    self.distance_matrix[loc1_id][loc2_id] = self.calculate_distance(loc1, loc2)
+        self.distance_matrix = DistanceMatrix.from_locations(self.locations.values())
     
     def calculate_total_network_distance(self):
         """计算整个网络的总距离"""
@@ -150,26 +240,18 @@ class LogisticsNetwork:
                 yield manufacturer_id, value
 
     def _ensure_distance(self, from_id, to_id):
-        """确保距离矩阵中包含指定地点的距离并返回该距离"""
+        """返回两地点间的距离，优先读取距离矩阵，缺失时按坐标直接计算"""
         if from_id == to_id:
             return 0.0
 
-        if from_id not in self.distance_matrix:
-            self.distance_matrix[from_id] = {}
+        if from_id in self.distance_matrix and to_id in self.distance_matrix:
+            return self.distance_matrix.distance(from_id, to_id)
 
-        if to_id not in self.distance_matrix:
-            self.distance_matrix[to_id] = {}
-
-        if to_id not in self.distance_matrix[from_id]:
-            loc_from = self.locations.get(from_id)
-            loc_to = self.locations.get(to_id)
-            if loc_from is None or loc_to is None:
-                raise ValueError("距离计算失败：网络中缺少指定的地点")
-            distance = self.calculate_distance(loc_from, loc_to)
-            self.distance_matrix[from_id][to_id] = distance
-            self.distance_matrix[to_id][from_id] = distance
-
-        return self.distance_matrix[from_id][to_id]
+        loc_from = self.locations.get(from_id)
+        loc_to = self.locations.get(to_id)
+        if loc_from is None or loc_to is None:
+            raise ValueError("距离计算失败：网络中缺少指定的地点")
+        return self.calculate_distance(loc_from, loc_to)
 
     def _build_delivery_path(self, manufacturer_id, wholesaler_id, store_id):
         """构建单条完整配送路径及其距离信息"""
@@ -204,6 +286,8 @@ class LogisticsNetwork:
             wholesalers = wholesaler_to_manufacturer.setdefault(wholesaler_id, [])
             wholesalers.append(manufacturer_id)
 
+        nearest_manufacturer = self._nearest_manufacturers(wholesaler_to_manufacturer)
+
         for store_id, wholesaler_ids in self.wholesaler_store_assignments.items():
             if not wholesaler_ids:
                 continue
@@ -213,14 +297,8 @@ class LogisticsNetwork:
 
             store_paths = []
             for wholesaler_id in wholesaler_ids:
-                manufacturer_candidates = wholesaler_to_manufacturer.get(wholesaler_id, [])
-                manufacturer_id = None
-                if manufacturer_candidates:
-                    manufacturer_id = min(
-                        manufacturer_candidates,
-                        key=lambda mid: self._ensure_distance(mid, wholesaler_id)
-                    )
-                elif self.manufacturers:
+                manufacturer_id = nearest_manufacturer.get(wholesaler_id)
+                if manufacturer_id is None and self.manufacturers:
                     manufacturer_id = self.manufacturers[0]
 
                 path_info = self._build_delivery_path(manufacturer_id, wholesaler_id, store_id)
@@ -232,8 +310,36 @@ class LogisticsNetwork:
 
         return self.store_delivery_paths
     
+    def _nearest_manufacturers(self, wholesaler_to_manufacturer):
+        """为每个批发商一次性批量求出其候选生产商中最近的一个"""
+        wholesaler_ids = [w_id for w_id, candidates in wholesaler_to_manufacturer.items()
+                          if candidates and w_id in self.locations]
+        if not wholesaler_ids:
+            return {}
+
+        candidate_pool = list(dict.fromkeys(
+            m_id
+            for w_id in wholesaler_ids
+            for m_id in wholesaler_to_manufacturer[w_id]
+            if m_id in self.locations
+        ))
+        if not candidate_pool:
+            return {}
+
+        # 按距离列出全部候选，取每个批发商自身候选中的第一个
+        ranked = self.nearest_locations(wholesaler_ids, candidate_pool, k=len(candidate_pool))
+        nearest = {}
+        for w_id in wholesaler_ids:
+            ranked_ids = ranked[w_id] if isinstance(ranked[w_id], list) else [ranked[w_id]]
+            allowed = set(wholesaler_to_manufacturer[w_id])
+            nearest[w_id] = next((m_id for m_id in ranked_ids if m_id in allowed), None)
+        return nearest
+
     def visualize_network(self, title="物流网络", save_path=None):
         """可视化物流网络"""
+        # matplotlib 导入耗时较长，只在绘图时加载
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(12, 8))
         
         # 绘制地点
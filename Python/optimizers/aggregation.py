@@ -0,0 +1,96 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from network_model import LogisticsNetwork
+from optimizers.cost_model import HubCostModel
+from profiling import count
+
+
+class StoreAggregation:
+    """按网格单元聚合门店得到的加权精简实例
+
+    每个单元记录成员门店、门店数与总需求，坐标取需求加权中心（总需求为 0 时取几何中心）。
+    单元分配到某中转点的成本为全部成员门店到该中转点的成本之和，因此单元级方案的成本与展开到门店后完全一致。
+    """
+
+    def __init__(self, network: LogisticsNetwork, store_ids: Sequence[str], cell_size: float):
+        if cell_size <= 0:
+            raise ValueError("cell_size 必须为正数")
+        if not store_ids:
+            raise ValueError("没有可聚合的门店")
+
+        self.store_ids = list(store_ids)
+        self.cell_size = float(cell_size)
+
+        coords = np.array([[network.locations[s_id].x, network.locations[s_id].y] for s_id in self.store_ids])
+        demands = np.array([
+            float(network.locations[s_id].capacity or 0.0) for s_id in self.store_ids
+        ])
+
+        keys = np.floor(coords / self.cell_size).astype(np.int64)
+        _, self.labels = np.unique(keys, axis=0, return_inverse=True)
+        self.labels = self.labels.ravel()
+        cell_count = int(self.labels.max()) + 1
+
+        self.cell_ids = [f"cell-{idx}" for idx in range(cell_count)]
+        self.counts = np.bincount(self.labels, minlength=cell_count).astype(float)
+        self.demands = np.bincount(self.labels, weights=demands, minlength=cell_count)
+
+        # 需求加权中心；无需求的单元退化为几何中心
+        weights = np.where(self.demands[self.labels] > 0, demands, 1.0)
+        weight_sums = np.bincount(self.labels, weights=weights, minlength=cell_count)
+        self.coordinates = np.column_stack([
+            np.bincount(self.labels, weights=coords[:, axis] * weights, minlength=cell_count) / weight_sums
+            for axis in range(2)
+        ])
+
+        self.members: Dict[str, List[str]] = {cell_id: [] for cell_id in self.cell_ids}
+        for store_id, label in zip(self.store_ids, self.labels):
+            self.members[self.cell_ids[label]].append(store_id)
+
+        self._hub_costs = None
+        self._hub_costs_key = None
+
+    def __len__(self) -> int:
+        return len(self.cell_ids)
+
+    @property
+    def ratio(self) -> float:
+        """聚合比：门店数 / 单元数"""
+        return len(self.store_ids) / len(self.cell_ids)
+
+    def hub_costs(self, cost_model: HubCostModel) -> np.ndarray:
+        """单元级运输成本数组，形状为 (成本模型中转点数, 单元数)"""
+        if self._hub_costs is None or self._hub_costs_key is not cost_model:
+            count("aggregation_cache.miss")
+            store_costs = cost_model.store_costs[:, cost_model.store_indices(self.store_ids)]
+            cell_costs = np.zeros((store_costs.shape[0], len(self.cell_ids)))
+            np.add.at(cell_costs.T, self.labels, store_costs.T)
+            self._hub_costs = cell_costs
+            self._hub_costs_key = cost_model
+        else:
+            count("aggregation_cache.hit")
+        return self._hub_costs
+
+    def expand(self, cell_assignments: Dict[str, str]) -> Dict[str, str]:
+        """将 {单元: 中转点} 展开为 {门店: 中转点}"""
+        return {
+            store_id: cell_assignments[self.cell_ids[label]]
+            for store_id, label in zip(self.store_ids, self.labels)
+        }
+
+
+def aggregate_stores(
+    network: LogisticsNetwork,
+    cell_size: float,
+    store_ids: Optional[Sequence[str]] = None,
+) -> StoreAggregation:
+    """将网络中的门店按边长为 cell_size 的网格聚合"""
+    if store_ids is None:
+        store_ids = [
+            store_id
+            for store_id in network.stores
+            if getattr(network.locations.get(store_id), "type", "").lower() == "store"
+        ]
+    return StoreAggregation(network, store_ids, cell_size)
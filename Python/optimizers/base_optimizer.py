@@ -0,0 +1,133 @@
+import importlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from network_model import LogisticsNetwork
+from optimizers.cost_model import HubCostModel
+
+# 名称 -> 优化器类，由 register_optimizer 装饰器填充
+OPTIMIZER_REGISTRY: Dict[str, Type["BaseOptimizer"]] = {}
+
+# 内置优化器所在模块，首次查询注册表时导入以完成注册
+_BUILTIN_MODULES = (
+    "optimizers.kmeans_sa_optimizer",
+    "optimizers.tabu_search_optimizer",
+    "optimizers.milp_optimizer",
+    "optimizers.hierarchical",
+)
+
+
+def register_optimizer(name: str, display_name: Optional[str] = None) -> Callable:
+    """类装饰器：以 name 注册优化器，display_name 用于菜单显示"""
+    def decorator(cls):
+        if not issubclass(cls, BaseOptimizer):
+            raise TypeError("注册的优化器必须继承 BaseOptimizer")
+        if name in OPTIMIZER_REGISTRY and OPTIMIZER_REGISTRY[name] is not cls:
+            raise ValueError(f"优化器名称已被注册: {name}")
+        cls.name = name
+        cls.display_name = display_name or name
+        OPTIMIZER_REGISTRY[name] = cls
+        return cls
+    return decorator
+
+
+def _load_builtin_optimizers() -> None:
+    for module_name in _BUILTIN_MODULES:
+        importlib.import_module(module_name)
+
+
+def get_optimizer(name: str) -> Type["BaseOptimizer"]:
+    """按名称获取已注册的优化器类"""
+    _load_builtin_optimizers()
+    if name not in OPTIMIZER_REGISTRY:
+        raise ValueError(f"未知的优化器: {name}，可选: {', '.join(OPTIMIZER_REGISTRY)}")
+    return OPTIMIZER_REGISTRY[name]
+
+
+def list_optimizers() -> List[Type["BaseOptimizer"]]:
+    """按注册顺序返回所有优化器类"""
+    _load_builtin_optimizers()
+    return list(OPTIMIZER_REGISTRY.values())
+
+
+class BaseOptimizer:
+    """中转点选址优化器基类
+
+    子类实现 optimize(network, hub_counts=None, unit_transport_cost=1.0, ...)，返回 (最佳方案, 方案列表)，
+    方案字典包含 hub_count、active_hubs、store_assignments、suppliers、unit_transport_cost 及成本明细。
+    成本一律通过共享的 HubCostModel 数组计算，子类无需自行遍历距离矩阵。
+    支持热启动的优化器接收 warm_start 参数（此前的最佳方案字典）。
+    """
+
+    name: str = ""
+    display_name: str = ""
+    # 交互菜单中可配置的参数: (参数名, 提示文字, 类型, 默认值)
+    menu_parameters: Tuple[Tuple[str, str, type, object], ...] = ()
+    # optimize 是否接受 warm_start 参数
+    supports_warm_start: bool = False
+
+    @staticmethod
+    def optimize(network: LogisticsNetwork, hub_counts: Optional[Iterable[int]] = None,
+                 unit_transport_cost: float = 1.0, **kwargs):
+        raise NotImplementedError
+
+    @staticmethod
+    def _prepare(
+        network: LogisticsNetwork,
+        hub_counts: Optional[Iterable[int]],
+        unit_transport_cost: float,
+    ) -> Tuple[List[str], List[str], List[str], List[int], HubCostModel]:
+        """校验网络与参数，返回 (候选中转点, 供应商, 门店, 可行的中转点数量, 成本模型)"""
+        if not isinstance(network, LogisticsNetwork):
+            raise TypeError("network 必须是 LogisticsNetwork 类型")
+
+        if unit_transport_cost < 0:
+            raise ValueError("unit_transport_cost 必须为非负数")
+
+        if not network.distance_matrix:
+            network.calculate_distances()
+
+        candidate_hubs = list(network.wholesalers)
+        suppliers = list(network.manufacturers)
+        stores = [
+            store_id
+            for store_id in network.stores
+            if getattr(network.locations.get(store_id), "type", "").lower() == "store"
+        ]
+
+        if not candidate_hubs:
+            raise ValueError("网络中缺少可用的中转点候选")
+
+        if not stores:
+            raise ValueError("网络中缺少末端节点 (便利店)")
+
+        if not suppliers:
+            raise ValueError("网络中缺少供应商")
+
+        if hub_counts is None:
+            hub_counts = range(1, len(candidate_hubs) + 1)
+
+        hub_counts = [count for count in hub_counts if 0 < count <= min(len(candidate_hubs), len(stores))]
+        if not hub_counts:
+            raise ValueError("hub_counts 中没有可行的中转点数量")
+
+        cost_model = HubCostModel.for_network(network, suppliers, unit_transport_cost)
+        return candidate_hubs, suppliers, stores, hub_counts, cost_model
+
+    @staticmethod
+    def _build_solution(
+        cost_model: HubCostModel,
+        active_hubs: Iterable[str],
+        store_assignments: Dict[str, str],
+        suppliers: List[str],
+        unit_transport_cost: float,
+    ) -> Dict:
+        """组装统一结构的方案字典"""
+        active_hubs = list(active_hubs)
+        return {
+            "hub_count": len(active_hubs),
+            "active_hubs": active_hubs,
+            "store_assignments": store_assignments,
+            "suppliers": suppliers,
+            "unit_transport_cost": unit_transport_cost,
+            **cost_model.breakdown(active_hubs, store_assignments),
+        }
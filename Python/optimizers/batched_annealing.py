@@ -0,0 +1,299 @@
+import math
+import random
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from anytime import SearchBudget
+from optimizers.cost_model import HubCostModel
+from profiling import count, enabled, profiled
+from telemetry import TelemetrySink
+
+
+def nearest_hub_positions(store_costs: np.ndarray, candidate_neighbors: Optional[int]) -> Optional[np.ndarray]:
+    """每个门店成本最低的 candidate_neighbors + 1 个中转点位置，形状为 (S, m)；不限制近邻时返回 None
+
+    多出的一个通常是门店当前所在的中转点，提议落在当前中转点上时视为无效移动。
+    """
+    hub_count = store_costs.shape[0]
+    if not candidate_neighbors or candidate_neighbors + 1 >= hub_count:
+        return None
+    return np.argsort(store_costs, axis=0, kind="stable")[:candidate_neighbors + 1].T.copy()
+
+
+@profiled("hub_sa")
+def batched_simulated_annealing(
+    store_costs: np.ndarray,
+    initial_assignments: np.ndarray,
+    initial_temp: float,
+    cooling_rate: float,
+    iterations: int,
+    rng: Optional[np.random.Generator] = None,
+    neighbors: Optional[np.ndarray] = None,
+    budget: Optional[SearchBudget] = None,
+    telemetry: Optional[TelemetrySink] = None,
+    telemetry_label: str = "",
+    cost_offset: float = 0.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """同时推进 B 条退火链的门店重分配
+
+    store_costs 形状为 (k, S)，即组合内每个中转点到每个门店的运输成本；
+    initial_assignments 形状为 (B, S)，取值为组合内中转点的位置 0..k-1。
+    每步为每条链各提出一次迁移，通过花式索引计算成本差并向量化执行 Metropolis 判定。
+    neighbors 为 nearest_hub_positions 的结果时，只在门店的近邻中转点之间迁移。
+    budget 在每个批量步之前检查（停滞按所有链的最优成本计算）；telemetry 以 hubs=telemetry_label 记录
+    各链中的最低当前成本与最优成本，cost_offset（组合的固定成本）加到记录的成本上，使其与总成本一致。
+    返回每条链的最优分配 (B, S) 及其门店成本 (B,)。
+    """
+    # 未指定时由全局随机数状态派生，np.random.seed 与检查点恢复同样使批量退火可复现
+    rng = rng or np.random.default_rng(np.random.randint(2 ** 31))
+    assignments = np.array(initial_assignments, dtype=np.intp, copy=True)
+    if assignments.ndim != 2:
+        raise ValueError("initial_assignments 必须是 (链数, 门店数) 的二维数组")
+
+    hub_count, store_count = store_costs.shape
+    chain_count = assignments.shape[0]
+    chains = np.arange(chain_count)
+
+    costs = store_costs[assignments, np.arange(store_count)].sum(axis=1)
+    best_assignments = assignments.copy()
+    best_costs = costs.copy()
+
+    if hub_count < 2 or store_count == 0:
+        return best_assignments, best_costs
+
+    # 每条链中各中转点服务的门店数，用于禁止移走中转点的最后一个门店
+    loads = np.zeros((chain_count, hub_count), dtype=np.intp)
+    np.add.at(loads, (np.repeat(chains, store_count), assignments.ravel()), 1)
+
+    temperature = initial_temp if initial_temp > 0 else 1e-6
+    # 接受数需要额外的归约，只在启用剖析时统计
+    counting = enabled()
+    accepted_total = infeasible_total = 0
+
+    overall_best = float(best_costs.min())
+    last_improvement = 0
+    last_improvement_time = time.monotonic() if budget is not None else 0.0
+    if telemetry is not None:
+        telemetry.record("hub_sa", 0, force=True, hubs=telemetry_label, chains=chain_count,
+                         current_cost=float(costs.min()) + cost_offset, best_cost=overall_best + cost_offset,
+                         temperature=temperature)
+
+    steps = 0
+    early_stops = 0
+    for step in range(1, iterations + 1):
+        if budget is not None and budget.stop_reason(step - 1, last_improvement, last_improvement_time):
+            early_stops = 1
+            break
+        steps = step
+
+        stores = rng.integers(store_count, size=chain_count)
+        current = assignments[chains, stores]
+        if neighbors is None:
+            # 在其余 k-1 个中转点中均匀选择新的中转点
+            proposed = (current + 1 + rng.integers(hub_count - 1, size=chain_count)) % hub_count
+        else:
+            proposed = neighbors[stores, rng.integers(neighbors.shape[1], size=chain_count)]
+
+        delta = store_costs[proposed, stores] - store_costs[current, stores]
+        valid = loads[chains, current] > 1
+        if neighbors is not None:
+            valid &= proposed != current
+        with np.errstate(over="ignore"):
+            accept_probability = np.exp(-np.maximum(delta, 0.0) / max(temperature, 1e-6))
+        accepted = valid & ((delta <= 0) | (rng.random(chain_count) < accept_probability))
+        if counting:
+            accepted_total += int(accepted.sum())
+            infeasible_total += chain_count - int(valid.sum())
+
+        if accepted.any():
+            moved = chains[accepted]
+            assignments[moved, stores[accepted]] = proposed[accepted]
+            loads[moved, current[accepted]] -= 1
+            loads[moved, proposed[accepted]] += 1
+            costs[accepted] += delta[accepted]
+
+            improved = costs < best_costs
+            if improved.any():
+                best_costs[improved] = costs[improved]
+                best_assignments[improved] = assignments[improved]
+
+        step_best = float(best_costs.min())
+        globally_improved = step_best < overall_best
+        if globally_improved:
+            overall_best = step_best
+            last_improvement = step
+            if budget is not None:
+                last_improvement_time = time.monotonic()
+
+        # 按采样率记录收敛数据，所有链中的最优成本改进时总是记录
+        if telemetry is not None and (globally_improved or telemetry.wants(step)):
+            telemetry.record("hub_sa", step, force=True, hubs=telemetry_label, chains=chain_count,
+                             current_cost=float(costs.min()) + cost_offset, best_cost=overall_best + cost_offset,
+                             temperature=temperature)
+
+        temperature *= cooling_rate
+        if temperature < 1e-6:
+            temperature = 1e-6
+
+    if counting:
+        count("hub_sa.moves_proposed", steps * chain_count)
+        count("hub_sa.moves_accepted", accepted_total)
+        count("hub_sa.moves_infeasible", infeasible_total)
+    count("hub_sa.early_stops", early_stops)
+    return best_assignments, best_costs
+
+
+@profiled("hub_sa")
+def anneal_assignment_array(
+    store_costs: np.ndarray,
+    initial_assignment: Sequence[int],
+    initial_temp: float,
+    cooling_rate: float,
+    iterations: int,
+    rng: Optional[random.Random] = None,
+    neighbors: Optional[np.ndarray] = None,
+    budget: Optional[SearchBudget] = None,
+    telemetry: Optional[TelemetrySink] = None,
+    telemetry_label: str = "",
+    cost_offset: float = 0.0,
+) -> Tuple[np.ndarray, float]:
+    """单条退火链的标量版本，与 batched_simulated_annealing 的移动规则及 neighbors / budget / telemetry 参数一致
+
+    链数为 1 时逐步调用 numpy 的开销远大于计算本身，改用 Python 列表逐步迁移。
+    返回最优分配 (S,) 及其门店成本。
+    """
+    rng = rng or random
+    costs = np.asarray(store_costs, dtype=float).tolist()
+    assignment = [int(hub_pos) for hub_pos in initial_assignment]
+    hub_count = len(costs)
+    store_count = len(assignment)
+
+    current_cost = sum(costs[hub_pos][store_pos] for store_pos, hub_pos in enumerate(assignment))
+    best_assignment = list(assignment)
+    best_cost = current_cost
+
+    if hub_count < 2 or store_count == 0:
+        return np.array(best_assignment, dtype=np.intp), best_cost
+
+    loads = [0] * hub_count
+    for hub_pos in assignment:
+        loads[hub_pos] += 1
+
+    temperature = initial_temp if initial_temp > 0 else 1e-6
+    accepted = infeasible = 0
+    neighbor_rows = neighbors.tolist() if neighbors is not None else None
+
+    last_improvement = 0
+    last_improvement_time = time.monotonic() if budget is not None else 0.0
+    sample_every = telemetry.sample_every if telemetry is not None else 0
+    if telemetry is not None:
+        telemetry.record("hub_sa", 0, force=True, hubs=telemetry_label, current_cost=current_cost + cost_offset,
+                         best_cost=best_cost + cost_offset, temperature=temperature)
+
+    steps = 0
+    early_stops = 0
+    for step in range(1, iterations + 1):
+        if budget is not None and budget.stop_reason(step - 1, last_improvement, last_improvement_time):
+            early_stops = 1
+            break
+        steps = step
+
+        store_pos = rng.randrange(store_count)
+        current = assignment[store_pos]
+        if neighbor_rows is None:
+            proposed = (current + 1 + rng.randrange(hub_count - 1)) % hub_count
+        else:
+            row = neighbor_rows[store_pos]
+            proposed = row[rng.randrange(len(row))]
+
+        improved = False
+        if loads[current] <= 1 or proposed == current:
+            infeasible += 1
+        else:
+            delta = costs[proposed][store_pos] - costs[current][store_pos]
+            if delta <= 0 or rng.random() < math.exp(-delta / max(temperature, 1e-6)):
+                assignment[store_pos] = proposed
+                loads[current] -= 1
+                loads[proposed] += 1
+                current_cost += delta
+                accepted += 1
+                if current_cost < best_cost:
+                    best_cost = current_cost
+                    best_assignment = list(assignment)
+                    improved = True
+                    last_improvement = step
+                    if budget is not None:
+                        last_improvement_time = time.monotonic()
+
+        if sample_every and (improved or step % sample_every == 0):
+            telemetry.record("hub_sa", step, force=True, hubs=telemetry_label,
+                             current_cost=current_cost + cost_offset, best_cost=best_cost + cost_offset,
+                             temperature=temperature)
+
+        temperature *= cooling_rate
+        if temperature < 1e-6:
+            temperature = 1e-6
+
+    count("hub_sa.moves_proposed", steps)
+    count("hub_sa.moves_accepted", accepted)
+    count("hub_sa.moves_infeasible", infeasible)
+    count("hub_sa.early_stops", early_stops)
+    return np.array(best_assignment, dtype=np.intp), best_cost
+
+
+def anneal_hub_subset(
+    cost_model: HubCostModel,
+    hub_subset: Sequence[str],
+    initial_assignments: List[Dict[str, str]],
+    chain_count: int,
+    initial_temp: float,
+    cooling_rate: float,
+    iterations: int,
+    rng: Optional[np.random.Generator] = None,
+    candidate_neighbors: Optional[int] = None,
+    budget: Optional[SearchBudget] = None,
+    telemetry: Optional[TelemetrySink] = None,
+) -> Tuple[Dict[str, str], Dict[str, float]]:
+    """以多个初始分配（循环填充）为种子运行 chain_count 条批量退火链，返回最优链的分配与成本明细
+
+    candidate_neighbors、budget 与 telemetry 的含义同 KMeansSimulatedAnnealingOptimizer._simulated_annealing。
+    """
+    if not initial_assignments:
+        raise ValueError("至少需要一个初始分配")
+
+    hub_subset = list(hub_subset)
+    store_ids = list(initial_assignments[0].keys())
+    position = {hub_id: idx for idx, hub_id in enumerate(hub_subset)}
+
+    hub_idx = cost_model.hub_indices(hub_subset)
+    subset_costs = cost_model.store_costs[np.ix_(hub_idx, cost_model.store_indices(store_ids))]
+
+    seeds = np.array([
+        [position[assignment[store_id]] for store_id in store_ids]
+        for assignment in initial_assignments
+    ], dtype=np.intp)
+    chain_count = max(1, chain_count)
+    chains = seeds[np.arange(chain_count) % len(seeds)]
+
+    best_assignments, best_costs = batched_simulated_annealing(
+        subset_costs,
+        chains,
+        initial_temp,
+        cooling_rate,
+        iterations,
+        rng,
+        neighbors=nearest_hub_positions(subset_costs, candidate_neighbors),
+        budget=budget,
+        telemetry=telemetry,
+        telemetry_label=",".join(hub_subset),
+        cost_offset=cost_model.fixed_cost(hub_idx),
+    )
+
+    winner = int(np.argmin(best_costs))
+    store_assignments = {
+        store_id: hub_subset[hub_pos]
+        for store_id, hub_pos in zip(store_ids, best_assignments[winner])
+    }
+    return store_assignments, cost_model.breakdown(hub_subset, store_assignments)
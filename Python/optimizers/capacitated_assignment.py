@@ -0,0 +1,231 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+from optimizers.cost_model import HubCostModel
+
+# 网络单纯形法要求整数权重与需求，成本与非整数需求按此倍数放大后取整
+_COST_SCALE = 1000
+_DEMAND_SCALE = 1000
+# 0-1 规划回退的默认求解时间上限（秒），调用方没有时间预算时使用
+_EXACT_TIME_LIMIT = 10.0
+
+
+def solve_capacitated_assignment(
+    cost_model: HubCostModel,
+    hub_subset: Sequence[str],
+    store_ids: Optional[Sequence[str]] = None,
+    require_all_hubs: bool = True,
+    time_limit: Optional[float] = None,
+) -> Optional[Dict[str, str]]:
+    """固定中转点组合下求解满足中转点容量的门店分配（每个门店只归属一个中转点）
+
+    单源容量分配是 NP 难问题，这里先求允许拆分需求的最小费用流松弛（多项式时间）：没有门店被拆分时
+    即为最优分配。有拆分时（基本解中至多 中转点数-1 个门店），把拆分门店取整到剩余容量足够的中转点，
+    再逐个检查中转点负载，超载时先做贪心迁移修复，仍不可行则求解 0-1 规划（需要 PuLP）。
+    取整或修复得到的分配可行但不保证最优。
+    require_all_hubs 为 True 时每个中转点至少服务一个门店（与模拟退火维护的约束一致，空置的中转点
+    只增加固定成本，应由更小的组合评估）。不存在可行分配时返回 None。
+    time_limit 为 0-1 规划回退的求解时间上限（秒），为空时使用 _EXACT_TIME_LIMIT，不大于0时跳过精确求解；
+    上限内未找到可行解同样返回 None。
+    """
+    hub_subset = list(hub_subset)
+    store_ids = list(cost_model.stores if store_ids is None else store_ids)
+    if not hub_subset or not store_ids:
+        return None
+    if require_all_hubs and len(store_ids) < len(hub_subset):
+        return None
+
+    hub_idx = cost_model.hub_indices(hub_subset)
+    store_idx = cost_model.store_indices(store_ids)
+    costs = cost_model.store_costs[np.ix_(hub_idx, store_idx)]
+    demands = cost_model.store_demands[store_idx]
+    capacities = cost_model.hub_capacities[hub_idx]
+
+    integral = np.allclose(demands, np.round(demands))
+    demand_scale = 1 if integral else _DEMAND_SCALE
+    scaled_demands = np.round(demands * demand_scale).astype(int)
+    scaled_capacities = np.where(np.isfinite(capacities), np.floor(capacities * demand_scale), np.inf)
+    total_demand = int(scaled_demands.sum())
+
+    # 零需求门店不占用容量，先分配到成本最低的中转点
+    assigned = np.argmin(costs, axis=0)
+
+    if total_demand > 0:
+        if np.isfinite(scaled_capacities).all() and scaled_capacities.sum() < total_demand:
+            return None
+        flow_assigned = _round_min_cost_flow(costs, scaled_demands, scaled_capacities)
+        if flow_assigned is None:
+            return None
+        positive = scaled_demands > 0
+        assigned[positive] = flow_assigned[positive]
+
+    if not _is_feasible(assigned, scaled_demands, scaled_capacities, require_all_hubs):
+        assigned = _repair_assignment(assigned, costs, scaled_demands, scaled_capacities, require_all_hubs)
+        if assigned is None:
+            assigned = _solve_single_source(
+                costs, scaled_demands, scaled_capacities, require_all_hubs,
+                _EXACT_TIME_LIMIT if time_limit is None else time_limit,
+            )
+        if assigned is None:
+            return None
+
+    return {store_id: hub_subset[assigned[s_pos]] for s_pos, store_id in enumerate(store_ids)}
+
+
+def _round_min_cost_flow(costs: np.ndarray, scaled_demands: np.ndarray,
+                         scaled_capacities: np.ndarray) -> Optional[np.ndarray]:
+    """求可拆分需求的最小费用流并把每个门店取整到一个中转点，返回各门店的中转点位置（零需求门店为 -1）"""
+    hub_count, store_count = costs.shape
+
+    import networkx as nx
+
+    graph = nx.DiGraph()
+    sink = ("sink",)
+    graph.add_node(sink, demand=int(scaled_demands.sum()))
+
+    for h_pos in range(hub_count):
+        hub_node = ("hub", h_pos)
+        graph.add_node(hub_node, demand=0)
+        if np.isfinite(scaled_capacities[h_pos]):
+            graph.add_edge(hub_node, sink, weight=0, capacity=int(scaled_capacities[h_pos]))
+        else:
+            graph.add_edge(hub_node, sink, weight=0)
+
+    scaled_costs = np.round(costs * _COST_SCALE).astype(int)
+    for s_pos in range(store_count):
+        if scaled_demands[s_pos] <= 0:
+            continue
+        store_node = ("store", s_pos)
+        graph.add_node(store_node, demand=-int(scaled_demands[s_pos]))
+        for h_pos in range(hub_count):
+            graph.add_edge(store_node, ("hub", h_pos), weight=int(scaled_costs[h_pos, s_pos]))
+
+    try:
+        flow = nx.min_cost_flow(graph)
+    except nx.NetworkXUnfeasible:
+        return None
+
+    # 未拆分的门店直接按流量归属；拆分门店按需求从大到小优先放入剩余容量足够的中转点，
+    # 都放不下时暂时归属承接量最大的中转点，由调用方检查负载并修复
+    assigned = np.full(store_count, -1, dtype=np.intp)
+    residual = scaled_capacities.astype(float)
+    split_stores = []
+    for s_pos in range(store_count):
+        if scaled_demands[s_pos] <= 0:
+            continue
+        outgoing = flow[("store", s_pos)]
+        served = [h_pos for h_pos in range(hub_count) if outgoing.get(("hub", h_pos), 0) > 0]
+        if len(served) == 1:
+            assigned[s_pos] = served[0]
+            residual[served[0]] -= scaled_demands[s_pos]
+        else:
+            split_stores.append(s_pos)
+
+    for s_pos in sorted(split_stores, key=lambda pos: -scaled_demands[pos]):
+        outgoing = flow[("store", s_pos)]
+        ranked = sorted(range(hub_count), key=lambda pos: -outgoing.get(("hub", pos), 0))
+        fitting = [h_pos for h_pos in ranked if residual[h_pos] >= scaled_demands[s_pos]]
+        h_pos = fitting[0] if fitting else ranked[0]
+        assigned[s_pos] = h_pos
+        residual[h_pos] -= scaled_demands[s_pos]
+
+    return assigned
+
+
+def _is_feasible(assigned: np.ndarray, scaled_demands: np.ndarray, scaled_capacities: np.ndarray,
+                 require_all_hubs: bool) -> bool:
+    hub_count = len(scaled_capacities)
+    loads = np.bincount(assigned, weights=scaled_demands, minlength=hub_count)
+    if np.any(loads > scaled_capacities):
+        return False
+    return not require_all_hubs or bool(np.all(np.bincount(assigned, minlength=hub_count) > 0))
+
+
+def _repair_assignment(
+    assigned: np.ndarray,
+    costs: np.ndarray,
+    scaled_demands: np.ndarray,
+    scaled_capacities: np.ndarray,
+    require_all_hubs: bool,
+) -> Optional[np.ndarray]:
+    """贪心修复：把超载中转点上的门店迁到剩余容量足够的中转点，给空置中转点补一个门店；
+    每步选成本增量最小的迁移，无法继续时返回 None"""
+    assigned = assigned.copy()
+    hub_count, store_count = costs.shape
+    loads = np.bincount(assigned, weights=scaled_demands, minlength=hub_count).astype(float)
+    served = np.bincount(assigned, minlength=hub_count)
+    store_positions = np.arange(store_count)
+
+    for _ in range(2 * store_count + hub_count):
+        overloaded = np.flatnonzero(loads > scaled_capacities)
+        if overloaded.size:
+            source = overloaded[0]
+            candidates = store_positions[assigned == source]
+            # (门店, 目标中转点) 的成本增量，目标剩余容量不足或为原中转点时不可选
+            residual = scaled_capacities - loads
+            delta = costs[:, candidates] - costs[source, candidates]
+            delta[source, :] = np.inf
+            delta[residual[:, None] < scaled_demands[candidates][None, :]] = np.inf
+        elif require_all_hubs and np.any(served == 0):
+            target = np.flatnonzero(served == 0)[0]
+            candidates = store_positions[(served[assigned] > 1)
+                                         & (scaled_demands <= scaled_capacities[target] - loads[target])]
+            delta = np.full((hub_count, candidates.size), np.inf)
+            delta[target, :] = costs[target, candidates] - costs[assigned[candidates], candidates]
+        else:
+            return assigned
+
+        if candidates.size == 0 or not np.isfinite(delta).any():
+            return None
+        h_pos, c_pos = np.unravel_index(np.argmin(delta), delta.shape)
+        s_pos = candidates[c_pos]
+        loads[assigned[s_pos]] -= scaled_demands[s_pos]
+        served[assigned[s_pos]] -= 1
+        assigned[s_pos] = h_pos
+        loads[h_pos] += scaled_demands[s_pos]
+        served[h_pos] += 1
+    return None
+
+
+def _solve_single_source(
+    costs: np.ndarray,
+    scaled_demands: np.ndarray,
+    scaled_capacities: np.ndarray,
+    require_all_hubs: bool,
+    time_limit: float,
+) -> Optional[np.ndarray]:
+    """以 0-1 规划精确求解单源容量分配；未安装 PuLP、问题不可行或 time_limit 秒内未找到可行解时返回 None"""
+    if time_limit <= 0:
+        return None
+    try:
+        import pulp
+    except ImportError:
+        return None
+
+    hub_count, store_count = costs.shape
+    problem = pulp.LpProblem("single_source_assignment", pulp.LpMinimize)
+    x = {
+        (h_pos, s_pos): pulp.LpVariable(f"x_{h_pos}_{s_pos}", cat="Binary")
+        for h_pos in range(hub_count)
+        for s_pos in range(store_count)
+    }
+    problem += pulp.lpSum(float(costs[h_pos, s_pos]) * var for (h_pos, s_pos), var in x.items())
+    for s_pos in range(store_count):
+        problem += pulp.lpSum(x[h_pos, s_pos] for h_pos in range(hub_count)) == 1
+    for h_pos in range(hub_count):
+        if np.isfinite(scaled_capacities[h_pos]):
+            problem += (pulp.lpSum(float(scaled_demands[s_pos]) * x[h_pos, s_pos] for s_pos in range(store_count))
+                        <= float(scaled_capacities[h_pos]))
+        if require_all_hubs:
+            problem += pulp.lpSum(x[h_pos, s_pos] for s_pos in range(store_count)) >= 1
+
+    problem.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    if problem.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+        return None
+    assigned = np.array([
+        max(range(hub_count), key=lambda h_pos: x[h_pos, s_pos].value() or 0.0) for s_pos in range(store_count)
+    ], dtype=np.intp)
+    if not _is_feasible(assigned, scaled_demands, scaled_capacities, require_all_hubs):
+        return None
+    return assigned
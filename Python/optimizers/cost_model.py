@@ -0,0 +1,205 @@
+import copy
+import weakref
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from network_model import LogisticsNetwork
+from profiling import count, profiled
+
+# 每个网络最近构建的若干个成本模型 {缓存键: 模型}，网络被回收时自动释放
+_MODEL_CACHE = weakref.WeakKeyDictionary()
+_MODELS_PER_NETWORK = 8
+
+
+class HubCostModel:
+    """中转点选址成本模型：预先计算每个候选中转点的固定成本与中转点-门店运输成本数组
+
+    固定成本 = 建设成本 + 单位运输成本 × 所有供应商到该中转点的距离之和，只与启用的中转点集合有关；
+    门店成本通过 (中转点, 门店) 下标直接从数组中批量取值。
+    """
+
+    def __init__(
+        self,
+        network: LogisticsNetwork,
+        candidate_hubs: Iterable[str],
+        suppliers: Iterable[str],
+        stores: Iterable[str],
+        unit_transport_cost: float,
+    ):
+        if not network.distance_matrix:
+            network.calculate_distances()
+
+        self.candidate_hubs = list(candidate_hubs)
+        self.suppliers = list(suppliers)
+        self.stores = list(stores)
+        self.unit_transport_cost = unit_transport_cost
+        self.hub_index = {hub_id: idx for idx, hub_id in enumerate(self.candidate_hubs)}
+        self.store_index = {store_id: idx for idx, store_id in enumerate(self.stores)}
+
+        self.build_costs = np.array([
+            getattr(network.locations[hub_id], "build_cost", 0.0) for hub_id in self.candidate_hubs
+        ], dtype=float)
+
+        if self.suppliers and self.candidate_hubs:
+            supplier_distances = network.distance_matrix.submatrix(self.suppliers, self.candidate_hubs).sum(axis=0)
+        else:
+            supplier_distances = np.zeros(len(self.candidate_hubs))
+        self.supplier_costs = unit_transport_cost * supplier_distances
+        self.fixed_costs = self.build_costs + self.supplier_costs
+
+        if self.candidate_hubs and self.stores:
+            distances = network.distance_matrix.submatrix(self.candidate_hubs, self.stores)
+        else:
+            distances = np.zeros((len(self.candidate_hubs), len(self.stores)))
+        # 形状为 (中转点数, 门店数)
+        self.store_costs = unit_transport_cost * distances
+
+        # 门店需求沿用容量列；中转点未设置容量时视为无限
+        self.store_demands = np.array([
+            HubCostModel._optional_float(network.locations[store_id].capacity, 0.0) for store_id in self.stores
+        ], dtype=float)
+        self.hub_capacities = np.array([
+            HubCostModel._optional_float(network.locations[hub_id].capacity, np.inf) for hub_id in self.candidate_hubs
+        ], dtype=float)
+
+        self._cache_key = HubCostModel._network_key(network, self.suppliers, unit_transport_cost)
+
+    @classmethod
+    def for_network(
+        cls,
+        network: LogisticsNetwork,
+        suppliers: Optional[Iterable[str]] = None,
+        unit_transport_cost: float = 1.0,
+        hubs: Iterable[str] = (),
+        stores: Iterable[str] = (),
+    ) -> "HubCostModel":
+        """返回覆盖网络全部批发商与门店的成本模型；网络或参数未变化时复用缓存
+
+        只有单位运输成本不同的模型由已缓存模型按比例缩放得到，无需重新读取距离矩阵。
+        """
+        suppliers = list(network.manufacturers) if suppliers is None else list(suppliers)
+        key = cls._network_key(network, suppliers, unit_transport_cost)
+
+        models = _MODEL_CACHE.setdefault(network, {})
+        model = models.get(key)
+        if model is not None and model.covers(hubs, stores):
+            count("cost_model_cache.hit")
+            return model
+
+        for other in models.values():
+            if (other._cache_key[:-2] == key[:-2] and other._cache_key[-1] == key[-1]
+                    and other.unit_transport_cost > 0 and other.covers(hubs, stores)):
+                count("cost_model_cache.hit")
+                count("cost_model_cache.scaled")
+                return cls._remember(network, key, other.scaled(unit_transport_cost))
+
+        count("cost_model_cache.miss")
+
+        candidate_hubs = list(dict.fromkeys(list(network.wholesalers) + list(hubs)))
+        store_ids = [
+            store_id
+            for store_id in network.stores
+            if getattr(network.locations.get(store_id), "type", "").lower() == "store"
+        ]
+        store_ids = list(dict.fromkeys(store_ids + list(stores)))
+
+        model = cls(network, candidate_hubs, suppliers, store_ids, unit_transport_cost)
+        return cls._remember(network, key, model)
+
+    @staticmethod
+    def _remember(network: LogisticsNetwork, key: Tuple, model: "HubCostModel") -> "HubCostModel":
+        models = _MODEL_CACHE.setdefault(network, {})
+        models.pop(key, None)
+        models[key] = model
+        while len(models) > _MODELS_PER_NETWORK:
+            models.pop(next(iter(models)))
+        return model
+
+    def scaled(self, unit_transport_cost: float) -> "HubCostModel":
+        """返回单位运输成本改为 unit_transport_cost 的副本：建设成本不变，运输成本按比例缩放"""
+        factor = unit_transport_cost / self.unit_transport_cost
+        model = copy.copy(self)
+        model.unit_transport_cost = unit_transport_cost
+        model.supplier_costs = self.supplier_costs * factor
+        model.fixed_costs = self.build_costs + model.supplier_costs
+        model.store_costs = self.store_costs * factor
+        model._cache_key = self._cache_key[:-2] + (unit_transport_cost, self._cache_key[-1])
+        return model
+
+    @staticmethod
+    def _network_key(network: LogisticsNetwork, suppliers: List[str], unit_transport_cost: float) -> Tuple:
+        matrix = network.distance_matrix
+        return (
+            id(matrix),
+            getattr(matrix, "version", None),
+            len(network.locations),
+            tuple(suppliers),
+            unit_transport_cost,
+            # 需求、容量与建设成本直接改写 Location 属性时不会改变距离矩阵版本，需单独纳入缓存键
+            tuple(
+                (location.capacity, getattr(location, "build_cost", 0.0)) for location in network.locations.values()
+            ),
+        )
+
+    @staticmethod
+    def _optional_float(value, default: float) -> float:
+        return float(value) if value is not None else default
+
+    def is_capacitated(self, hubs: Iterable[str]) -> bool:
+        """给定中转点中是否存在设置了容量的中转点"""
+        return bool(np.isfinite(self.hub_capacities[self.hub_indices(hubs)]).any())
+
+    def covers(self, hubs: Iterable[str], stores: Iterable[str]) -> bool:
+        return (all(hub_id in self.hub_index for hub_id in hubs)
+                and all(store_id in self.store_index for store_id in stores))
+
+    def hub_indices(self, hubs: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.hub_index[hub_id] for hub_id in hubs), dtype=np.intp)
+
+    def store_indices(self, stores: Iterable[str]) -> np.ndarray:
+        return np.fromiter((self.store_index[store_id] for store_id in stores), dtype=np.intp)
+
+    def assignment_indices(self, store_assignments: Dict[str, str]) -> Tuple[np.ndarray, np.ndarray]:
+        """将 {门店: 中转点} 转为 (门店下标, 中转点下标) 两个数组"""
+        count = len(store_assignments)
+        store_idx = np.fromiter((self.store_index[s_id] for s_id in store_assignments), dtype=np.intp, count=count)
+        hub_idx = np.fromiter((self.hub_index[h_id] for h_id in store_assignments.values()), dtype=np.intp, count=count)
+        return store_idx, hub_idx
+
+    def respects_capacity(self, store_assignments: Dict[str, str]) -> bool:
+        """分配下每个中转点承接的门店需求均不超过其容量（未设置容量的中转点不受限）"""
+        store_idx, hub_idx = self.assignment_indices(store_assignments)
+        loads = np.bincount(hub_idx, weights=self.store_demands[store_idx], minlength=len(self.hub_capacities))
+        return bool(np.all(loads <= self.hub_capacities + 1e-9))
+
+    def fixed_cost(self, hub_idx: np.ndarray) -> float:
+        return float(self.fixed_costs[hub_idx].sum())
+
+    def evaluate(self, active_hub_idx: np.ndarray, store_idx: np.ndarray, hub_idx: np.ndarray) -> Dict[str, float]:
+        """按下标数组计算完整成本明细"""
+        build_cost = float(self.build_costs[active_hub_idx].sum())
+        supplier_cost = float(self.supplier_costs[active_hub_idx].sum())
+        store_cost = float(self.store_costs[hub_idx, store_idx].sum())
+        return {
+            "total_cost": build_cost + supplier_cost + store_cost,
+            "build_cost": build_cost,
+            "supplier_cost": supplier_cost,
+            "store_cost": store_cost,
+        }
+
+    def move_delta(self, store_idx, from_hub_idx, to_hub_idx):
+        """门店从 from_hub 改由 to_hub 服务时的成本差，参数可为标量或等长数组"""
+        return self.store_costs[to_hub_idx, store_idx] - self.store_costs[from_hub_idx, store_idx]
+
+    def nearest_assignment(self, active_hub_idx: np.ndarray, store_idx: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """无容量约束下每个门店的最优中转点：返回 (中转点下标, 对应成本)"""
+        costs = self.store_costs[np.ix_(active_hub_idx, store_idx)]
+        nearest = np.argmin(costs, axis=0)
+        return active_hub_idx[nearest], costs[nearest, np.arange(len(store_idx))]
+
+    @profiled("hub_cost_evaluation")
+    def breakdown(self, hubs: Iterable[str], store_assignments: Dict[str, str]) -> Dict[str, float]:
+        """与 KMeansSimulatedAnnealingOptimizer._calculate_total_cost 返回结构一致的成本明细"""
+        store_idx, hub_idx = self.assignment_indices(store_assignments)
+        return self.evaluate(self.hub_indices(hubs), store_idx, hub_idx)
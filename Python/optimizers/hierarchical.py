@@ -0,0 +1,147 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from locations import Location
+from network_model import LogisticsNetwork
+from optimizers.base_optimizer import BaseOptimizer, register_optimizer
+from optimizers.tabu_search_optimizer import TabuSearchOptimizer
+
+
+def solve_hierarchical(
+    network: LogisticsNetwork,
+    regions: int,
+    hub_counts: Optional[Iterable[int]] = None,
+    unit_transport_cost: float = 1.0,
+    workers: Optional[int] = None,
+    region_options: Optional[Dict] = None,
+    global_iterations: int = 200,
+    time_limit: Optional[float] = None,
+    capacitated: bool = True,
+    candidate_neighbors: Optional[int] = 20,
+):
+    """多层级中转点选址，返回结构与 KMeansSimulatedAnnealingOptimizer.optimize 一致
+
+    1. 将候选中转点与门店一起用 K-means 划分为 regions 个区域；
+    2. 各区域作为独立子网络并行选出区域内的中转点（禁忌搜索，workers 为进程数，1 表示在当前进程内依次求解）；
+    3. 以各区域结果的并集为初始解，在整个网络上做一轮禁忌搜索全局精修，修正区域边界处的分配。
+    区域求解的总规模与候选点数近似线性；全局精修从较好的初始解出发迭代 global_iterations 轮，
+    且只考虑每个门店最近的 candidate_neighbors 个候选中转点，单轮开销与门店数成正比。
+    hub_counts 约束最终启用的中转点总数；区域结果的数量不在范围内时，全局精修改为贪心初始化。
+    """
+    if regions <= 0:
+        raise ValueError("regions 必须大于0")
+
+    candidate_hubs, suppliers, stores, hub_counts, _ = TabuSearchOptimizer._prepare(
+        network, hub_counts, unit_transport_cost
+    )
+
+    partitions = _partition_regions(network, candidate_hubs, stores, regions)
+    tasks = [
+        [network.locations[location_id] for location_id in suppliers + region_hubs + region_stores]
+        for region_hubs, region_stores in partitions
+    ]
+    options = dict(region_options or {})
+    options.setdefault("capacitated", capacitated)
+
+    if workers == 1 or len(tasks) <= 1:
+        region_results = [_solve_region(task, unit_transport_cost, options) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            region_results = list(pool.map(_solve_region, tasks, repeat(unit_transport_cost), repeat(options)))
+
+    combined_hubs = [hub_id for region_hubs in region_results for hub_id in region_hubs]
+    initial_hubs = combined_hubs if min(hub_counts) <= len(combined_hubs) <= max(hub_counts) else None
+
+    best_solution, evaluated_solutions = TabuSearchOptimizer.optimize(
+        network,
+        hub_counts=hub_counts,
+        unit_transport_cost=unit_transport_cost,
+        max_iterations=global_iterations,
+        time_limit=time_limit,
+        initial_hubs=initial_hubs,
+        capacitated=capacitated,
+        candidate_neighbors=candidate_neighbors,
+    )
+
+    for solution in evaluated_solutions:
+        solution["region_count"] = len(partitions)
+    return best_solution, evaluated_solutions
+
+
+@register_optimizer("hierarchical", "多层级分区+禁忌搜索")
+class HierarchicalOptimizer(BaseOptimizer):
+    """多层级中转点选址（区域分解 + 禁忌搜索全局精修），适用于数百个候选中转点，参数含义见 solve_hierarchical"""
+
+    menu_parameters = (
+        ("regions", "区域数量", int, 8),
+        ("global_iterations", "全局精修迭代次数", int, 200),
+        ("time_limit", "全局精修时间预算 (秒)", float, 30.0),
+    )
+
+    @staticmethod
+    def optimize(
+        network: LogisticsNetwork,
+        hub_counts: Optional[Iterable[int]] = None,
+        unit_transport_cost: float = 1.0,
+        regions: int = 8,
+        workers: Optional[int] = None,
+        region_options: Optional[Dict] = None,
+        global_iterations: int = 200,
+        time_limit: Optional[float] = None,
+        capacitated: bool = True,
+        candidate_neighbors: Optional[int] = 20,
+    ):
+        return solve_hierarchical(
+            network,
+            regions,
+            hub_counts=hub_counts,
+            unit_transport_cost=unit_transport_cost,
+            workers=workers,
+            region_options=region_options,
+            global_iterations=global_iterations,
+            time_limit=time_limit,
+            capacitated=capacitated,
+            candidate_neighbors=candidate_neighbors,
+        )
+
+
+def _partition_regions(
+    network: LogisticsNetwork,
+    candidate_hubs: List[str],
+    stores: List[str],
+    regions: int,
+) -> List[Tuple[List[str], List[str]]]:
+    """按坐标将中转点与门店划分为区域，没有候选中转点的区域并入聚类中心最近的有中转点区域"""
+    clusters, centroids = network.cluster_entities(candidate_hubs + stores, regions)
+
+    hub_set = set(candidate_hubs)
+    region_hubs = {idx: [e_id for e_id in members if e_id in hub_set] for idx, members in clusters.items()}
+    region_stores = {idx: [e_id for e_id in members if e_id not in hub_set] for idx, members in clusters.items()}
+
+    with_hubs = [idx for idx in clusters if region_hubs[idx]]
+    for idx in clusters:
+        if region_hubs[idx] or not region_stores[idx]:
+            continue
+        distances = np.abs(centroids[with_hubs] - centroids[idx]).sum(axis=1)
+        target = with_hubs[int(np.argmin(distances))]
+        region_stores[target].extend(region_stores[idx])
+        region_stores[idx] = []
+
+    return [(region_hubs[idx], region_stores[idx]) for idx in with_hubs if region_stores[idx]]
+
+
+def _solve_region(locations: List[Location], unit_transport_cost: float, options: Dict) -> List[str]:
+    """在区域子网络上选择中转点；区域内无可行方案时保留该区域全部候选中转点"""
+    region_network = LogisticsNetwork(locations)
+    try:
+        best_solution, _ = TabuSearchOptimizer.optimize(
+            region_network,
+            unit_transport_cost=unit_transport_cost,
+            **options,
+        )
+    except (RuntimeError, ValueError):
+        return list(region_network.wholesalers)
+    return list(best_solution["active_hubs"])
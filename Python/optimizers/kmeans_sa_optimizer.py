@@ -1,15 +1,46 @@
-import copy
+import inspect
 import math
 import random
+import time
+from collections import Counter
 from itertools import combinations, permutations
-from typing import Dict, Iterable, List, Optional, Tuple
-
-from network_model import LogisticsNetwork
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 
-class KMeansSimulatedAnnealingOptimizer:
+from anytime import CancellationToken, Incumbent, SearchBudget
+from checkpoint import Checkpointer
+from network_model import LogisticsNetwork
+from optimizers.base_optimizer import BaseOptimizer, register_optimizer
+from optimizers.aggregation import StoreAggregation, aggregate_stores
+from optimizers.batched_annealing import (
+    anneal_assignment_array,
+    anneal_hub_subset,
+    batched_simulated_annealing,
+    nearest_hub_positions,
+)
+from optimizers.capacitated_assignment import solve_capacitated_assignment
+from optimizers.cost_model import HubCostModel
+from profiling import count, profiled
+from telemetry import TelemetrySink
+
+
+# regions 模式转交 solve_hierarchical 时使用的参数
+_HIERARCHICAL_PARAMETERS = ("network", "hub_counts", "unit_transport_cost", "capacitated", "regions", "workers")
+
+
+@register_optimizer("kmeans_sa", "K-means+模拟退火")
+class KMeansSimulatedAnnealingOptimizer(BaseOptimizer):
     """K-means 聚类 + 模拟退火 的中转点选择与配送优化算法"""
 
+    supports_warm_start = True
+    menu_parameters = (
+        ("initial_temp", "初始温度", float, 500.0),
+        ("cooling_rate", "冷却率 (0-1)", float, 0.9),
+        ("iterations", "模拟退火迭代次数", int, 800),
+        ("kmeans_restarts", "K-means重启次数", int, 5),
+    )
+
     @staticmethod
     def optimize(
         network: LogisticsNetwork,
@@ -19,45 +50,217 @@ class KMeansSimulatedAnnealingOptimizer:
         cooling_rate: float = 0.9,
         iterations: int = 1000,
         kmeans_restarts: int = 5,
+        candidate_neighbors: Optional[int] = None,
+        use_bounds: bool = True,
+        sa_chains: int = 1,
+        capacitated: bool = True,
+        aggregation_cell_size: Optional[float] = None,
+        regions: Optional[int] = None,
+        workers: Optional[int] = None,
+        clusterings: Optional[Dict[int, List[Tuple[Dict[int, List[str]], List[List[float]]]]]] = None,
+        share_clusterings: bool = False,
+        warm_start: Optional[Dict] = None,
+        telemetry: Optional[TelemetrySink] = None,
+        checkpoint: Optional[Checkpointer] = None,
+        time_limit: Optional[float] = None,
+        stall_iterations: Optional[int] = None,
+        stall_seconds: Optional[float] = None,
+        incumbent: Optional[Incumbent] = None,
+        progress: Optional[Callable[[Dict], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
     ):
-        """执行优化，返回最佳方案及所有尝试的方案列表"""
-        if not isinstance(network, LogisticsNetwork):
-            raise TypeError("network 必须是 LogisticsNetwork 类型")
+        """执行优化，返回最佳方案及所有尝试的方案列表
+
+        candidate_neighbors 指定时，模拟退火只在门店最近的若干个中转点之间迁移。
+        use_bounds 为 True 时先计算各中转点数量及组合的成本下界，跳过下界不低于当前最优成本的情况。
+        sa_chains 大于1时，每个组合以 K-means 重启结果为种子，用批量向量化引擎同时推进多条退火链。
+        capacitated 为 True 时，组合内有中转点设置容量即在容量约束下求解门店分配（每个门店只归属一个中转点，
+        每个启用的中转点至少服务一个门店），不存在可行分配的组合视为不可行；False 时忽略容量。
+        aggregation_cell_size 指定时，先把门店按该边长的网格聚合为加权单元，在精简实例上筛选组合，
+        再将各数量下的最佳方案展开到门店并做一轮模拟退火精修。
+        regions 指定时改用多层级模式（见 optimizers.hierarchical.solve_hierarchical），适用于数百个候选中转点，
+        各区域以 workers 个进程并行求解；此时只使用 hub_counts、unit_transport_cost、capacitated 与 workers，
+        其他参数为非默认值时抛出 ValueError（多层级模式的完整参数见 hierarchical 优化器）。
+        默认每个组合各自执行 kmeans_restarts 次 K-means 聚类；share_clusterings 为 True 时每个中转点数量只聚类一次，
+        由该数量的所有组合共享（更快，但各组合的初始解不再相互独立）。
+        clusterings 可传入 precompute_clusterings 的结果，在多次调用之间共享（会被补充缺失的数量），传入即启用共享。
+        warm_start 传入此前的 best_solution 时，其分配作为同一中转点组合的额外初始解。
+        telemetry 为 telemetry.TelemetrySink 时，各组合的模拟退火按其采样率记录收敛数据（来源 hub_sa；多链时记录各链中的最低成本，
+        聚合模式下为聚合实例上的成本）。
+        checkpoint 为 checkpoint.Checkpointer 时，每评估完一个组合按其间隔（迭代单位为组合数）保存
+        已完成的数量、当前组合进度、已有最优方案、聚类结果与随机数状态；检查点存在时从中断处继续。
+        time_limit 为整个优化的墙钟秒数预算，到期后当前退火立即结束、不再评估后续组合，返回已有的最优方案；
+        stall_iterations / stall_seconds 使单个组合的模拟退火在最优解连续多少次迭代 / 多少秒无改进时提前结束。
+        incumbent 为 anytime.Incumbent 时，每当出现更优的方案即更新，优化期间可随时读取。
+        progress 为回调时依次收到事件字典（event 为 count_started / subset / incumbent / count_finished / finished），
+        每个事件都带有 subsets_done、subsets_remaining（按下界剪枝后不断下调的剩余组合数上限）、
+        best_cost、elapsed 与按已用时间外推的 eta 秒数；回调在求解线程中同步执行。
+        cancel_token 为 anytime.CancellationToken 时，取消后当前退火在下一次迭代前结束，随即抛出 OptimizationCancelled。
+        """
+        if regions is not None:
+            # 多层级模式只使用 _HIERARCHICAL_PARAMETERS，其余参数指定非默认值时报错而不是静默忽略
+            arguments = locals()
+            unsupported = [
+                name
+                for name, parameter in inspect.signature(KMeansSimulatedAnnealingOptimizer.optimize).parameters.items()
+                if name not in _HIERARCHICAL_PARAMETERS and arguments[name] != parameter.default
+            ]
+            if unsupported:
+                raise ValueError(
+                    f"多层级模式（regions）不支持参数: {', '.join(unsupported)}，"
+                    "请改用 hierarchical 优化器并传入其支持的参数"
+                )
 
-        if unit_transport_cost < 0:
-            raise ValueError("unit_transport_cost 必须为非负数")
+            from optimizers.hierarchical import solve_hierarchical
 
-        if not network.distance_matrix:
-            network.calculate_distances()
+            return solve_hierarchical(
+                network,
+                regions,
+                hub_counts=hub_counts,
+                unit_transport_cost=unit_transport_cost,
+                workers=workers,
+                capacitated=capacitated,
+            )
 
-        candidate_hubs = list(network.wholesalers)
-        suppliers = list(network.manufacturers)
-        stores = [
-            store_id
-            for store_id in network.stores
-            if getattr(network.locations.get(store_id), "type", "").lower() == "store"
-        ]
+        candidate_hubs, suppliers, _, hub_counts, cost_model = KMeansSimulatedAnnealingOptimizer._prepare(
+            network, hub_counts, unit_transport_cost
+        )
+        count_order = {count: position for position, count in enumerate(hub_counts)}
 
-        if not candidate_hubs:
-            raise ValueError("网络中缺少可用的中转点候选")
+        if clusterings is None and share_clusterings:
+            clusterings = {}
 
-        if not stores:
-            raise ValueError("网络中缺少末端节点 (便利店)")
+        aggregation = None
+        if aggregation_cell_size is not None:
+            aggregation = aggregate_stores(network, aggregation_cell_size)
 
-        if not suppliers:
-            raise ValueError("网络中缺少供应商")
+        if use_bounds:
+            # 先评估下界较小的数量，尽早得到好的当前最优解以剪枝后续数量
+            hub_counts = sorted(
+                hub_counts,
+                key=lambda count: KMeansSimulatedAnnealingOptimizer._hub_count_lower_bound(cost_model, count),
+            )
 
-        if hub_counts is None:
-            hub_counts = range(1, len(candidate_hubs) + 1)
+        budget = SearchBudget.from_options(time_limit, stall_iterations, stall_seconds, cancel_token)
+        stop_reason = None
 
         best_solution = None
         best_cost = float("inf")
         evaluated_solutions = []
+        completed_counts = []
+        subsets_done = 0
+        count_progress = None
+
+        if checkpoint is not None:
+            fingerprint = {
+                "hub_counts": list(hub_counts),
+                "candidate_hubs": list(candidate_hubs),
+                "stores": cost_model.stores,
+                "unit_transport_cost": unit_transport_cost,
+                "initial_temp": initial_temp,
+                "cooling_rate": cooling_rate,
+                "iterations": iterations,
+                "kmeans_restarts": kmeans_restarts,
+                "candidate_neighbors": candidate_neighbors,
+                "use_bounds": use_bounds,
+                "sa_chains": sa_chains,
+                "capacitated": capacitated,
+                "aggregation_cell_size": aggregation_cell_size,
+                "share_clusterings": clusterings is not None,
+                "stall_iterations": stall_iterations,
+                "warm_start": (warm_start or {}).get("active_hubs"),
+            }
+            resumed = checkpoint.begin("kmeans_sa", fingerprint)
+            if resumed is not None:
+                best_solution = resumed["best_solution"]
+                best_cost = resumed["best_cost"]
+                evaluated_solutions = resumed["evaluated_solutions"]
+                completed_counts = resumed["completed_counts"]
+                subsets_done = resumed["subsets_done"]
+                count_progress = resumed["count_progress"]
+                if clusterings is not None and resumed["clusterings"]:
+                    clusterings.update(resumed["clusterings"])
+                if incumbent is not None and best_solution is not None:
+                    incumbent.offer(best_cost, best_solution)
+
+        def snapshot(progress: Optional[Dict]) -> Dict:
+            return {
+                "best_solution": best_solution,
+                "best_cost": best_cost,
+                "evaluated_solutions": evaluated_solutions,
+                "completed_counts": completed_counts,
+                "subsets_done": subsets_done,
+                "count_progress": progress,
+                "clusterings": clusterings,
+            }
+
+        # 进度：剩余组合数从全部组合开始，整个数量被剪枝或组合循环提前结束时扣除未评估的部分
+        started = time.monotonic()
+        subsets_run = 0
+        count_evaluated = 0
+        running_best = best_cost
+        subsets_remaining = sum(
+            math.comb(len(candidate_hubs), count) for count in hub_counts if count not in completed_counts
+        ) - (count_progress["position"] if count_progress is not None else 0)
+
+        def emit(event: str, **fields) -> None:
+            if progress is None:
+                return
+            elapsed = time.monotonic() - started
+            progress({
+                "event": event,
+                **fields,
+                "subsets_done": subsets_done,
+                "subsets_remaining": subsets_remaining,
+                "best_cost": running_best if running_best < float("inf") else None,
+                "elapsed": elapsed,
+                "eta": elapsed / subsets_run * subsets_remaining if subsets_run else None,
+            })
+
+        def check_cancelled() -> None:
+            if cancel_token is not None and cancel_token.cancelled:
+                if incumbent is not None:
+                    incumbent.finish("cancelled")
+                cancel_token.raise_if_cancelled()
+
+        def on_subset(count_state: Dict, hub_subset: Tuple[str, ...], subset_cost: Optional[float]) -> None:
+            nonlocal subsets_done, subsets_run, count_evaluated, subsets_remaining, running_best
+            # 取消时当前组合的退火被截断，其结果不再上报
+            check_cancelled()
+            subsets_done += 1
+            subsets_run += 1
+            count_evaluated += 1
+            subsets_remaining -= 1
+            emit("subset", hub_count=hub_count, hubs=list(hub_subset), cost=subset_cost)
+            if count_state["best_cost"] < running_best:
+                running_best = count_state["best_cost"]
+                emit("incumbent", hub_count=hub_count, active_hubs=count_state["best_for_count"]["active_hubs"],
+                     total_cost=running_best)
+            if checkpoint is not None:
+                checkpoint.maybe_save(subsets_done, lambda: snapshot({"hub_count": hub_count, **count_state}))
 
         for hub_count in hub_counts:
-            if hub_count <= 0 or hub_count > len(candidate_hubs):
+            if hub_count in completed_counts:
+                continue
+            check_cancelled()
+            if budget is not None and budget.expired():
+                stop_reason = "time_limit"
+                break
+            count_subsets = math.comb(len(candidate_hubs), hub_count)
+            if (use_bounds and
+                    KMeansSimulatedAnnealingOptimizer._hub_count_lower_bound(cost_model, hub_count) >= best_cost):
+                completed_counts.append(hub_count)
+                subsets_remaining -= count_subsets
+                emit("count_finished", hub_count=hub_count, count_best_cost=None, skipped=count_subsets, pruned=True)
                 continue
 
+            resume_progress = None
+            count_evaluated = 0
+            if count_progress is not None and count_progress["hub_count"] == hub_count:
+                resume_progress = count_progress
+                count_evaluated = count_progress["position"]
+            emit("count_started", hub_count=hub_count, subsets=count_subsets)
+
             result = KMeansSimulatedAnnealingOptimizer._evaluate_hub_count(
                 network,
                 hub_count,
@@ -68,20 +271,57 @@ class KMeansSimulatedAnnealingOptimizer:
                 cooling_rate,
                 iterations,
                 kmeans_restarts,
+                candidate_neighbors,
+                use_bounds,
+                best_cost,
+                cost_model,
+                sa_chains,
+                capacitated,
+                aggregation,
+                clusterings,
+                warm_start,
+                telemetry,
+                resume_progress,
+                on_subset,
+                budget,
+                incumbent,
             )
-
-            if result is None:
-                continue
-
-            evaluated_solutions.append(result)
-
-            if result["total_cost"] < best_cost:
-                best_cost = result["total_cost"]
-                best_solution = result
+            check_cancelled()
+
+            completed_counts.append(hub_count)
+            if result is not None:
+                evaluated_solutions.append(result)
+                if result["total_cost"] < best_cost:
+                    best_cost = result["total_cost"]
+                    best_solution = result
+                # 聚合模式展开后的精修可能进一步降低成本
+                if result["total_cost"] < running_best:
+                    running_best = result["total_cost"]
+                    emit("incumbent", hub_count=hub_count, active_hubs=result["active_hubs"], total_cost=running_best)
+
+            skipped = count_subsets - count_evaluated
+            subsets_remaining -= skipped
+            emit("count_finished", hub_count=hub_count,
+                 count_best_cost=result["total_cost"] if result is not None else None, skipped=skipped, pruned=False)
+
+            if checkpoint is not None:
+                checkpoint.maybe_save(subsets_done, lambda: snapshot(None))
+
+        if checkpoint is not None:
+            checkpoint.complete()
+        if stop_reason is None and budget is not None and budget.expired():
+            stop_reason = "time_limit"
+        if incumbent is not None:
+            incumbent.finish(stop_reason)
+        emit("finished", stop_reason=stop_reason)
 
         if best_solution is None:
+            if stop_reason is not None:
+                raise RuntimeError("时间预算内未能找到可行方案")
             raise RuntimeError("在给定参数下未能找到可行方案")
 
+        evaluated_solutions.sort(key=lambda result: count_order[result["hub_count"]])
+
         return best_solution, evaluated_solutions
 
     @staticmethod
@@ -95,70 +335,358 @@ class KMeansSimulatedAnnealingOptimizer:
         cooling_rate: float,
         iterations: int,
         kmeans_restarts: int,
+        candidate_neighbors: Optional[int] = None,
+        use_bounds: bool = False,
+        incumbent_cost: float = float("inf"),
+        cost_model: Optional[HubCostModel] = None,
+        sa_chains: int = 1,
+        capacitated: bool = True,
+        aggregation: Optional[StoreAggregation] = None,
+        clusterings: Optional[Dict[int, List[Tuple[Dict[int, List[str]], List[List[float]]]]]] = None,
+        warm_start: Optional[Dict] = None,
+        telemetry: Optional[TelemetrySink] = None,
+        resume_progress: Optional[Dict] = None,
+        on_subset: Optional[Callable[[Dict, Tuple[str, ...], Optional[float]], None]] = None,
+        budget: Optional[SearchBudget] = None,
+        incumbent: Optional[Incumbent] = None,
     ) -> Optional[Dict]:
+        # resume_progress 为检查点中该数量的进度：从其 position 处的组合继续；
+        # on_subset 在每个组合评估完成后以同样结构的进度、该组合及其成本（不可行时为 None）调用，
+        # 用于保存检查点、上报进度与响应取消
         best_for_count = None
         best_cost = float("inf")
+        start_position = 0
+        if resume_progress is not None:
+            best_for_count = resume_progress["best_for_count"]
+            best_cost = resume_progress["best_cost"]
+            start_position = resume_progress["position"]
+
+        subsets = combinations(candidate_hubs, hub_count)
+        if cost_model is None:
+            cost_model = HubCostModel.for_network(network, suppliers, unit_transport_cost)
+
+        subset_bounds = None
+        if use_bounds:
+            # 按下界从小到大评估组合，下界不低于当前最优成本时其后的组合都可跳过
+            ranked = sorted(
+                (KMeansSimulatedAnnealingOptimizer._subset_lower_bound(cost_model, subset), subset)
+                for subset in subsets
+            )
+            subset_bounds = [bound for bound, _ in ranked]
+            subsets = [subset for _, subset in ranked]
 
-        for hub_subset in combinations(candidate_hubs, hub_count):
-            initial_assignments = None
-            initial_cost = float("inf")
+        for position, hub_subset in enumerate(subsets):
+            if position < start_position:
+                continue
+            if budget is not None and budget.expired():
+                break
+            if subset_bounds is not None and subset_bounds[position] >= min(best_cost, incumbent_cost):
+                break
 
-            for _ in range(max(1, kmeans_restarts)):
-                cluster_result = KMeansSimulatedAnnealingOptimizer._cluster_stores(
-                    network,
-                    hub_count,
+            # 中转点设置了容量时，改为求解容量约束下的分配（结果已校验负载），替代 K-means 匹配 + 模拟退火
+            subset_cost_breakdown = None
+            if capacitated and cost_model.is_capacitated(hub_subset):
+                # 精确求解回退不受逐步检查的预算约束，以剩余时间作为其求解上限
+                subset_assignments = solve_capacitated_assignment(
+                    cost_model, hub_subset, time_limit=budget.remaining() if budget is not None else None
                 )
-
-                if cluster_result is None:
-                    continue
-
-                clusters, centroids = cluster_result
-
-                assignments = KMeansSimulatedAnnealingOptimizer._match_clusters_to_hubs(
+                if subset_assignments is not None:
+                    subset_cost_breakdown = cost_model.breakdown(hub_subset, subset_assignments)
+            else:
+                subset_result = KMeansSimulatedAnnealingOptimizer._anneal_subset(
                     network,
-                    clusters,
-                    centroids,
                     hub_subset,
+                    suppliers,
+                    unit_transport_cost,
+                    initial_temp,
+                    cooling_rate,
+                    iterations,
+                    kmeans_restarts,
+                    candidate_neighbors,
+                    cost_model,
+                    sa_chains,
+                    aggregation,
+                    clusterings,
+                    warm_start,
+                    telemetry,
+                    budget,
                 )
+                if subset_result is not None:
+                    subset_assignments, subset_cost_breakdown = subset_result
 
-                cost_breakdown = KMeansSimulatedAnnealingOptimizer._calculate_total_cost(
-                    network,
+            if subset_cost_breakdown is not None and subset_cost_breakdown["total_cost"] < best_cost:
+                best_cost = subset_cost_breakdown["total_cost"]
+                best_for_count = {
+                    "hub_count": hub_count,
+                    "active_hubs": list(hub_subset),
+                    "store_assignments": subset_assignments,
+                    "suppliers": suppliers,
+                    "unit_transport_cost": unit_transport_cost,
+                    **subset_cost_breakdown,
+                }
+                if incumbent is not None:
+                    incumbent.offer(best_cost, best_for_count)
+
+            if on_subset is not None:
+                on_subset(
+                    {"position": position + 1, "best_for_count": best_for_count, "best_cost": best_cost},
                     hub_subset,
-                    assignments,
-                    suppliers,
-                    unit_transport_cost,
+                    subset_cost_breakdown["total_cost"] if subset_cost_breakdown is not None else None,
                 )
 
-                if cost_breakdown["total_cost"] < initial_cost:
-                    initial_cost = cost_breakdown["total_cost"]
-                    initial_assignments = assignments
+        # 聚合实例上选出的方案展开到门店后，以单个门店为粒度再退火精修
+        if (aggregation is not None and best_for_count is not None
+                and not (capacitated and cost_model.is_capacitated(best_for_count["active_hubs"]))):
+            refined_assignments, refined_breakdown = KMeansSimulatedAnnealingOptimizer._simulated_annealing(
+                network,
+                best_for_count["active_hubs"],
+                best_for_count["store_assignments"],
+                suppliers,
+                unit_transport_cost,
+                initial_temp,
+                cooling_rate,
+                iterations,
+                candidate_neighbors,
+                cost_model=cost_model,
+                telemetry=telemetry,
+                budget=budget,
+            )
+            if refined_breakdown["total_cost"] < best_for_count["total_cost"]:
+                # 构造新字典而不原地修改：best_for_count 可能已交给 incumbent
+                best_for_count = {**best_for_count, "store_assignments": refined_assignments, **refined_breakdown}
+                if incumbent is not None:
+                    incumbent.offer(best_for_count["total_cost"], best_for_count)
 
-            if initial_assignments is None:
-                continue
+        return best_for_count
+
+    @staticmethod
+    def _anneal_subset(
+        network: LogisticsNetwork,
+        hub_subset: Tuple[str, ...],
+        suppliers: List[str],
+        unit_transport_cost: float,
+        initial_temp: float,
+        cooling_rate: float,
+        iterations: int,
+        kmeans_restarts: int,
+        candidate_neighbors: Optional[int],
+        cost_model: HubCostModel,
+        sa_chains: int = 1,
+        aggregation: Optional[StoreAggregation] = None,
+        clusterings: Optional[Dict[int, List[Tuple[Dict[int, List[str]], List[List[float]]]]]] = None,
+        warm_start: Optional[Dict] = None,
+        telemetry: Optional[TelemetrySink] = None,
+        budget: Optional[SearchBudget] = None,
+    ) -> Optional[Tuple[Dict[str, str], Dict[str, float]]]:
+        if aggregation is not None:
+            return KMeansSimulatedAnnealingOptimizer._anneal_aggregated_subset(
+                network,
+                hub_subset,
+                initial_temp,
+                cooling_rate,
+                iterations,
+                kmeans_restarts,
+                cost_model,
+                aggregation,
+                sa_chains,
+                candidate_neighbors,
+                telemetry,
+                budget,
+            )
 
-            sa_assignments, sa_cost_breakdown = KMeansSimulatedAnnealingOptimizer._simulated_annealing(
+        initial_assignments = None
+        initial_cost = float("inf")
+        seed_assignments = []
+
+        hub_count = len(hub_subset)
+        if clusterings is None or hub_count not in clusterings:
+            computed = KMeansSimulatedAnnealingOptimizer.precompute_clusterings(network, [hub_count], kmeans_restarts)
+            if clusterings is not None:
+                clusterings.update(computed)
+            cluster_results = computed[hub_count]
+        else:
+            cluster_results = clusterings[hub_count]
+
+        for clusters, centroids in cluster_results:
+            assignments = KMeansSimulatedAnnealingOptimizer._match_clusters_to_hubs(
                 network,
+                clusters,
+                centroids,
                 hub_subset,
-                initial_assignments,
+            )
+
+            cost_breakdown = KMeansSimulatedAnnealingOptimizer._calculate_total_cost(
+                network,
+                hub_subset,
+                assignments,
                 suppliers,
                 unit_transport_cost,
+                cost_model,
+            )
+
+            seed_assignments.append(assignments)
+
+            if cost_breakdown["total_cost"] < initial_cost:
+                initial_cost = cost_breakdown["total_cost"]
+                initial_assignments = assignments
+
+        if initial_assignments is None:
+            return None
+
+        warm_assignments = KMeansSimulatedAnnealingOptimizer._warm_start_assignments(
+            warm_start, hub_subset, initial_assignments
+        )
+        if warm_assignments is not None:
+            seed_assignments.insert(0, warm_assignments)
+            warm_cost = cost_model.breakdown(hub_subset, warm_assignments)["total_cost"]
+            if warm_cost <= initial_cost:
+                initial_cost = warm_cost
+                initial_assignments = warm_assignments
+
+        if sa_chains > 1:
+            return anneal_hub_subset(
+                cost_model,
+                hub_subset,
+                seed_assignments,
+                sa_chains,
                 initial_temp,
                 cooling_rate,
                 iterations,
+                candidate_neighbors=candidate_neighbors,
+                budget=budget,
+                telemetry=telemetry,
             )
 
-            if sa_cost_breakdown["total_cost"] < best_cost:
-                best_cost = sa_cost_breakdown["total_cost"]
-                best_for_count = {
-                    "hub_count": hub_count,
-                    "active_hubs": list(hub_subset),
-                    "store_assignments": sa_assignments,
-                    "suppliers": suppliers,
-                    "unit_transport_cost": unit_transport_cost,
-                    **sa_cost_breakdown,
-                }
+        return KMeansSimulatedAnnealingOptimizer._simulated_annealing(
+            network,
+            hub_subset,
+            initial_assignments,
+            suppliers,
+            unit_transport_cost,
+            initial_temp,
+            cooling_rate,
+            iterations,
+            candidate_neighbors,
+            cost_model=cost_model,
+            telemetry=telemetry,
+            budget=budget,
+        )
 
-        return best_for_count
+    @staticmethod
+    def precompute_clusterings(
+        network: LogisticsNetwork,
+        hub_counts: Iterable[int],
+        kmeans_restarts: int = 5,
+    ) -> Dict[int, List[Tuple[Dict[int, List[str]], List[List[float]]]]]:
+        """为每个中转点数量预先计算 kmeans_restarts 次门店聚类，返回 {数量: [(聚类, 聚类中心), ...]}"""
+        clusterings = {}
+        for hub_count in hub_counts:
+            results = [
+                KMeansSimulatedAnnealingOptimizer._cluster_stores(network, hub_count)
+                for _ in range(max(1, kmeans_restarts))
+            ]
+            clusterings[hub_count] = [result for result in results if result is not None]
+        return clusterings
+
+    @staticmethod
+    def _warm_start_assignments(
+        warm_start: Optional[Dict],
+        hub_subset: Tuple[str, ...],
+        reference_assignments: Dict[str, str],
+    ) -> Optional[Dict[str, str]]:
+        # 只有中转点组合相同且覆盖同一批门店时，才能直接沿用此前方案的分配
+        if not warm_start or set(warm_start.get("active_hubs", ())) != set(hub_subset):
+            return None
+        assignments = warm_start.get("store_assignments") or {}
+        if assignments.keys() != reference_assignments.keys():
+            return None
+        return dict(assignments)
+
+    @staticmethod
+    def _anneal_aggregated_subset(
+        network: LogisticsNetwork,
+        hub_subset: Tuple[str, ...],
+        initial_temp: float,
+        cooling_rate: float,
+        iterations: int,
+        kmeans_restarts: int,
+        cost_model: HubCostModel,
+        aggregation: StoreAggregation,
+        sa_chains: int = 1,
+        candidate_neighbors: Optional[int] = None,
+        telemetry: Optional[TelemetrySink] = None,
+        budget: Optional[SearchBudget] = None,
+    ) -> Tuple[Dict[str, str], Dict[str, float]]:
+        """在聚合单元上执行 K-means 匹配与退火，返回展开到门店的分配及成本明细"""
+        hub_subset = tuple(hub_subset)
+        position = {hub_id: idx for idx, hub_id in enumerate(hub_subset)}
+        cell_costs = aggregation.hub_costs(cost_model)[cost_model.hub_indices(hub_subset)]
+
+        seeds = []
+        for _ in range(max(1, kmeans_restarts)):
+            clusters, centroids = network.cluster_entities(
+                aggregation.cell_ids,
+                len(hub_subset),
+                weights=aggregation.counts,
+                points=aggregation.coordinates,
+            )
+            cell_assignments = KMeansSimulatedAnnealingOptimizer._match_clusters_to_hubs(
+                network,
+                clusters,
+                centroids.tolist(),
+                hub_subset,
+            )
+            seeds.append([position[cell_assignments[cell_id]] for cell_id in aggregation.cell_ids])
+
+        # 成本最低的种子排在最前，链数少于种子数时优先使用
+        seeds = np.array(seeds, dtype=np.intp)
+        seed_costs = cell_costs[seeds, np.arange(len(aggregation))].sum(axis=1)
+        seeds = seeds[np.argsort(seed_costs)]
+
+        # 预算、近邻与遥测在聚合单元上同样生效，遥测记录的是聚合实例上的成本
+        anneal_options = {
+            "neighbors": nearest_hub_positions(cell_costs, candidate_neighbors),
+            "budget": budget,
+            "telemetry": telemetry,
+            "telemetry_label": ",".join(hub_subset),
+            "cost_offset": cost_model.fixed_cost(cost_model.hub_indices(hub_subset)),
+        }
+        if sa_chains > 1:
+            best_assignments, best_costs = batched_simulated_annealing(
+                cell_costs,
+                seeds[np.arange(sa_chains) % len(seeds)],
+                initial_temp,
+                cooling_rate,
+                iterations,
+                **anneal_options,
+            )
+            best_assignment = best_assignments[int(np.argmin(best_costs))]
+        else:
+            best_assignment, _ = anneal_assignment_array(
+                cell_costs,
+                seeds[0],
+                initial_temp,
+                cooling_rate,
+                iterations,
+                **anneal_options,
+            )
+
+        store_assignments = aggregation.expand({
+            cell_id: hub_subset[hub_pos]
+            for cell_id, hub_pos in zip(aggregation.cell_ids, best_assignment)
+        })
+        return store_assignments, cost_model.breakdown(hub_subset, store_assignments)
+
+    @staticmethod
+    def _hub_count_lower_bound(cost_model: HubCostModel, hub_count: int) -> float:
+        # 任意 hub_count 个中转点：固定成本不少于最小的 hub_count 个之和，门店成本不少于各自到最近候选点的成本
+        return float(np.sort(cost_model.fixed_costs)[:hub_count].sum() + cost_model.store_costs.min(axis=0).sum())
+
+    @staticmethod
+    def _subset_lower_bound(cost_model: HubCostModel, hub_subset: Tuple[str, ...]) -> float:
+        # 固定组合：固定成本确定，门店成本不少于各自到组合内最近中转点的成本
+        indices = cost_model.hub_indices(hub_subset)
+        return float(cost_model.fixed_costs[indices].sum() + cost_model.store_costs[indices].min(axis=0).sum())
 
     @staticmethod
     def _cluster_stores(network: LogisticsNetwork, k: int) -> Optional[Tuple[Dict[int, List[str]], List[List[float]]]]:
@@ -175,6 +703,7 @@ class KMeansSimulatedAnnealingOptimizer:
         return clusters, centroids.tolist()
 
     @staticmethod
+    @profiled("cluster_matching")
     def _match_clusters_to_hubs(
         network: LogisticsNetwork,
         clusters: Dict[int, List[str]],
@@ -208,6 +737,7 @@ class KMeansSimulatedAnnealingOptimizer:
         return best_mapping
 
     @staticmethod
+    @profiled("hub_sa")
     def _simulated_annealing(
         network: LogisticsNetwork,
         hubs: Tuple[str, ...],
@@ -217,67 +747,109 @@ class KMeansSimulatedAnnealingOptimizer:
         initial_temp: float,
         cooling_rate: float,
         iterations: int,
+        candidate_neighbors: Optional[int] = None,
+        movable_stores: Optional[Iterable[str]] = None,
+        cost_model: Optional[HubCostModel] = None,
+        telemetry: Optional[TelemetrySink] = None,
+        budget: Optional[SearchBudget] = None,
     ) -> Tuple[Dict[str, str], Dict[str, float]]:
         hubs = tuple(hubs)
-        current_assignments = copy.deepcopy(initial_assignments)
-        best_assignments = copy.deepcopy(current_assignments)
+        if cost_model is None:
+            cost_model = HubCostModel.for_network(
+                network, suppliers, unit_transport_cost, hubs=hubs, stores=initial_assignments.keys())
+        current_assignments = dict(initial_assignments)
+        best_assignments = dict(current_assignments)
 
-        current_cost_breakdown = KMeansSimulatedAnnealingOptimizer._calculate_total_cost(
-            network,
-            hubs,
-            current_assignments,
-            suppliers,
-            unit_transport_cost,
-        )
-        current_cost = current_cost_breakdown["total_cost"]
-        best_cost_breakdown = dict(current_cost_breakdown)
+        current_cost = cost_model.breakdown(hubs, current_assignments)["total_cost"]
+        best_cost = current_cost
 
         temperature = initial_temp if initial_temp > 0 else 1e-6
         store_ids = list(current_assignments.keys())
+        # 局部退火：只在 movable_stores 中挑选迁移的门店
+        if movable_stores is not None:
+            movable = set(movable_stores)
+            store_ids = [store_id for store_id in store_ids if store_id in movable]
+
+        # 通过空间索引预先求出每个门店的近邻中转点，作为迁移候选
+        nearby_hubs = None
+        if candidate_neighbors and store_ids and len(hubs) > 1:
+            nearby_hubs = network.nearest_locations(
+                store_ids,
+                hubs,
+                k=min(candidate_neighbors + 1, len(hubs)),
+            )
+
+        # 每次迁移只改变一个门店的运输成本，由成本模型直接给出成本差，无需重算总成本
+        hub_loads = Counter(current_assignments.values())
+        proposed = accepted = infeasible = 0
+
+        # 遥测：采样判断在局部变量上完成，未传入时循环内只多一次整数判断
+        hub_label = ",".join(hubs)
+        sample_every = telemetry.sample_every if telemetry is not None else 0
+        if telemetry is not None:
+            telemetry.record("hub_sa", 0, force=True, hubs=hub_label, current_cost=current_cost,
+                             best_cost=best_cost, temperature=temperature)
 
-        for _ in range(iterations):
+        last_improvement = 0
+        last_improvement_time = time.monotonic() if budget is not None else 0.0
+        early_stops = 0
+
+        for iteration in range(1, iterations + 1):
             if not store_ids:
                 break
+            if budget is not None and budget.stop_reason(iteration - 1, last_improvement, last_improvement_time):
+                early_stops = 1
+                break
 
             store_id = random.choice(store_ids)
             current_hub = current_assignments[store_id]
-            candidate_hubs = [hub for hub in hubs if hub != current_hub]
+            neighborhood = nearby_hubs[store_id] if nearby_hubs is not None else hubs
+            candidate_hubs = [hub for hub in neighborhood if hub != current_hub]
+            proposed += 1
 
-            if not candidate_hubs:
+            # 没有可迁移的中转点，或会移走当前中转点的最后一个门店
+            if not candidate_hubs or hub_loads[current_hub] <= 1:
+                infeasible += 1
                 continue
 
-            # 确保不会将当前中转点的最后一个门店移走
-            stores_served_by_current = sum(1 for h in current_assignments.values() if h == current_hub)
-            if stores_served_by_current <= 1:
-                continue
-
-            new_assignments = copy.deepcopy(current_assignments)
-            new_assignments[store_id] = random.choice(candidate_hubs)
-
-            new_cost_breakdown = KMeansSimulatedAnnealingOptimizer._calculate_total_cost(
-                network,
-                hubs,
-                new_assignments,
-                suppliers,
-                unit_transport_cost,
-            )
-            new_cost = new_cost_breakdown["total_cost"]
+            new_hub = random.choice(candidate_hubs)
+            improved = False
+            new_cost = current_cost + float(cost_model.move_delta(
+                cost_model.store_index[store_id],
+                cost_model.hub_index[current_hub],
+                cost_model.hub_index[new_hub],
+            ))
 
             if (new_cost < current_cost or
                     KMeansSimulatedAnnealingOptimizer._accept_worse(current_cost, new_cost, temperature)):
-                current_assignments = new_assignments
+                current_assignments[store_id] = new_hub
+                hub_loads[current_hub] -= 1
+                hub_loads[new_hub] += 1
                 current_cost = new_cost
-                current_cost_breakdown = new_cost_breakdown
+                accepted += 1
+
+                if new_cost < best_cost:
+                    best_assignments = dict(current_assignments)
+                    best_cost = new_cost
+                    improved = True
+                    if budget is not None:
+                        last_improvement = iteration
+                        last_improvement_time = time.monotonic()
 
-                if new_cost < best_cost_breakdown["total_cost"]:
-                    best_assignments = copy.deepcopy(new_assignments)
-                    best_cost_breakdown = new_cost_breakdown
+            # 按采样率记录收敛数据，最优解改进时总是记录
+            if sample_every and (improved or iteration % sample_every == 0):
+                telemetry.record("hub_sa", iteration, force=True, hubs=hub_label, current_cost=current_cost,
+                                 best_cost=best_cost, temperature=temperature)
 
             temperature *= cooling_rate
             if temperature < 1e-6:
                 temperature = 1e-6
 
-        return best_assignments, best_cost_breakdown
+        count("hub_sa.moves_proposed", proposed)
+        count("hub_sa.moves_accepted", accepted)
+        count("hub_sa.moves_infeasible", infeasible)
+        count("hub_sa.early_stops", early_stops)
+        return best_assignments, cost_model.breakdown(hubs, best_assignments)
 
     @staticmethod
     def _accept_worse(current_cost: float, new_cost: float, temperature: float) -> bool:
@@ -294,28 +866,18 @@ class KMeansSimulatedAnnealingOptimizer:
         store_assignments: Dict[str, str],
         suppliers: List[str],
         unit_transport_cost: float,
+        cost_model: Optional[HubCostModel] = None,
     ) -> Dict[str, float]:
         active_hubs = list(hubs)
 
-        build_cost = 0.0
-        for hub_id in active_hubs:
-            location = network.locations[hub_id]
-            build_cost += getattr(location, "build_cost", 0.0)
-
-        supplier_cost = 0.0
-        for hub_id in active_hubs:
-            for supplier_id in suppliers:
-                supplier_cost += unit_transport_cost * network._ensure_distance(supplier_id, hub_id)
-
-        store_cost = 0.0
-        for store_id, hub_id in store_assignments.items():
-            store_cost += unit_transport_cost * network._ensure_distance(hub_id, store_id)
-
-        total_cost = build_cost + supplier_cost + store_cost
+        # 固定成本与门店成本均从预计算数组中按下标批量取值
+        if cost_model is None:
+            cost_model = HubCostModel.for_network(
+                network,
+                suppliers,
+                unit_transport_cost,
+                hubs=active_hubs,
+                stores=store_assignments.keys(),
+            )
 
-        return {
-            "total_cost": total_cost,
-            "build_cost": build_cost,
-            "supplier_cost": supplier_cost,
-            "store_cost": store_cost,
-        }
\ No newline at end of file
+        return cost_model.breakdown(active_hubs, store_assignments)
@@ -0,0 +1,216 @@
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Union
+
+from network_model import LogisticsNetwork
+from optimizers.base_optimizer import BaseOptimizer, register_optimizer
+from optimizers.cost_model import HubCostModel
+
+if TYPE_CHECKING:
+    import pulp
+
+
+@register_optimizer("milp", "MILP精确求解")
+class MILPHubOptimizer(BaseOptimizer):
+    """基于 PuLP/CBC 的中转点选址精确 MILP 求解，成本模型与 K-means+SA 一致"""
+
+    supports_warm_start = True
+    menu_parameters = (
+        ("time_limit", "求解时间上限 (秒)", float, 60.0),
+        ("warm_start", "热启动 (kmeans_sa / none)", str, "kmeans_sa"),
+    )
+
+    @staticmethod
+    def optimize(
+        network: LogisticsNetwork,
+        hub_counts: Optional[Iterable[int]] = None,
+        unit_transport_cost: float = 1.0,
+        capacitated: bool = True,
+        time_limit: float = 60.0,
+        warm_start: Optional[Union[Dict, str]] = None,
+        msg: bool = False,
+    ):
+        """求解设施选址 MILP，返回最佳方案及方案列表（与 KMeansSimulatedAnnealingOptimizer.optimize 结构一致）
+
+        warm_start 传入 K-means+SA 的 best_solution 作为初始可行解；为 "kmeans_sa" 时先以默认参数运行 K-means+SA
+        得到该方案（"none" 表示不热启动），结果额外包含其成本 warm_start_cost 与 MILP 相对它的改进比例 warm_start_gap。
+        结果额外包含根节点 LP 松弛下界 lp_bound、相对该下界的间隙 lp_gap 与是否证明最优 proven_optimal。
+        CBC 在时间上限内提前停止时，真实的最优性间隙不超过 lp_gap（CBC 分支定界得到的更紧下界不对外报告）。
+        time_limit 同时约束 LP 松弛与 MILP 两次求解（热启动的 K-means+SA 不计入），solve_time 为两者的总耗时。
+        capacitated 为 True 时对设置了容量的中转点施加容量约束，False 时忽略容量。
+        """
+        # PuLP 只在使用精确求解时才加载，注册优化器不依赖它
+        import pulp
+
+        candidate_hubs, suppliers, stores, hub_counts, cost_model = MILPHubOptimizer._prepare(
+            network, hub_counts, unit_transport_cost
+        )
+        allowed_counts = sorted(set(hub_counts))
+
+        capacities = {
+            hub_id: network.locations[hub_id].capacity
+            for hub_id in candidate_hubs
+            if capacitated and network.locations[hub_id].capacity is not None
+        }
+
+        problem, open_vars, assign_vars = MILPHubOptimizer._build_problem(
+            network,
+            candidate_hubs,
+            stores,
+            allowed_counts,
+            cost_model,
+            capacities,
+        )
+
+        if warm_start == "kmeans_sa":
+            from optimizers.kmeans_sa_optimizer import KMeansSimulatedAnnealingOptimizer
+
+            warm_start, _ = KMeansSimulatedAnnealingOptimizer.optimize(
+                network, hub_counts=hub_counts, unit_transport_cost=unit_transport_cost, capacitated=capacitated
+            )
+        elif isinstance(warm_start, str):
+            if warm_start.lower() not in ("", "none"):
+                raise ValueError(f"不支持的热启动方式: {warm_start}（可选 kmeans_sa 或 none）")
+            warm_start = None
+
+        start_time = time.time()
+        lp_bound = MILPHubOptimizer._solve_lp_relaxation(problem, msg, time_limit)
+
+        if warm_start:
+            MILPHubOptimizer._apply_warm_start(warm_start, open_vars, assign_vars)
+
+        # LP 松弛已用去的时间从上限中扣除，至少保留1秒供 CBC 从热启动解或启发式得到整数解
+        remaining = max(time_limit - (time.time() - start_time), 1.0)
+        solver = pulp.PULP_CBC_CMD(msg=msg, timeLimit=remaining, warmStart=bool(warm_start))
+        problem.solve(solver)
+        solve_time = time.time() - start_time
+
+        if problem.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+            raise RuntimeError(f"MILP 未找到可行方案: {pulp.LpStatus[problem.status]}")
+
+        active_hubs = [hub_id for hub_id in candidate_hubs if (open_vars[hub_id].value() or 0) > 0.5]
+        store_assignments = {
+            store_id: max(active_hubs, key=lambda hub_id: assign_vars[hub_id][store_id].value() or 0)
+            for store_id in stores
+        }
+
+        best_solution = MILPHubOptimizer._build_solution(
+            cost_model, active_hubs, store_assignments, suppliers, unit_transport_cost
+        )
+
+        proven_optimal = problem.sol_status == pulp.LpSolutionOptimal
+        total_cost = best_solution["total_cost"]
+        lp_gap = (total_cost - lp_bound) / total_cost if total_cost > 0 else 0.0
+
+        best_solution.update({
+            "lp_bound": lp_bound,
+            "lp_gap": max(lp_gap, 0.0),
+            "proven_optimal": proven_optimal,
+            "solver_status": pulp.LpStatus[problem.status],
+            "solve_time": solve_time,
+        })
+        warm_start_cost = warm_start.get("total_cost") if warm_start else None
+        if warm_start_cost is not None:
+            best_solution["warm_start_cost"] = warm_start_cost
+            best_solution["warm_start_gap"] = (
+                max(warm_start_cost - total_cost, 0.0) / warm_start_cost if warm_start_cost > 0 else 0.0
+            )
+
+        return best_solution, [best_solution]
+
+    @staticmethod
+    def _build_problem(
+        network: LogisticsNetwork,
+        candidate_hubs: List[str],
+        stores: List[str],
+        allowed_counts: List[int],
+        cost_model: HubCostModel,
+        capacities: Dict[str, Optional[float]],
+    ):
+        import pulp
+
+        hub_idx = cost_model.hub_indices(candidate_hubs)
+        store_idx = cost_model.store_indices(stores)
+
+        problem = pulp.LpProblem("hub_location", pulp.LpMinimize)
+        open_vars = {
+            hub_id: pulp.LpVariable(f"open_{h_idx}", cat=pulp.LpBinary)
+            for h_idx, hub_id in enumerate(candidate_hubs)
+        }
+        # 无容量约束时最优分配天然为整数，分配变量可取连续值以加快求解
+        assign_category = pulp.LpBinary if capacities else pulp.LpContinuous
+        assign_vars = {
+            hub_id: {
+                store_id: pulp.LpVariable(f"assign_{h_idx}_{s_idx}", lowBound=0, upBound=1, cat=assign_category)
+                for s_idx, store_id in enumerate(stores)
+            }
+            for h_idx, hub_id in enumerate(candidate_hubs)
+        }
+
+        problem += (
+            # 启用中转点的固定成本（建设 + 供应商运输）与门店运输成本均取自共享成本模型
+            pulp.lpSum(float(cost_model.fixed_costs[h_idx]) * open_vars[hub_id]
+                       for h_idx, hub_id in zip(hub_idx, candidate_hubs))
+            + pulp.lpSum(
+                float(cost_model.store_costs[h_idx, s_idx]) * assign_vars[hub_id][store_id]
+                for h_idx, hub_id in zip(hub_idx, candidate_hubs)
+                for s_idx, store_id in zip(store_idx, stores)
+            )
+        )
+
+        for store_id in stores:
+            problem += pulp.lpSum(assign_vars[hub_id][store_id] for hub_id in candidate_hubs) == 1
+
+        for hub_id in candidate_hubs:
+            for store_id in stores:
+                problem += assign_vars[hub_id][store_id] <= open_vars[hub_id]
+            # 与 SA 一致：启用的中转点至少服务一家门店
+            problem += pulp.lpSum(assign_vars[hub_id].values()) >= open_vars[hub_id]
+
+            capacity = capacities.get(hub_id)
+            if capacity is not None:
+                problem += pulp.lpSum(
+                    MILPHubOptimizer._store_demand(network, store_id) * assign_vars[hub_id][store_id]
+                    for store_id in stores
+                ) <= capacity * open_vars[hub_id]
+
+        open_count = pulp.lpSum(open_vars.values())
+        if allowed_counts == list(range(allowed_counts[0], allowed_counts[-1] + 1)):
+            problem += open_count >= allowed_counts[0]
+            problem += open_count <= allowed_counts[-1]
+        else:
+            count_vars = {count: pulp.LpVariable(f"count_{count}", cat=pulp.LpBinary) for count in allowed_counts}
+            problem += pulp.lpSum(count_vars.values()) == 1
+            problem += open_count == pulp.lpSum(count * var for count, var in count_vars.items())
+
+        return problem, open_vars, assign_vars
+
+    @staticmethod
+    def _solve_lp_relaxation(problem: "pulp.LpProblem", msg: bool, time_limit: float) -> float:
+        import pulp
+
+        # 临时将整数变量放松为连续变量求 LP 下界，求解后恢复原类型
+        original_categories = {variable.name: variable.cat for variable in problem.variables()}
+        for variable in problem.variables():
+            variable.cat = pulp.LpContinuous
+        try:
+            problem.solve(pulp.PULP_CBC_CMD(msg=msg, timeLimit=time_limit))
+            if problem.status != pulp.LpStatusOptimal:
+                return float("-inf")
+            return float(pulp.value(problem.objective))
+        finally:
+            for variable in problem.variables():
+                variable.cat = original_categories[variable.name]
+
+    @staticmethod
+    def _apply_warm_start(warm_start: Dict, open_vars: Dict, assign_vars: Dict) -> None:
+        active = set(warm_start.get("active_hubs", []))
+        assignments = warm_start.get("store_assignments", {})
+        for hub_id, variable in open_vars.items():
+            variable.setInitialValue(1 if hub_id in active else 0)
+            for store_id, assign_var in assign_vars[hub_id].items():
+                assign_var.setInitialValue(1 if assignments.get(store_id) == hub_id else 0)
+
+    @staticmethod
+    def _store_demand(network: LogisticsNetwork, store_id: str) -> float:
+        demand = getattr(network.locations[store_id], "capacity", None)
+        return float(demand) if demand is not None else 0.0
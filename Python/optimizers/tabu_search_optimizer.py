@@ -0,0 +1,323 @@
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from network_model import LogisticsNetwork
+from optimizers.base_optimizer import BaseOptimizer, register_optimizer
+from optimizers.capacitated_assignment import solve_capacitated_assignment
+
+
+@register_optimizer("tabu", "禁忌搜索")
+class TabuSearchOptimizer(BaseOptimizer):
+    """禁忌搜索的中转点选址：在启用中转点集合上执行开启/关闭/交换移动，门店分配到最近的启用中转点"""
+
+    supports_warm_start = True
+    menu_parameters = (
+        ("max_iterations", "最大迭代次数", int, 500),
+        ("time_limit", "时间预算 (秒)", float, 30.0),
+    )
+
+    @staticmethod
+    def optimize(
+        network: LogisticsNetwork,
+        hub_counts: Optional[Iterable[int]] = None,
+        unit_transport_cost: float = 1.0,
+        max_iterations: int = 500,
+        tabu_tenure: Optional[int] = None,
+        time_limit: Optional[float] = None,
+        stagnation_limit: int = 100,
+        initial_hubs: Optional[Iterable[str]] = None,
+        capacitated: bool = True,
+        candidate_neighbors: Optional[int] = None,
+        warm_start: Optional[Dict] = None,
+    ):
+        """执行优化，返回最佳方案及各中转点数量下的最佳方案列表（与 KMeansSimulatedAnnealingOptimizer.optimize 结构一致）
+
+        每个门店维护最近与次近的启用中转点，所有移动的成本差都由这两张表向量化计算。
+        candidate_neighbors 指定时，只考虑每个门店最近的若干个候选中转点带来的节省（候选点很多时以近似换速度）。
+        刚被开启或关闭的中转点在 tabu_tenure 轮内不可再次变动，除非移动后的成本优于历史最优（特赦准则）。
+        time_limit 为搜索的时间预算（秒）；连续 stagnation_limit 轮没有改进时提前结束。
+        warm_start 传入此前的 best_solution 且未指定 initial_hubs 时，以其启用的中转点作为初始集合。
+        搜索按无容量模型估算成本；capacitated 为 True 且中转点设置了容量时，只接受总容量不低于总需求的集合，
+        各数量下的最佳组合再在容量约束下重新分配门店（精确求解回退以 time_limit 的剩余时间为上限），
+        找不到不超载的分配时该数量不计入结果；False 时忽略容量。
+        """
+        candidate_hubs, suppliers, stores, hub_counts, cost_model = TabuSearchOptimizer._prepare(
+            network, hub_counts, unit_transport_cost
+        )
+        min_count, max_count = min(hub_counts), max(hub_counts)
+        allowed_counts = set(hub_counts)
+
+        hub_idx = cost_model.hub_indices(candidate_hubs)
+        store_idx = cost_model.store_indices(stores)
+        fixed_costs = cost_model.fixed_costs[hub_idx]
+        store_costs = cost_model.store_costs[np.ix_(hub_idx, store_idx)]
+
+        use_capacity = capacitated and cost_model.is_capacitated(candidate_hubs)
+        if use_capacity:
+            hub_capacities = cost_model.hub_capacities[hub_idx]
+            total_demand = float(cost_model.store_demands[store_idx].sum())
+        else:
+            hub_capacities = np.full(len(candidate_hubs), np.inf)
+            total_demand = 0.0
+
+        # 每个门店按成本升序排列的近邻候选中转点，形状为 (门店数, 近邻数)
+        neighbor_count = len(candidate_hubs)
+        if candidate_neighbors is not None:
+            neighbor_count = max(1, min(candidate_neighbors, len(candidate_hubs)))
+        if neighbor_count == len(candidate_hubs):
+            neighbor_idx = np.argsort(store_costs.T, axis=1)
+        else:
+            neighbor_idx = np.argpartition(store_costs.T, neighbor_count - 1, axis=1)[:, :neighbor_count]
+        neighbor_costs = np.take_along_axis(store_costs.T, neighbor_idx, axis=1)
+
+        if tabu_tenure is None:
+            tabu_tenure = max(1, min(7, len(candidate_hubs) // 3))
+
+        if initial_hubs is None and warm_start:
+            warm_hubs = [hub_id for hub_id in warm_start.get("active_hubs", ()) if hub_id in cost_model.hub_index]
+            if min_count <= len(warm_hubs) <= max_count:
+                initial_hubs = warm_hubs
+
+        if initial_hubs is not None:
+            position = {hub_id: idx for idx, hub_id in enumerate(candidate_hubs)}
+            unknown = [hub_id for hub_id in initial_hubs if hub_id not in position]
+            if unknown:
+                raise ValueError(f"initial_hubs 中包含非候选中转点: {unknown}")
+            is_open = np.zeros(len(candidate_hubs), dtype=bool)
+            is_open[[position[hub_id] for hub_id in initial_hubs]] = True
+            if not min_count <= int(is_open.sum()) <= max_count:
+                raise ValueError("initial_hubs 的数量不在 hub_counts 范围内")
+        else:
+            is_open = TabuSearchOptimizer._greedy_initial(
+                fixed_costs, store_costs, hub_capacities, total_demand, min_count, max_count
+            )
+
+        best_by_count: Dict[int, Tuple[float, np.ndarray]] = {}
+        current_cost = TabuSearchOptimizer._record(fixed_costs, store_costs, is_open, allowed_counts, best_by_count)
+        best_cost = current_cost
+        tabu_until = np.zeros(len(candidate_hubs), dtype=int)
+
+        start_time = time.time()
+        stagnant = 0
+
+        for iteration in range(1, max_iterations + 1):
+            if time_limit is not None and time.time() - start_time >= time_limit:
+                break
+
+            move = TabuSearchOptimizer._best_move(
+                fixed_costs,
+                store_costs,
+                neighbor_idx,
+                neighbor_costs,
+                is_open,
+                current_cost,
+                best_cost,
+                tabu_until,
+                iteration,
+                min_count,
+                max_count,
+                hub_capacities,
+                total_demand,
+            )
+            if move is None:
+                break
+
+            opened, closed, delta = move
+            if opened is not None:
+                is_open[opened] = True
+                tabu_until[opened] = iteration + tabu_tenure
+            if closed is not None:
+                is_open[closed] = False
+                tabu_until[closed] = iteration + tabu_tenure
+
+            current_cost = TabuSearchOptimizer._record(fixed_costs, store_costs, is_open, allowed_counts, best_by_count)
+
+            if current_cost < best_cost - 1e-9:
+                best_cost = current_cost
+                stagnant = 0
+            else:
+                stagnant += 1
+                if stagnant >= stagnation_limit:
+                    break
+
+        evaluated_solutions = []
+        for hub_count in hub_counts:
+            if hub_count not in best_by_count:
+                continue
+            _, open_mask = best_by_count[hub_count]
+            active_hubs = [candidate_hubs[pos] for pos in np.flatnonzero(open_mask)]
+
+            if use_capacity and cost_model.is_capacitated(active_hubs):
+                # 搜索允许启用的中转点暂不服务门店；分配不存在或有中转点超载时该数量视为不可行
+                remaining = max(time_limit - (time.time() - start_time), 0.0) if time_limit is not None else None
+                store_assignments = solve_capacitated_assignment(
+                    cost_model, active_hubs, stores, require_all_hubs=False, time_limit=remaining
+                )
+                if store_assignments is None or not cost_model.respects_capacity(store_assignments):
+                    continue
+            else:
+                nearest, _ = cost_model.nearest_assignment(hub_idx[open_mask], store_idx)
+                store_assignments = {
+                    store_id: cost_model.candidate_hubs[hub_pos] for store_id, hub_pos in zip(stores, nearest)
+                }
+
+            evaluated_solutions.append(TabuSearchOptimizer._build_solution(
+                cost_model, active_hubs, store_assignments, suppliers, unit_transport_cost
+            ))
+
+        if not evaluated_solutions:
+            raise RuntimeError("在给定参数下未能找到可行方案")
+
+        best_solution = min(evaluated_solutions, key=lambda result: result["total_cost"])
+        return best_solution, evaluated_solutions
+
+    @staticmethod
+    def _greedy_initial(
+        fixed_costs: np.ndarray,
+        store_costs: np.ndarray,
+        hub_capacities: np.ndarray,
+        total_demand: float,
+        min_count: int,
+        max_count: int,
+    ) -> np.ndarray:
+        """逐个加入使总成本最小的中转点：先满足 min_count 个与总容量，之后只要总成本下降就继续加入（最多 max_count 个）"""
+        is_open = np.zeros(len(fixed_costs), dtype=bool)
+        nearest_cost = np.full(store_costs.shape[1], np.inf)
+        current_total = np.inf
+        while is_open.sum() < max_count:
+            totals = fixed_costs[is_open].sum() + fixed_costs + np.minimum(store_costs, nearest_cost).sum(axis=1)
+            totals[is_open] = np.inf
+            chosen = int(np.argmin(totals))
+            required = is_open.sum() < min_count or hub_capacities[is_open].sum() < total_demand
+            if not required and totals[chosen] >= current_total:
+                break
+            is_open[chosen] = True
+            nearest_cost = np.minimum(nearest_cost, store_costs[chosen])
+            current_total = totals[chosen]
+        return is_open
+
+    @staticmethod
+    def _record(
+        fixed_costs: np.ndarray,
+        store_costs: np.ndarray,
+        is_open: np.ndarray,
+        allowed_counts: set,
+        best_by_count: Dict[int, Tuple[float, np.ndarray]],
+    ) -> float:
+        """计算当前集合的总成本，并更新对应数量下的最佳集合"""
+        cost = float(fixed_costs[is_open].sum() + store_costs[is_open].min(axis=0).sum())
+        hub_count = int(is_open.sum())
+        if hub_count in allowed_counts and cost < best_by_count.get(hub_count, (np.inf, None))[0]:
+            best_by_count[hub_count] = (cost, is_open.copy())
+        return cost
+
+    @staticmethod
+    def _best_move(
+        fixed_costs: np.ndarray,
+        store_costs: np.ndarray,
+        neighbor_idx: np.ndarray,
+        neighbor_costs: np.ndarray,
+        is_open: np.ndarray,
+        current_cost: float,
+        best_cost: float,
+        tabu_until: np.ndarray,
+        iteration: int,
+        min_count: int,
+        max_count: int,
+        hub_capacities: np.ndarray,
+        total_demand: float,
+    ) -> Optional[Tuple[Optional[int], Optional[int], float]]:
+        """返回 (开启的中转点, 关闭的中转点, 成本差) 中最优的非禁忌或满足特赦准则的移动"""
+        open_pos = np.flatnonzero(is_open)
+        closed_pos = np.flatnonzero(~is_open)
+        open_count = len(open_pos)
+        hub_count = len(fixed_costs)
+        store_count = store_costs.shape[1]
+        stores = np.arange(store_count)
+
+        # 每个门店的最近 / 次近启用中转点（次近不存在时视为无穷大）
+        open_costs = store_costs[open_pos]
+        if open_count > 1:
+            nearest_two = np.argpartition(open_costs, 1, axis=0)[:2]
+            first, second_choice = open_costs[nearest_two[0], stores], open_costs[nearest_two[1], stores]
+            best_slot = np.where(second_choice < first, nearest_two[1], nearest_two[0])
+            best = np.minimum(first, second_choice)
+            second = np.maximum(first, second_choice)
+        else:
+            best_slot = np.zeros(store_count, dtype=np.intp)
+            best = open_costs[0]
+            second = np.full(store_count, np.inf)
+
+        # 只有门店近邻表中比最近启用中转点更近的未启用中转点才能带来节省
+        closed_neighbor = ~is_open[neighbor_idx]
+        saving = best[:, None] - neighbor_costs
+        saving_mask = closed_neighbor & (saving > 0)
+        savings = np.bincount(neighbor_idx[saving_mask], weights=saving[saving_mask], minlength=hub_count)
+
+        # 各类移动以 (开启位置, 关闭位置, 成本差) 三个数组收集，-1 表示该侧没有变动
+        opened_moves, closed_moves, delta_moves = [], [], []
+
+        if len(closed_pos) and open_count < max_count:
+            # 开启：门店改由新中转点服务时节省的成本
+            opened_moves.append(closed_pos)
+            closed_moves.append(np.full(len(closed_pos), -1))
+            delta_moves.append(fixed_costs[closed_pos] - savings[closed_pos])
+
+        # 关闭：以该中转点为最近的门店改由次近中转点服务
+        losses = np.bincount(best_slot, weights=second - best, minlength=open_count)
+        if open_count > max(min_count, 1):
+            opened_moves.append(np.full(open_count, -1))
+            closed_moves.append(open_pos)
+            delta_moves.append(losses - fixed_costs[open_pos])
+
+        if len(closed_pos):
+            if open_count > 1:
+                # 交换：被关闭中转点的门店本应改由次近中转点服务，若新中转点比次近更近，损失减少 second - max(c, best)
+                relief = second[:, None] - np.maximum(neighbor_costs, best[:, None])
+                relief_mask = closed_neighbor & (relief > 0)
+                pair_index = neighbor_idx * open_count + best_slot[:, None]
+                reliefs = np.bincount(
+                    pair_index[relief_mask], weights=relief[relief_mask], minlength=hub_count * open_count
+                ).reshape(hub_count, open_count)[closed_pos]
+                swap_deltas = (fixed_costs[closed_pos][:, None] - savings[closed_pos][:, None]
+                               - fixed_costs[open_pos][None, :] + losses[None, :] - reliefs)
+            else:
+                # 只有一个启用中转点时，交换后所有门店都改由新中转点服务
+                swap_deltas = (fixed_costs[closed_pos] - fixed_costs[open_pos[0]]
+                               + store_costs[closed_pos].sum(axis=1) - best.sum())[:, None]
+            opened_moves.append(np.repeat(closed_pos, open_count))
+            closed_moves.append(np.tile(open_pos, len(closed_pos)))
+            delta_moves.append(swap_deltas.ravel())
+
+        if not delta_moves:
+            return None
+
+        opened_moves = np.concatenate(opened_moves)
+        closed_moves = np.concatenate(closed_moves)
+        delta_moves = np.concatenate(delta_moves)
+
+        chosen = None
+        for move in np.argsort(delta_moves, kind="stable"):
+            delta = float(delta_moves[move])
+            if not np.isfinite(delta):
+                break
+            opened = int(opened_moves[move]) if opened_moves[move] >= 0 else None
+            closed = int(closed_moves[move]) if closed_moves[move] >= 0 else None
+            # 移动后的总容量不足以满足总需求时不可行
+            if total_demand > 0:
+                moved_open = is_open.copy()
+                if opened is not None:
+                    moved_open[opened] = True
+                if closed is not None:
+                    moved_open[closed] = False
+                if hub_capacities[moved_open].sum() < total_demand:
+                    continue
+            touched = [pos for pos in (opened, closed) if pos is not None]
+            is_tabu = any(tabu_until[pos] >= iteration for pos in touched)
+            if not is_tabu or current_cost + delta < best_cost - 1e-9:
+                chosen = (opened, closed, delta)
+                break
+
+        return chosen
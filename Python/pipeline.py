@@ -0,0 +1,204 @@
+from typing import Dict, List, Optional
+
+from network_model import LogisticsNetwork
+from optimizers.kmeans_sa_optimizer import KMeansSimulatedAnnealingOptimizer
+from solve import calculate_route_cost, evaluate_solution, load_vehicle_capacities, solve_cvrp
+
+# 与 solve.create_data_model 保持一致的默认成本参数
+DEFAULT_UNIT_PRICE = 3
+DEFAULT_VEHICLE_FIXED_COST = 500
+
+# 中转点方案摘要保留的字段
+HUB_SUMMARY_KEYS = ("hub_count", "active_hubs", "build_cost", "supplier_cost", "store_cost", "total_cost")
+# 部分优化器额外报告的求解诊断字段（如 MILP 的下界与间隙），存在时一并写入最佳方案摘要
+HUB_DIAGNOSTIC_KEYS = (
+    "lp_bound", "lp_gap", "proven_optimal", "solver_status", "solve_time", "warm_start_cost", "warm_start_gap",
+)
+
+
+def _store_demand(location) -> float:
+    """门店需求沿用 locations.csv 中的容量列，缺失时视为0"""
+    demand = getattr(location, "capacity", None)
+    return float(demand) if demand is not None else 0.0
+
+
+def build_cvrp_data_model(
+    network: LogisticsNetwork,
+    best_solution: Dict,
+    vehicle_capacities: List[float],
+    unit_price: float = DEFAULT_UNIT_PRICE,
+    vehicle_fixed_cost: float = DEFAULT_VEHICLE_FIXED_COST,
+) -> Dict:
+    """基于中转点优化结果在内存中构建 CVRP 数据模型，复用网络已有的距离数据"""
+    if not isinstance(network, LogisticsNetwork):
+        raise TypeError("network 必须是 LogisticsNetwork 类型")
+
+    if not vehicle_capacities:
+        raise ValueError("缺少车辆容量信息")
+
+    depot_ids = [hub_id for hub_id in best_solution["active_hubs"] if hub_id in network.locations]
+    if not depot_ids:
+        raise ValueError("优化结果中没有可用的中转点")
+
+    store_ids = [
+        store_id
+        for store_id in network.stores
+        if getattr(network.locations.get(store_id), "type", "").lower() == "store"
+    ]
+    if not store_ids:
+        raise ValueError("网络中缺少末端节点 (便利店)")
+
+    node_ids = depot_ids + store_ids
+    locations = [network.locations[node_id] for node_id in node_ids]
+
+    data = {
+        "vehicle_capacities": [float(capacity) for capacity in vehicle_capacities],
+        "num_vehicles": len(vehicle_capacities),
+        "coordinates": [(loc.x, loc.y) for loc in locations],
+        "demands": [0.0] * len(depot_ids) + [_store_demand(loc) for loc in locations[len(depot_ids):]],
+        "depots": list(range(len(depot_ids))),
+        "depot_ids": depot_ids,
+        "store_ids": store_ids,
+        "unit_price": unit_price,
+        "vehicle_fixed_cost": vehicle_fixed_cost,
+    }
+
+    # 直接从网络距离矩阵批量提取子矩阵，不再重新计算坐标距离
+    if not network.distance_matrix:
+        network.calculate_distances()
+    data["distance_matrix"] = network.distance_matrix.submatrix(node_ids, node_ids).tolist()
+
+    # 以中转点优化的门店分配作为仓库-门店初始分配
+    depot_index = {hub_id: idx for idx, hub_id in enumerate(depot_ids)}
+    store_assignments = best_solution.get("store_assignments") or {}
+    data["initial_depot_assignments"] = {
+        len(depot_ids) + idx: depot_index[store_assignments[store_id]]
+        for idx, store_id in enumerate(store_ids)
+        if store_assignments.get(store_id) in depot_index
+    }
+
+    return data
+
+
+def routes_to_ids(data: Dict, solution: Dict[int, List[int]]) -> Dict[str, List[str]]:
+    """将 {仓库索引: 节点列表} 形式的路径转换为 {中转点ID: 门店ID列表}，便于跨数据模型复用"""
+    depot_ids = data["depot_ids"]
+    offset = len(depot_ids)
+    return {
+        depot_ids[depot]: [data["store_ids"][node - offset] for node in route]
+        for depot, route in solution.items()
+    }
+
+
+def routes_from_ids(data: Dict, id_routes: Dict[str, List[str]]) -> Dict[int, List[int]]:
+    """routes_to_ids 的逆操作；数据模型中不存在的中转点或门店会被忽略"""
+    depot_index = {hub_id: idx for idx, hub_id in enumerate(data["depot_ids"])}
+    offset = len(depot_index)
+    node_index = {store_id: offset + idx for idx, store_id in enumerate(data["store_ids"])}
+    solution = {depot: [] for depot in data["depots"]}
+    for hub_id, store_ids in id_routes.items():
+        if hub_id not in depot_index:
+            continue
+        solution[depot_index[hub_id]] = [node_index[s_id] for s_id in store_ids if s_id in node_index]
+    return solution
+
+
+def summarize_hub_solution(best_solution: Dict, evaluated: Optional[List[Dict]] = None) -> Dict:
+    """中转点优化结果的可序列化摘要：最佳方案（含门店分配）与各数量下的方案成本"""
+    summary = {
+        "best": {
+            **{key: best_solution[key] for key in HUB_SUMMARY_KEYS},
+            **{key: best_solution[key] for key in HUB_DIAGNOSTIC_KEYS if key in best_solution},
+            "store_assignments": best_solution["store_assignments"],
+        },
+    }
+    if evaluated is not None:
+        summary["evaluated"] = [{key: result[key] for key in HUB_SUMMARY_KEYS} for result in evaluated]
+    return summary
+
+
+def summarize_routes(data: Dict, solution: Dict[int, List[int]], vehicle_plan: Dict) -> Dict:
+    """车辆计划转为以 ID 表示的路线；总成本与求解器的目标一致（配送成本 + 车辆固定成本 + 交叉惩罚）"""
+    total_cost, _ = evaluate_solution(data, solution)
+    store_offset = len(data["depots"])
+    depot_ids = data.get("depot_ids") or [str(depot) for depot in data["depots"]]
+    depots = []
+    for depot, vehicle_routes in sorted(vehicle_plan.items()):
+        vehicles = []
+        for route_depot, route in vehicle_routes:
+            vehicles.append({
+                "stores": [data["store_ids"][node - store_offset] for node in route],
+                "load": float(sum(data["demands"][node] for node in route)),
+                "cost": float(calculate_route_cost(data, [(route_depot, route)])),
+            })
+        depots.append({"hub": depot_ids[depot], "vehicles": vehicles})
+    return {
+        "total_cost": float(total_cost),
+        "vehicles_used": sum(len(routes) for routes in vehicle_plan.values()),
+        "num_vehicles": data["num_vehicles"],
+        "depots": depots,
+    }
+
+
+def run_routing_stage(
+    network: LogisticsNetwork,
+    best_solution: Dict,
+    vehicle_capacities: Optional[List[float]] = None,
+    car_file: str = "car.xlsx",
+    unit_price: float = DEFAULT_UNIT_PRICE,
+    vehicle_fixed_cost: float = DEFAULT_VEHICLE_FIXED_COST,
+    plot: bool = False,
+    **solver_kwargs,
+):
+    """将中转点优化结果直接交给 CVRP 求解，返回数据模型、路径方案与车辆计划"""
+    if vehicle_capacities is None:
+        vehicle_capacities = load_vehicle_capacities(car_file)
+
+    data = build_cvrp_data_model(
+        network,
+        best_solution,
+        vehicle_capacities,
+        unit_price=unit_price,
+        vehicle_fixed_cost=vehicle_fixed_cost,
+    )
+    solution, vehicle_plan = solve_cvrp(data, plot=plot, **solver_kwargs)
+    return data, solution, vehicle_plan
+
+
+def run_two_stage(
+    network: LogisticsNetwork,
+    vehicle_capacities: Optional[List[float]] = None,
+    car_file: str = "car.xlsx",
+    unit_price: float = DEFAULT_UNIT_PRICE,
+    vehicle_fixed_cost: float = DEFAULT_VEHICLE_FIXED_COST,
+    plot: bool = False,
+    solver_options: Optional[Dict] = None,
+    **optimizer_kwargs,
+) -> Dict:
+    """端到端执行中转点选址与 CVRP 路径优化，全程不经过 Excel 中间文件
+
+    optimizer_kwargs 传给中转点优化器，solver_options 传给 solve_cvrp。
+    """
+    if not network.distance_matrix:
+        network.calculate_distances()
+
+    best_solution, evaluated = KMeansSimulatedAnnealingOptimizer.optimize(network, **optimizer_kwargs)
+    data, solution, vehicle_plan = run_routing_stage(
+        network,
+        best_solution,
+        vehicle_capacities=vehicle_capacities,
+        car_file=car_file,
+        unit_price=unit_price,
+        vehicle_fixed_cost=vehicle_fixed_cost,
+        plot=plot,
+        **(solver_options or {}),
+    )
+
+    return {
+        "hub_solution": best_solution,
+        "evaluated_solutions": evaluated,
+        "data": data,
+        "route_solution": solution,
+        "routes": routes_to_ids(data, solution),
+        "vehicle_plan": vehicle_plan,
+    }
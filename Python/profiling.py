@@ -0,0 +1,241 @@
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# 当前启用的剖析器；为 None 时所有埋点直接返回，开销只有一次全局变量读取
+_ACTIVE: Optional["Profiler"] = None
+
+
+class PhaseStats:
+    """单个阶段的调用次数与耗时统计（秒）"""
+
+    __slots__ = ("calls", "total", "max")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+    def as_dict(self) -> Dict:
+        return {"calls": self.calls, "total": self.total, "mean": self.mean, "max": self.max}
+
+
+class ProfileStats:
+    """剖析结果：各阶段耗时、计数器以及由计数器导出的比率
+
+    比率按计数器命名约定导出：
+      <前缀>.hit / <前缀>.miss                      -> <前缀>.hit_rate
+      <前缀>.moves_accepted / <前缀>.moves_proposed -> <前缀>.acceptance_rate
+      <前缀>.moves_infeasible / <前缀>.moves_proposed -> <前缀>.infeasible_rate
+    """
+
+    def __init__(self, phases: Dict[str, PhaseStats], counters: Dict[str, int], wall_time: float):
+        self.phases = phases
+        self.counters = counters
+        self.wall_time = wall_time
+
+    @property
+    def rates(self) -> Dict[str, float]:
+        rates = {}
+        for name, value in self.counters.items():
+            prefix, _, suffix = name.rpartition(".")
+            if suffix == "hit":
+                total = value + self.counters.get(f"{prefix}.miss", 0)
+                rates[f"{prefix}.hit_rate"] = value / total if total else 0.0
+            elif suffix in ("moves_accepted", "moves_infeasible"):
+                proposed = self.counters.get(f"{prefix}.moves_proposed", 0)
+                label = "acceptance_rate" if suffix == "moves_accepted" else "infeasible_rate"
+                rates[f"{prefix}.{label}"] = value / proposed if proposed else 0.0
+        return rates
+
+    def as_dict(self) -> Dict:
+        return {
+            "wall_time": self.wall_time,
+            "phases": {name: stats.as_dict() for name, stats in sorted(self.phases.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "rates": dict(sorted(self.rates.items())),
+        }
+
+    def format(self) -> str:
+        """文本表格，阶段按总耗时降序"""
+        lines = [f"总耗时: {self.wall_time:.4f} 秒", f"{'阶段':<28} {'调用次数':>10} {'总耗时(s)':>12} {'平均(ms)':>10} {'占比':>7}"]
+        for name, stats in sorted(self.phases.items(), key=lambda item: -item[1].total):
+            share = stats.total / self.wall_time if self.wall_time else 0.0
+            lines.append(f"{name:<28} {stats.calls:>10} {stats.total:>12.4f} {stats.mean * 1000:>10.3f} {share:>7.1%}")
+        if self.counters:
+            lines.append("")
+            lines.extend(f"{name:<40} {value:>12}" for name, value in sorted(self.counters.items()))
+        for name, value in sorted(self.rates.items()):
+            lines.append(f"{name:<40} {value:>12.2%}")
+        return "\n".join(lines)
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        self.profiler._record(self.name, self.start, end)
+        return False
+
+
+class Profiler:
+    """按阶段记录耗时与调用次数，并累积计数器
+
+    trace 为 True 时额外保留每次阶段调用的起止时间用于导出 Chrome trace（最多 max_events 条，超出后只统计不记录）。
+    工作进程中的调用不会被记录。
+    """
+
+    def __init__(self, trace: bool = False, max_events: int = 1_000_000):
+        self.trace = trace
+        self.max_events = max_events
+        self.phases: Dict[str, PhaseStats] = {}
+        self.counters: Dict[str, int] = {}
+        self.events: List[tuple] = []
+        self.dropped_events = 0
+        self._origin = time.perf_counter()
+        self._end = None
+        self._lock = threading.Lock()
+
+    def phase(self, name: str) -> _Phase:
+        return _Phase(self, name)
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def _record(self, name: str, start: float, end: float) -> None:
+        duration = end - start
+        with self._lock:
+            stats = self.phases.get(name)
+            if stats is None:
+                stats = self.phases[name] = PhaseStats()
+            stats.calls += 1
+            stats.total += duration
+            if duration > stats.max:
+                stats.max = duration
+            if self.trace:
+                if len(self.events) < self.max_events:
+                    self.events.append((name, start, duration, threading.get_ident()))
+                else:
+                    self.dropped_events += 1
+
+    def stop(self) -> None:
+        if self._end is None:
+            self._end = time.perf_counter()
+
+    def stats(self) -> ProfileStats:
+        end = self._end if self._end is not None else time.perf_counter()
+        with self._lock:
+            phases = {name: _copy_phase(stats) for name, stats in self.phases.items()}
+            counters = dict(self.counters)
+        return ProfileStats(phases, counters, end - self._origin)
+
+    def write_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.stats().as_dict(), f, ensure_ascii=False, indent=2)
+
+    def write_chrome_trace(self, path: str) -> None:
+        """导出 Chrome trace 事件格式（chrome://tracing 或 Perfetto 可直接打开），计数器作为结束时刻的 counter 事件"""
+        pid = os.getpid()
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "ts": (start - self._origin) * 1e6,
+                "dur": duration * 1e6,
+                "pid": pid,
+                "tid": tid,
+            }
+            for name, start, duration, tid in self.events
+        ]
+        end_ts = self.stats().wall_time * 1e6
+        events.extend(
+            {"name": name, "ph": "C", "ts": end_ts, "pid": pid, "args": {"value": value}}
+            for name, value in sorted(self.counters.items())
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def _copy_phase(stats: PhaseStats) -> PhaseStats:
+    copied = PhaseStats()
+    copied.calls, copied.total, copied.max = stats.calls, stats.total, stats.max
+    return copied
+
+
+_NULL_PHASE = contextlib.nullcontext()
+
+
+def phase(name: str):
+    """埋点：未启用剖析时返回共享的空上下文"""
+    profiler = _ACTIVE
+    if profiler is None:
+        return _NULL_PHASE
+    return profiler.phase(name)
+
+
+def count(name: str, value: int = 1) -> None:
+    """埋点：累加计数器；热循环中应先在局部变量中累计，结束时调用一次"""
+    profiler = _ACTIVE
+    if profiler is not None:
+        profiler.count(name, value)
+
+
+def enabled() -> bool:
+    return _ACTIVE is not None
+
+
+def profiled(name: str) -> Callable:
+    """函数装饰器：启用剖析时将整个调用记为阶段 name"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _ACTIVE
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextlib.contextmanager
+def profile(trace: bool = False, json_path: Optional[str] = None, trace_path: Optional[str] = None,
+            max_events: int = 1_000_000):
+    """在 with 块内启用剖析，返回 Profiler；指定路径时退出时写出 JSON 统计与 Chrome trace
+
+    用法:
+        with profile(trace_path="trace.json") as profiler:
+            KMeansSimulatedAnnealingOptimizer.optimize(network)
+        print(profiler.stats().format())
+    """
+    global _ACTIVE
+    previous = _ACTIVE
+    profiler = Profiler(trace=trace or trace_path is not None, max_events=max_events)
+    _ACTIVE = profiler
+    try:
+        yield profiler
+    finally:
+        _ACTIVE = previous
+        profiler.stop()
+        if json_path:
+            profiler.write_json(json_path)
+        if trace_path:
+            profiler.write_chrome_trace(trace_path)
@@ -0,0 +1,218 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from network_model import LogisticsNetwork
+from optimizers.kmeans_sa_optimizer import KMeansSimulatedAnnealingOptimizer
+from pipeline import (
+    DEFAULT_UNIT_PRICE,
+    DEFAULT_VEHICLE_FIXED_COST,
+    build_cvrp_data_model,
+    routes_from_ids,
+    routes_to_ids,
+)
+from solve import build_initial_solution, load_vehicle_capacities, solve_cvrp
+
+
+def _store_ids(network: LogisticsNetwork) -> List[str]:
+    return [
+        store_id
+        for store_id in network.stores
+        if getattr(network.locations.get(store_id), "type", "").lower() == "store"
+    ]
+
+
+def apply_location_changes(network: LogisticsNetwork, changes: Dict) -> Set[str]:
+    """将地点变化增量应用到网络，返回需要重新分配的门店ID
+
+    changes 支持的键：
+      added   - 新增的 Location 列表
+      updated - 坐标或需求发生变化的 Location 列表（按ID替换）
+      removed - 删除的地点ID列表
+    """
+    affected = set()
+
+    for location_id in changes.get("removed", []) or []:
+        if location_id in network.locations:
+            network.remove_location(location_id)
+
+    for location in list(changes.get("added", []) or []) + list(changes.get("updated", []) or []):
+        network.add_location(location)
+        if (location.type or "").lower() == "store":
+            affected.add(location.id)
+
+    return affected
+
+
+def repair_hub_solution(
+    network: LogisticsNetwork,
+    previous_solution: Dict,
+    affected_stores: Iterable[str],
+) -> Tuple[List[str], Dict[str, str], List[str]]:
+    """保留未受影响门店的原分配，其余门店贪心插入到最近的已启用中转点"""
+    active_hubs = [hub_id for hub_id in previous_solution["active_hubs"] if hub_id in network.locations]
+    if not active_hubs:
+        raise ValueError("原方案中的中转点均已失效，请重新执行完整优化")
+
+    affected = set(affected_stores)
+    active_set = set(active_hubs)
+    store_ids = _store_ids(network)
+
+    assignments = {
+        store_id: hub_id
+        for store_id, hub_id in (previous_solution.get("store_assignments") or {}).items()
+        if store_id in network.locations and hub_id in active_set and store_id not in affected
+    }
+
+    orphans = [store_id for store_id in store_ids if store_id not in assignments]
+    if orphans:
+        assignments.update(network.nearest_locations(orphans, active_hubs))
+
+    return active_hubs, {store_id: assignments[store_id] for store_id in store_ids}, orphans
+
+
+def repair_routes(
+    network: LogisticsNetwork,
+    previous_routes: Dict[str, List[str]],
+    active_hubs: List[str],
+    store_assignments: Dict[str, str],
+) -> Dict[str, List[str]]:
+    """沿用原路径顺序，删除失效门店，并把未覆盖的门店按最小增量距离插入所属中转点的路径"""
+    routes = {
+        hub_id: [
+            store_id
+            for store_id in previous_routes.get(hub_id, [])
+            if store_assignments.get(store_id) == hub_id
+        ]
+        for hub_id in active_hubs
+    }
+
+    routed = {store_id for route in routes.values() for store_id in route}
+    for store_id, hub_id in store_assignments.items():
+        if store_id in routed:
+            continue
+
+        route = routes[hub_id]
+        stops = [hub_id] + route + [hub_id]
+        best_position = 0
+        best_delta = float("inf")
+        for position in range(len(stops) - 1):
+            prev_id, next_id = stops[position], stops[position + 1]
+            delta = (network._ensure_distance(prev_id, store_id)
+                     + network._ensure_distance(store_id, next_id)
+                     - network._ensure_distance(prev_id, next_id))
+            if delta < best_delta:
+                best_delta = delta
+                best_position = position
+
+        route.insert(best_position, store_id)
+        routed.add(store_id)
+
+    return routes
+
+
+def reoptimize(
+    network: LogisticsNetwork,
+    previous_solution: Dict,
+    changes: Dict,
+    previous_routes: Optional[Dict[str, List[str]]] = None,
+    vehicle_capacities: Optional[List[float]] = None,
+    car_file: str = "car.xlsx",
+    unit_transport_cost: Optional[float] = None,
+    unit_price: float = DEFAULT_UNIT_PRICE,
+    vehicle_fixed_cost: float = DEFAULT_VEHICLE_FIXED_COST,
+    initial_temp: float = 50.0,
+    cooling_rate: float = 0.95,
+    iterations: int = 200,
+    neighborhood: int = 5,
+    route_initial_temp: float = 10,
+    route_max_iterations: int = 600,
+) -> Dict:
+    """基于前一天的方案热启动重新优化：只修复受影响的门店与路径，再做一次短时局部退火
+
+    中转点集合保持不变；返回结构与 pipeline.run_two_stage 一致，可逐日串联调用。
+    """
+    if not isinstance(network, LogisticsNetwork):
+        raise TypeError("network 必须是 LogisticsNetwork 类型")
+
+    if not network.distance_matrix:
+        network.calculate_distances()
+
+    affected = apply_location_changes(network, changes)
+    active_hubs, assignments, repaired_stores = repair_hub_solution(network, previous_solution, affected)
+
+    if unit_transport_cost is None:
+        unit_transport_cost = previous_solution.get("unit_transport_cost", 1.0)
+    suppliers = list(network.manufacturers)
+    if not suppliers:
+        raise ValueError("网络中缺少供应商")
+
+    # 局部退火范围：被修复的门店及其附近的门店
+    movable = set(repaired_stores)
+    if repaired_stores and neighborhood > 0:
+        store_ids = _store_ids(network)
+        nearby = network.nearest_locations(repaired_stores, store_ids, k=min(neighborhood + 1, len(store_ids)))
+        for neighbors in nearby.values():
+            movable.update(neighbors if isinstance(neighbors, list) else [neighbors])
+
+    if movable:
+        assignments, cost_breakdown = KMeansSimulatedAnnealingOptimizer._simulated_annealing(
+            network,
+            tuple(active_hubs),
+            assignments,
+            suppliers,
+            unit_transport_cost,
+            initial_temp,
+            cooling_rate,
+            iterations,
+            movable_stores=movable,
+        )
+    else:
+        cost_breakdown = KMeansSimulatedAnnealingOptimizer._calculate_total_cost(
+            network,
+            active_hubs,
+            assignments,
+            suppliers,
+            unit_transport_cost,
+        )
+
+    hub_solution = {
+        "hub_count": len(active_hubs),
+        "active_hubs": list(active_hubs),
+        "store_assignments": assignments,
+        "suppliers": suppliers,
+        "unit_transport_cost": unit_transport_cost,
+        **cost_breakdown,
+    }
+
+    if vehicle_capacities is None:
+        vehicle_capacities = load_vehicle_capacities(car_file)
+
+    data = build_cvrp_data_model(
+        network,
+        hub_solution,
+        vehicle_capacities,
+        unit_price=unit_price,
+        vehicle_fixed_cost=vehicle_fixed_cost,
+    )
+
+    if previous_routes:
+        repaired_routes = repair_routes(network, previous_routes, active_hubs, assignments)
+        initial_solution = routes_from_ids(data, repaired_routes)
+    else:
+        initial_solution = build_initial_solution(data)
+
+    solution, vehicle_plan = solve_cvrp(
+        data,
+        plot=False,
+        initial_solution=initial_solution,
+        initial_temp=route_initial_temp,
+        max_iterations=route_max_iterations,
+    )
+
+    return {
+        "hub_solution": hub_solution,
+        "affected_stores": sorted(movable),
+        "data": data,
+        "route_solution": solution,
+        "routes": routes_to_ids(data, solution),
+        "vehicle_plan": vehicle_plan,
+    }
@@ -0,0 +1,162 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from solve import build_vehicle_plan, has_crossing_paths_simple
+
+# 与 solve.evaluate_solution 一致的路径交叉惩罚
+CROSSING_PENALTY = 20000
+DEFAULT_OVERFLOW_PENALTY = 20000
+
+
+def sample_demand_scenarios(
+    data: Dict,
+    n_scenarios: int = 1000,
+    cv: float = 0.2,
+    distribution: str = "normal",
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """以数据模型中的门店需求为均值抽样需求情景，返回形状为 (情景数, 门店数) 的矩阵
+
+    列顺序与 data['store_ids'] 一致；cv 为变异系数。distribution 可选：
+      normal  - 截断在 0 的正态分布
+      gamma   - 均值与变异系数相同的伽马分布（非负、右偏）
+      poisson - 泊松分布（忽略 cv，方差等于均值）
+    """
+    if n_scenarios <= 0:
+        raise ValueError("n_scenarios 必须大于0")
+    if cv < 0:
+        raise ValueError("cv 必须为非负数")
+
+    offset = len(data["depots"])
+    means = np.asarray(data["demands"][offset:], dtype=float)
+    rng = np.random.default_rng(seed)
+    size = (n_scenarios, means.size)
+
+    if distribution == "normal":
+        return np.maximum(rng.normal(means, cv * means, size=size), 0.0)
+    if distribution == "gamma":
+        if cv == 0:
+            return np.broadcast_to(means, size).copy()
+        shape = 1.0 / cv ** 2
+        return rng.gamma(shape, means / shape, size=size)
+    if distribution == "poisson":
+        return rng.poisson(means, size=size).astype(float)
+    raise ValueError(f"未知的需求分布: {distribution}")
+
+
+class RobustRouteEvaluator:
+    """在一组需求情景上批量评估 CVRP 路径方案
+
+    路径成本 = Σ 距离×单价×当前载重，对需求是线性的：门店 j 的需求乘以从它的到达段到返回仓库的剩余距离之和。
+    因此一个车辆计划可以先压缩为每个门店的成本权重向量 w 与门店-车辆归属矩阵 M，
+    全部情景的成本为 D @ w，车辆载重为 D @ M，一次矩阵运算即可完成上千个情景的评估。
+    """
+
+    def __init__(
+        self,
+        data: Dict,
+        scenarios: np.ndarray,
+        alpha: float = 0.95,
+        risk_measure: str = "expected",
+        overflow_penalty: float = DEFAULT_OVERFLOW_PENALTY,
+    ):
+        scenarios = np.asarray(scenarios, dtype=float)
+        offset = len(data["depots"])
+        store_count = len(data["demands"]) - offset
+        if scenarios.ndim != 2 or scenarios.shape[1] != store_count:
+            raise ValueError(f"需求情景矩阵的形状应为 (情景数, {store_count})")
+        if not 0 < alpha < 1:
+            raise ValueError("alpha 必须在 (0, 1) 之间")
+        if risk_measure not in ("expected", "cvar"):
+            raise ValueError("risk_measure 只能是 expected 或 cvar")
+
+        self.data = data
+        self.scenarios = scenarios
+        self.alpha = alpha
+        self.risk_measure = risk_measure
+        self.overflow_penalty = overflow_penalty
+        self._offset = offset
+        self._distances = np.asarray(data["distance_matrix"], dtype=float)
+        self._capacity = float(data["vehicle_capacities"][0])
+
+    def plan_arrays(self, vehicle_plan: Dict) -> Tuple[np.ndarray, np.ndarray, float]:
+        """将车辆计划压缩为 (门店成本权重, 门店-车辆归属矩阵, 与需求无关的固定成本)"""
+        vehicle_routes = [
+            (depot_idx, route)
+            for routes in vehicle_plan.values()
+            for depot_idx, route in routes
+            if route
+        ]
+        store_count = self.scenarios.shape[1]
+        weights = np.zeros(store_count)
+        membership = np.zeros((store_count, len(vehicle_routes)))
+
+        for vehicle, (depot_idx, route) in enumerate(vehicle_routes):
+            path = np.array([depot_idx, *route, depot_idx])
+            segments = self._distances[path[:-1], path[1:]]
+            remaining = np.cumsum(segments[::-1])[::-1]
+            columns = np.asarray(route) - self._offset
+            np.add.at(weights, columns, remaining[:-1])
+            membership[columns, vehicle] = 1.0
+        weights *= self.data["unit_price"]
+
+        fixed_cost = 0.0
+        for routes in vehicle_plan.values():
+            fixed_cost += len(routes) * self.data["vehicle_fixed_cost"]
+            if has_crossing_paths_simple(self.data, routes):
+                fixed_cost += CROSSING_PENALTY
+        return weights, membership, fixed_cost
+
+    def evaluate(self, vehicle_plan: Dict) -> Dict:
+        """返回车辆计划在全部情景下的成本分布与超载风险
+
+        expected_cost / std_cost  - 情景成本的均值与标准差
+        var / cvar                - alpha 分位数的风险价值与条件风险价值（尾部期望成本）
+        overflow_probability      - 至少一辆车超载的情景比例
+        vehicle_overflow          - 每辆车超载的情景比例
+        deterministic_cost        - 名义需求下的成本（与 solve.evaluate_solution 一致）
+        scenario_costs            - 每个情景的成本
+        """
+        weights, membership, fixed_cost = self.plan_arrays(vehicle_plan)
+        costs = self.scenarios @ weights + fixed_cost
+        loads = self.scenarios @ membership
+        overflow = loads > self._capacity + 1e-9
+
+        var = float(np.quantile(costs, self.alpha))
+        tail = costs[costs >= var]
+        nominal = np.asarray(self.data["demands"][self._offset:], dtype=float)
+
+        return {
+            "expected_cost": float(costs.mean()),
+            "std_cost": float(costs.std()),
+            "var": var,
+            "cvar": float(tail.mean()) if tail.size else var,
+            "overflow_probability": float(overflow.any(axis=1).mean()) if overflow.size else 0.0,
+            "vehicle_overflow": overflow.mean(axis=0).tolist(),
+            "deterministic_cost": float(nominal @ weights + fixed_cost),
+            "scenario_costs": costs,
+        }
+
+    def objective(self, vehicle_plan: Dict) -> float:
+        """稳健目标值：期望成本或 CVaR，加上超载概率×overflow_penalty"""
+        result = self.evaluate(vehicle_plan)
+        risk = result["cvar"] if self.risk_measure == "cvar" else result["expected_cost"]
+        return risk + self.overflow_penalty * result["overflow_probability"]
+
+    def evaluate_solution(self, data: Dict, depot_routes: Dict) -> Tuple[Optional[float], Optional[Dict]]:
+        """与 solve.evaluate_solution 签名一致，返回稳健目标值与车辆计划，可直接用于 solve_cvrp"""
+        plan = build_vehicle_plan(data, depot_routes)
+        if plan is None:
+            return None, None
+        return self.objective(plan), plan
+
+
+def compare_plans(evaluator: RobustRouteEvaluator, plans: Iterable[Dict]) -> List[Dict]:
+    """在同一组情景上评估多个车辆计划，便于比较不同方案的期望成本与尾部风险"""
+    results = []
+    for plan in plans:
+        result = evaluator.evaluate(plan)
+        result.pop("scenario_costs")
+        results.append(result)
+    return results
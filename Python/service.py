@@ -0,0 +1,554 @@
+"""本地常驻优化服务：在内存中保持已加载的网络，按需执行中转点优化、路径优化与假设分析
+
+协议为基于 TCP（默认仅监听 127.0.0.1）或 Unix 套接字的 NDJSON：每行一个 JSON 请求，
+服务按请求的 id 逐行返回事件（accepted / progress / result / error / cancelled），同一连接上可并发多个请求。
+
+    python Python/service.py serve --port 8765 --workers 4
+    python Python/service.py send --port 8765 '{"op": "load", "network": "base", "path": "locations.csv"}'
+    python Python/service.py send --port 8765 '{"op": "optimize", "network": "base", "hub_counts": "1-3"}'
+
+支持的操作:
+  ping                                      连通性检查
+  load      network, path | locations       注册（或替换）网络；locations 为地点字典列表
+  networks                                  列出已注册的网络
+  optimize  network, [optimizer, hub_counts, unit_transport_cost, options, seed]
+  route     network, active_hubs, [store_assignments, vehicle_capacities | car_file, solver, seed]
+  what_if   network, changes, [previous, vehicle_capacities | car_file, options, seed]
+            changes 形如 {"added": [...], "updated": [...], "removed": [...]}；给出 previous（此前 optimize
+            结果中的 best）时以 reoptimize 热启动修复并重排路径，否则在变化后的网络上完整重新优化
+  cancel    target                          取消排队或运行中的请求
+  jobs                                      列出运行中的请求
+
+计算在工作进程池中执行。每个工作进程按 (网络名, 版本) 缓存网络对象与距离矩阵，同一网络的后续请求不再重新读取文件
+或计算距离；options 中 share_clusterings 为 true 时，K-means 聚类另按 (重启次数, 中转点数量) 缓存并在请求间共享
+（结果随该进程此前执行过的请求而变化，需要按 seed 复现时不要开启）。中转点优化按组合上报进度事件（kind 为 count_started /
+subset / incumbent / count_finished / finished，subset 事件按 progress_interval 秒节流），路径优化按遥测采样上报。
+取消通过 anytime.CancellationToken 传给求解器，在下一次退火迭代前生效；
+不支持取消的优化器与热启动修复（what_if 给出 previous）只能在开始执行前取消。
+"""
+import argparse
+import asyncio
+import contextlib
+import inspect
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from anytime import CancellationToken, OptimizationCancelled
+from cli import json_default, parse_hub_counts
+from locations import Location, load_locations_from_file
+from network_model import LogisticsNetwork
+from optimizers.base_optimizer import get_optimizer
+from pipeline import run_routing_stage, summarize_hub_solution, summarize_routes
+from reoptimize import reoptimize
+from telemetry import TelemetrySink
+
+DEFAULT_PORT = 8765
+JOB_OPERATIONS = ("optimize", "route", "what_if")
+TERMINAL_EVENTS = ("result", "error", "cancelled")
+
+# 工作进程状态，由 _init_worker 设置
+_WORKER_STATE: Dict = {}
+
+
+def _location_from_dict(entry: Dict) -> Location:
+    try:
+        return Location(
+            str(entry["id"]),
+            entry.get("name", str(entry["id"])),
+            entry["type"],
+            float(entry["x"]),
+            float(entry["y"]),
+            entry.get("capacity"),
+            entry.get("product_categories"),
+            entry.get("build_cost", 0.0),
+        )
+    except (KeyError, TypeError, ValueError) as exc:
+        raise ValueError(f"地点数据无效: {entry} ({exc})") from None
+
+
+def _changes_from_dict(changes: Dict) -> Dict:
+    return {
+        "added": [_location_from_dict(entry) for entry in changes.get("added", []) or []],
+        "updated": [_location_from_dict(entry) for entry in changes.get("updated", []) or []],
+        "removed": [str(location_id) for location_id in changes.get("removed", []) or []],
+    }
+
+
+# ---------------------------------------------------------------- 工作进程
+
+def _init_worker(events, cancelled, progress_interval: float) -> None:
+    _WORKER_STATE.update(events=events, cancelled=cancelled, progress_interval=progress_interval, networks={})
+    # 求解器会向标准输出打印过程信息，服务模式下丢弃
+    sys.stdout = open(os.devnull, "w")
+
+
+def _warm_network(name: str, version: int, locations: List[Location]):
+    """返回缓存的 (网络, 聚类缓存)；版本变化时重建并计算距离矩阵"""
+    cached = _WORKER_STATE["networks"].get(name)
+    if cached is None or cached[0] != version:
+        network = LogisticsNetwork(locations)
+        network.calculate_distances()
+        cached = _WORKER_STATE["networks"][name] = (version, network, {})
+    return cached[1], cached[2]
+
+
+def _preload(name: str, version: int, locations: List[Location]) -> None:
+    """预热任务：只建立缓存，不把网络对象传回服务进程"""
+    _warm_network(name, version, locations)
+
+
+class _JobControl:
+    """一个请求在工作进程中的进度上报与取消
+
+    进度按 progress_interval 秒节流后放入事件队列（中转点优化的非 subset 事件不节流）；
+    后台线程以同样的间隔查看服务进程写入的取消标记，并转为本进程内的 CancellationToken。
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.interval = _WORKER_STATE["progress_interval"]
+        self.events = _WORKER_STATE["events"]
+        self.cancelled = _WORKER_STATE["cancelled"]
+        self.token = CancellationToken()
+        self.last_report = 0.0
+        self._done = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, name=f"cancel-{job_id}", daemon=True)
+
+    def __enter__(self) -> "_JobControl":
+        self._watcher.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._done.set()
+        self._watcher.join()
+
+    def _watch(self) -> None:
+        while not self._done.wait(self.interval):
+            try:
+                if self.job_id in self.cancelled:
+                    self.token.cancel(f"请求 {self.job_id} 已取消")
+                    return
+            except (EOFError, OSError):
+                return
+
+    def telemetry(self, entry: Dict) -> None:
+        """遥测回调（路径优化）"""
+        self._report(entry, throttle=True)
+
+    def optimizer_event(self, event: Dict) -> None:
+        """中转点优化的进度回调；事件名改放在 kind 字段，避免与协议的 event 字段冲突"""
+        entry = dict(event)
+        entry["kind"] = entry.pop("event")
+        self._report(entry, throttle=entry["kind"] == "subset")
+
+    def _report(self, entry: Dict, throttle: bool) -> None:
+        now = time.monotonic()
+        if throttle and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        self.events.put((self.job_id, entry))
+
+
+def _run_job(job_id: str, operation: str, network_key: tuple, locations: List[Location], payload: Dict) -> Dict:
+    """在工作进程中执行一个请求，返回可序列化的结果"""
+    if job_id in _WORKER_STATE["cancelled"]:
+        raise OptimizationCancelled(f"请求 {job_id} 已取消")
+    seed = payload.get("seed")
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+
+    network, clusterings = _warm_network(*network_key, locations)
+    with _JobControl(job_id) as control:
+        start = time.perf_counter()
+        result = _dispatch_job(operation, network, clusterings, payload, control)
+        result["runtime"] = time.perf_counter() - start
+    return result
+
+
+def _dispatch_job(operation: str, network: LogisticsNetwork, clusterings: Dict, payload: Dict,
+                  control: _JobControl) -> Dict:
+    if operation == "optimize":
+        return _optimize(network, clusterings, payload, control)
+    if operation == "route":
+        best_solution = {
+            "active_hubs": list(payload["active_hubs"]),
+            "store_assignments": payload.get("store_assignments") or {},
+        }
+        data, solution, vehicle_plan = run_routing_stage(
+            network,
+            best_solution,
+            vehicle_capacities=payload.get("vehicle_capacities"),
+            car_file=payload.get("car_file", "car.xlsx"),
+            telemetry=TelemetrySink(callback=control.telemetry, buffer_size=1,
+                                    sample_every=payload.get("sample_every", 50)),
+            cancel_token=control.token,
+            **(payload.get("solver") or {}),
+        )
+        if not vehicle_plan:
+            raise RuntimeError("路径优化未找到满足车辆限制的可行解")
+        return summarize_routes(data, solution, vehicle_plan)
+    return _what_if(network, payload, control)
+
+
+def _optimize(network: LogisticsNetwork, clusterings: Dict, payload: Dict, control: _JobControl) -> Dict:
+    optimizer_cls = get_optimizer(payload.get("optimizer", "kmeans_sa"))
+    options = dict(payload.get("options") or {})
+    accepted = inspect.signature(optimizer_cls.optimize).parameters
+    unknown = sorted(set(options) - set(accepted))
+    if unknown:
+        raise ValueError(f"优化器 {optimizer_cls.name} 不支持参数: {', '.join(unknown)}")
+    if "progress" in accepted:
+        options["progress"] = control.optimizer_event
+    elif "telemetry" in accepted:
+        options["telemetry"] = TelemetrySink(callback=control.telemetry, buffer_size=1,
+                                             sample_every=payload.get("sample_every", 50))
+    if "cancel_token" in accepted:
+        options["cancel_token"] = control.token
+    if options.get("share_clusterings") and "clusterings" in accepted and "clusterings" not in options:
+        # 只有请求显式共享聚类时才使用工作进程缓存；聚类结果取决于重启次数，按重启次数分别缓存
+        restarts = options.get("kmeans_restarts", accepted["kmeans_restarts"].default)
+        options["clusterings"] = clusterings.setdefault(restarts, {})
+
+    best_solution, evaluated = optimizer_cls.optimize(
+        network,
+        hub_counts=parse_hub_counts(payload.get("hub_counts")),
+        unit_transport_cost=payload.get("unit_transport_cost", 1.0),
+        **options,
+    )
+    return {"optimizer": optimizer_cls.name, **summarize_hub_solution(best_solution, evaluated)}
+
+
+def _what_if(network: LogisticsNetwork, payload: Dict, control: _JobControl) -> Dict:
+    # 派生网络以视图共享缓存网络的距离矩阵，增删改只按行/列记录在视图上，缓存的网络保持不变
+    scenario = network.create_filtered_network(network.wholesalers)
+    changes = _changes_from_dict(payload.get("changes") or {})
+    previous = payload.get("previous")
+
+    if previous is None:
+        for location_id in changes["removed"]:
+            if location_id in scenario.locations:
+                scenario.remove_location(location_id)
+        for location in changes["added"] + changes["updated"]:
+            scenario.add_location(location)
+        return {"mode": "full", **_optimize(scenario, {}, payload, control)}
+
+    result = reoptimize(
+        scenario,
+        previous,
+        changes,
+        previous_routes=payload.get("previous_routes"),
+        vehicle_capacities=payload.get("vehicle_capacities"),
+        car_file=payload.get("car_file", "car.xlsx"),
+    )
+    if not result["vehicle_plan"]:
+        raise RuntimeError("路径优化未找到满足车辆限制的可行解")
+    return {
+        "mode": "reoptimize",
+        **summarize_hub_solution(result["hub_solution"]),
+        "routes": summarize_routes(result["data"], result["route_solution"], result["vehicle_plan"]),
+        "routes_by_hub": result["routes"],
+    }
+
+
+# ---------------------------------------------------------------- 服务端
+
+class OptimizationService:
+    """asyncio 服务端：解析 NDJSON 请求，把计算提交到进程池，并把进度与结果写回发起请求的连接"""
+
+    def __init__(self, workers: Optional[int] = None, progress_interval: float = 0.2):
+        self.workers = workers or os.cpu_count() or 1
+        self.progress_interval = progress_interval
+        self.networks: Dict[str, Dict] = {}
+        self.jobs: Dict[str, Dict] = {}
+        self._versions = itertools.count(1)
+        self._request_ids = itertools.count(1)
+        self._manager = None
+        self._pool = None
+        self._events = None
+        self._cancelled = None
+        self._pump = None
+        self._loop = None
+        self._server = None
+        self._stopped = None
+
+    # -- 生命周期
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, unix_path: Optional[str] = None):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._manager = multiprocessing.Manager()
+        self._events = self._manager.Queue()
+        self._cancelled = self._manager.dict()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self._events, self._cancelled, self.progress_interval),
+        )
+        self._pump = threading.Thread(target=self._pump_events, name="service-events", daemon=True)
+        self._pump.start()
+
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host=host, port=port)
+        return self._server
+
+    async def serve_forever(self) -> None:
+        await self._stopped.wait()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for job in list(self.jobs.values()):
+            self._cancel_job(job)
+        if self._pool is not None:
+            await self._loop.run_in_executor(None, self._pool.shutdown)
+        if self._events is not None:
+            self._events.put(None)
+            self._pump.join(timeout=5)
+        if self._manager is not None:
+            self._manager.shutdown()
+
+    def _pump_events(self) -> None:
+        """后台线程：把工作进程上报的进度转发到事件循环"""
+        while True:
+            try:
+                item = self._events.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            self._loop.call_soon_threadsafe(self._forward_progress, *item)
+
+    def _forward_progress(self, job_id: str, entry: Dict) -> None:
+        job = self.jobs.get(job_id)
+        if job is not None:
+            job["send"]({"id": job_id, "event": "progress", **entry})
+
+    # -- 连接与请求
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # 本连接发起且尚未完成的请求：{请求ID: 任务}，任务完成时由 _finish 移除
+        owned_jobs: Dict[str, Dict] = {}
+
+        def send(message: Dict) -> None:
+            if not writer.is_closing():
+                writer.write((json.dumps(message, ensure_ascii=False, default=json_default) + "\n").encode("utf-8"))
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("请求必须是 JSON 对象")
+                except ValueError as exc:
+                    send({"id": None, "event": "error", "error": f"无法解析请求: {exc}"})
+                    continue
+                self._dispatch(request, send, owned_jobs)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # 服务关闭时仍在读取的连接任务会被取消，按正常断开处理
+            pass
+        finally:
+            # 连接断开时取消该连接发起且尚未完成的请求；按任务对象比较，不会误取消其他连接复用同一ID的请求
+            for job in list(owned_jobs.values()):
+                if self.jobs.get(job["id"]) is job:
+                    self._cancel_job(job)
+            writer.close()
+
+    def _dispatch(self, request: Dict, send, owned_jobs: Dict[str, Dict]) -> None:
+        request_id = request.get("id")
+        if request_id is None:
+            request_id = f"job-{next(self._request_ids)}"
+        request_id = str(request_id)
+        operation = request.get("op")
+
+        try:
+            if operation in JOB_OPERATIONS:
+                self._submit(request_id, operation, request, send, owned_jobs)
+            elif operation == "ping":
+                send({"id": request_id, "event": "result", "result": {"pong": True, "workers": self.workers}})
+            elif operation == "load":
+                asyncio.ensure_future(self._load(request_id, request, send))
+            elif operation == "networks":
+                send({"id": request_id, "event": "result", "result": {
+                    name: entry["summary"] for name, entry in self.networks.items()
+                }})
+            elif operation == "jobs":
+                send({"id": request_id, "event": "result", "result": {
+                    job_id: {"op": job["op"], "network": job["network"], "elapsed": time.time() - job["started"]}
+                    for job_id, job in self.jobs.items()
+                }})
+            elif operation == "cancel":
+                target = str(request.get("target"))
+                job = self.jobs.get(target)
+                send({"id": request_id, "event": "result", "result": {"target": target, "found": job is not None}})
+                if job is not None:
+                    self._cancel_job(job)
+            elif operation == "shutdown":
+                send({"id": request_id, "event": "result", "result": {"stopping": True}})
+                self._stopped.set()
+            else:
+                raise ValueError(f"未知的操作: {operation}")
+        except (KeyError, TypeError, ValueError) as exc:
+            send({"id": request_id, "event": "error", "error": str(exc)})
+
+    async def _load(self, request_id: str, request: Dict, send) -> None:
+        name = str(request.get("network", "default"))
+        try:
+            if request.get("locations") is not None:
+                locations = [_location_from_dict(entry) for entry in request["locations"]]
+            elif request.get("path"):
+                locations = await self._loop.run_in_executor(None, load_locations_from_file, request["path"])
+            else:
+                raise ValueError("load 需要 path 或 locations")
+            if not locations:
+                raise ValueError("未能加载有效地点数据")
+        except (OSError, ValueError) as exc:
+            send({"id": request_id, "event": "error", "error": str(exc)})
+            return
+
+        version = next(self._versions)
+        types = [str(loc.type).lower() for loc in locations]
+        summary = {
+            "version": version,
+            "manufacturers": types.count("manufacturer"),
+            "wholesalers": types.count("wholesaler"),
+            "stores": types.count("store"),
+        }
+        self.networks[name] = {"version": version, "locations": locations, "summary": summary}
+        send({"id": request_id, "event": "result", "result": {"network": name, **summary}})
+
+        # 预热：各工作进程提前建立网络与距离矩阵（尽力而为，由进程池决定任务落在哪个进程）
+        if request.get("warm", True):
+            for _ in range(self.workers):
+                self._pool.submit(_preload, name, version, locations).add_done_callback(lambda f: f.exception())
+
+    def _submit(self, request_id: str, operation: str, request: Dict, send, owned_jobs: Dict[str, Dict]) -> None:
+        if request_id in self.jobs:
+            raise ValueError(f"请求 {request_id} 仍在运行")
+        name = str(request.get("network", "default"))
+        if name not in self.networks:
+            raise ValueError(f"未加载的网络: {name}")
+        entry = self.networks[name]
+
+        self._cancelled.pop(request_id, None)
+        future = self._pool.submit(
+            _run_job, request_id, operation, (name, entry["version"]), entry["locations"], request
+        )
+        job = {"id": request_id, "op": operation, "network": name, "future": future, "send": send,
+               "started": time.time(), "owner": owned_jobs}
+        self.jobs[request_id] = job
+        owned_jobs[request_id] = job
+        send({"id": request_id, "event": "accepted", "op": operation, "network": name})
+        # 结果由 _finish 统一取出，这里只把完成通知切回事件循环线程
+        future.add_done_callback(lambda _: self._loop.call_soon_threadsafe(self._finish, job))
+
+    def _cancel_job(self, job: Dict) -> None:
+        if not job["future"].cancel():
+            self._cancelled[job["id"]] = True
+
+    def _finish(self, job: Dict) -> None:
+        self.jobs.pop(job["id"], None)
+        self._cancelled.pop(job["id"], None)
+        if job["owner"].get(job["id"]) is job:
+            del job["owner"][job["id"]]
+        future = job["future"]
+        try:
+            result = future.result()
+        except (CancelledError, OptimizationCancelled):
+            job["send"]({"id": job["id"], "event": "cancelled"})
+        except Exception as exc:
+            job["send"]({"id": job["id"], "event": "error", "error": f"{type(exc).__name__}: {exc}"})
+        else:
+            job["send"]({"id": job["id"], "event": "result", "result": result})
+
+
+# ---------------------------------------------------------------- 命令行
+
+async def _serve(args) -> None:
+    service = OptimizationService(workers=args.workers, progress_interval=args.progress_interval)
+    server = await service.start(args.host, args.port, args.unix)
+    address = args.unix or f"{args.host}:{args.port}"
+    print(f"优化服务已启动: {address}（{service.workers} 个工作进程）", flush=True)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+        if args.unix:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(args.unix)
+
+
+async def _send(args) -> int:
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    request = json.loads(args.request)
+    request.setdefault("id", "cli")
+    writer.write((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+    await writer.drain()
+
+    exit_code = 0
+    while True:
+        line = await reader.readline()
+        if not line:
+            exit_code = 1
+            break
+        print(line.decode("utf-8").rstrip(), flush=True)
+        message = json.loads(line)
+        if message.get("id") == request["id"] and message.get("event") in TERMINAL_EVENTS:
+            exit_code = 0 if message["event"] == "result" else 1
+            break
+    writer.close()
+    return exit_code
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="本地常驻优化服务")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, help_text in (("serve", "启动服务"), ("send", "发送一个请求并输出全部事件")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--host", default="127.0.0.1", help="监听/连接地址 (默认: 127.0.0.1)")
+        sub.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"端口 (默认: {DEFAULT_PORT})")
+        sub.add_argument("--unix", default=None, help="改用 Unix 套接字路径")
+        if name == "serve":
+            sub.add_argument("--workers", type=int, default=None, help="工作进程数 (默认: CPU 核数)")
+            sub.add_argument("--progress-interval", type=float, default=0.2, help="进度上报最小间隔秒数 (默认: 0.2)")
+        else:
+            sub.add_argument("request", help="JSON 请求")
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "serve":
+            asyncio.run(_serve(args))
+            return 0
+        return asyncio.run(_send(args))
+    except KeyboardInterrupt:
+        return 130
+    except (OSError, ValueError) as exc:
+        print(f"服务请求失败: {exc}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
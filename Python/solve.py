@@ -1,12 +1,22 @@
 import numpy as np
 import random
 import math
-import matplotlib.pyplot as plt
-import pandas as pd
 import os
-from matplotlib.font_manager import FontProperties
-from matplotlib import rcParams
+import sys
+import time
+
+from anytime import STOP_REASONS, OptimizationCancelled, SearchBudget
+from profiling import count, phase, profiled
+from spatial_index import SpatialIndex
+from telemetry import TelemetrySink
+
+# plot=True 且未传入 telemetry 时收敛图保留的最多采样点数
+CONVERGENCE_PLOT_POINTS = 5000
+
 def set_matplotlib_chinese_font_to_pingfang():
+    from matplotlib import rcParams
+    from matplotlib.font_manager import FontProperties
+
     # 字体路径
     pingfang_path = "/System/Library/Fonts/Hiragino Sans GB.ttc"
 
@@ -24,25 +34,39 @@ def set_matplotlib_chinese_font_to_pingfang():
     print(f"matplotlib 已设置为中文字体：{font_prop.get_name()}")
 
 
-#set_matplotlib_chinese_font_to_pingfang()
-# plt.rcParams['font.sans-serif'] = ['SimHei']
-plt.rcParams['axes.unicode_minus'] = False    # 解决负号显示问题
+def _pyplot():
+    """首次绘图时才导入 matplotlib（导入耗时较长，求解与批处理不需要它）"""
+    import matplotlib.pyplot as plt
+
+    #set_matplotlib_chinese_font_to_pingfang()
+    # plt.rcParams['font.sans-serif'] = ['SimHei']
+    plt.rcParams['axes.unicode_minus'] = False    # 解决负号显示问题
+    return plt
+
+def load_vehicle_capacities(filename='car.xlsx'):
+    """从车辆信息表读取各车辆容量"""
+    import pandas as pd
+
+    car_df = pd.read_excel(filename)
+    return car_df['容量'].astype(float).tolist()
+
+def create_data_model(hubs_file='optimized_hubs.xlsx', car_file='car.xlsx', locations_file='locations.csv',
+                      unit_price=3, vehicle_fixed_cost=500):
+    """创建问题数据；读取失败时打印原因并返回不完整的数据（缺少 distance_matrix）"""
+    import pandas as pd
 
-def create_data_model():
-    """创建问题数据"""
     data = {}
     try:
         # 读取仓库坐标
-        warehouse_df = pd.read_excel('optimized_hubs.xlsx')
+        warehouse_df = pd.read_excel(hubs_file)
         warehouse_coords = list(zip(warehouse_df['横坐标 (X)'], warehouse_df['纵坐标 (Y)']))
 
         # 读取车辆信息
-        car_df = pd.read_excel('car.xlsx')
-        data['vehicle_capacities'] = car_df['容量'].astype(float).tolist()
-        data['num_vehicles'] = len(car_df)
+        data['vehicle_capacities'] = load_vehicle_capacities(car_file)
+        data['num_vehicles'] = len(data['vehicle_capacities'])
 
         # 从 locations.csv 中提取所有 store 节点
-        locations_df = pd.read_csv('locations.csv', encoding='utf-8')
+        locations_df = pd.read_csv(locations_file, encoding='utf-8')
         type_series = locations_df['类型'].astype(str).str.lower()
         store_df = locations_df[type_series == 'store'].copy()
         if store_df.empty:
@@ -72,25 +96,28 @@ def create_data_model():
         # 记录仓库与门店索引映射
         data['depots'] = list(range(len(warehouse_coords)))
         data['store_ids'] = store_df['ID'].tolist()
+        if '序号' in warehouse_df.columns:
+            data['depot_ids'] = warehouse_df['序号'].astype(str).tolist()
 
         print(f"读取到{len(warehouse_coords)}个仓库和{len(store_df)}个便利店节点的数据")
 
         # 计算曼哈顿距离矩阵
-        data['distance_matrix'] = []
-        for i in range(len(data['coordinates'])):
-            row = []
-            for j in range(len(data['coordinates'])):
-                x1, y1 = data['coordinates'][i]
-                x2, y2 = data['coordinates'][j]
-                distance = abs(x1 - x2) + abs(y1 - y2)
-                row.append(distance)
-            data['distance_matrix'].append(row)
+        with phase('distance_build'):
+            data['distance_matrix'] = []
+            for i in range(len(data['coordinates'])):
+                row = []
+                for j in range(len(data['coordinates'])):
+                    x1, y1 = data['coordinates'][i]
+                    x2, y2 = data['coordinates'][j]
+                    distance = abs(x1 - x2) + abs(y1 - y2)
+                    row.append(distance)
+                data['distance_matrix'].append(row)
 
         # 配送单价（元/吨·公里）
-        data['unit_price'] = 3  # 假设每吨每公里价格
+        data['unit_price'] = unit_price  # 假设每吨每公里价格
 
         # 车辆固定使用成本（元）
-        data['vehicle_fixed_cost'] = 500
+        data['vehicle_fixed_cost'] = vehicle_fixed_cost
 
         print('成功从文件导入数据')
 
@@ -99,6 +126,7 @@ def create_data_model():
 
     return data
 
+@profiled('cvrp.split')
 def split_route(data, route, depot_index=0, max_vehicles=None, reorder_by_angle=False):
     "按原始顺序拆分路径，必要时可选择角度重排"
     if max_vehicles is None:
@@ -187,6 +215,7 @@ def clone_vehicle_plan(plan):
     }
 
 
+@profiled('cvrp.cost_evaluation')
 def evaluate_solution(data, depot_routes):
     """评估给定仓库-节点分配的成本，若违反车辆上限则返回None"""
     plan = build_vehicle_plan(data, depot_routes)
@@ -314,13 +343,14 @@ def calculate_route_cost(data, vehicle_routes):
     return total_cost
 
 
+@profiled('cvrp.neighbor_generation')
 def generate_neighbor_solution(current_solution, data, attempts=50):
     """生成邻域解：尝试多种局部操作并返回第一个可行解或None
     操作包括：仓库间交换、仓库内交换、迁移节点、仓库内2-opt。
     为保证可行性，对每个候选解调用 split_route 验证。
     """
     depots = list(current_solution.keys())
-    for _ in range(attempts):
+    for attempt in range(attempts):
         neighbor = {d: current_solution[d].copy() for d in depots}
         op = random.choice(['swap_between', 'swap_within', 'relocate', '2opt'])
 
@@ -355,30 +385,33 @@ def generate_neighbor_solution(current_solution, data, attempts=50):
         # 可行性验证：需满足容量及全局车辆上限
         plan = build_vehicle_plan(data, neighbor)
         if plan is not None:
+            count('cvrp.neighbor_attempts_rejected', attempt)
             return neighbor
 
+    count('cvrp.neighbor_attempts_rejected', attempts)
     return None
 
-def solve_cvrp():
-    """使用模拟退火算法解决多仓库CVRP问题"""
-    data = create_data_model()
-    
-    # 模拟退火参数
-    initial_temp = 100
-    cooling_rate = 0.995
-    min_temp = 1
-    iterations_per_temp = 30  # 每个温度尝试次数，提高探索能力
-    max_iterations = 20000    # 保护性上限，防止无限循环
-    
-    # 生成初始解（为每个仓库生成初始路径）
+def nearest_depots(data, nodes):
+    """通过空间索引批量查询每个节点的最近仓库（曼哈顿距离）"""
+    if not nodes:
+        return {}
+    depot_index = SpatialIndex([data['coordinates'][d] for d in data['depots']], ids=data['depots'])
+    return dict(zip(nodes, depot_index.nearest_ids([data['coordinates'][n] for n in nodes])))
+
+def build_initial_solution(data):
+    """按初始分配（或最近仓库）分配节点，并在每个仓库内按角度排序得到初始解"""
     all_nodes = list(range(len(data['depots']), len(data['distance_matrix'])))
     
-    # 按最近仓库分配节点
+    # 优先沿用中转点优化给出的门店分配，其余节点按最近仓库分配
+    seeded_depots = data.get('initial_depot_assignments') or {}
     depot_routes = {depot: [] for depot in data['depots']}
+    unseeded_nodes = [node for node in all_nodes if seeded_depots.get(node) not in depot_routes]
+    closest_depots = nearest_depots(data, unseeded_nodes)
     for node in all_nodes:
-        closest_depot = min(data['depots'], 
-                           key=lambda d: data['distance_matrix'][d][node])
-        depot_routes[closest_depot].append(node)
+        depot = seeded_depots.get(node)
+        if depot not in depot_routes:
+            depot = closest_depots[node]
+        depot_routes[depot].append(node)
     
     # 对每个仓库的节点按角度排序
     current_solution = {}
@@ -393,47 +426,130 @@ def solve_cvrp():
         # 按角度排序
         node_angles.sort(key=lambda x: x[1])
         current_solution[depot] = [node for node, _ in node_angles]
-    
-    best_solution = {}
-    best_plan = {}
-    current_cost, current_plan = evaluate_solution(data, current_solution)
+
+    return current_solution
+
+@profiled('cvrp.solve')
+def solve_cvrp(data=None, plot=True, initial_solution=None, initial_temp=100, cooling_rate=0.995,
+               min_temp=1, iterations_per_temp=30, max_iterations=20000, robust_evaluator=None,
+               telemetry=None, checkpoint=None, time_limit=None, stall_iterations=None, stall_seconds=None,
+               incumbent=None, cancel_token=None):
+    """使用模拟退火算法解决多仓库CVRP问题
+
+    data 为空时从文件构建数据模型；传入内存中的数据模型（如 pipeline 构建的）则不再读取文件。
+    initial_solution 为 {仓库索引: 节点列表} 时直接以其作为初始解（热启动）。
+    robust_evaluator 为 robust.RobustRouteEvaluator 时按需求情景的稳健目标（期望成本或 CVaR 加超载惩罚）搜索。
+    telemetry 为 telemetry.TelemetrySink 时按其采样率记录 (当前成本, 最优成本, 温度)，由调用方负责关闭；
+    plot 为 True 且未传入 telemetry 时使用内存中的有界缓冲，求解结束后据此绘制收敛图。
+    checkpoint 为 checkpoint.Checkpointer 时在每个温度段结束后按其间隔保存搜索状态；
+    检查点文件已存在且参数一致时从中断处继续（忽略 initial_solution），正常结束后删除检查点。
+    time_limit 为墙钟秒数预算；stall_iterations / stall_seconds 为最优解连续多少次迭代 / 多少秒无改进即停止。
+    incumbent 为 anytime.Incumbent 时在最优解改进时更新 {'routes': ..., 'vehicle_plan': ...}，求解期间可随时读取。
+    cancel_token 为 anytime.CancellationToken 时，取消后在下一次迭代前停止并抛出 OptimizationCancelled（保留检查点）。
+    """
+    if data is None:
+        data = create_data_model()
+
+    evaluate = evaluate_solution if robust_evaluator is None else robust_evaluator.evaluate_solution
+    budget = SearchBudget.from_options(time_limit, stall_iterations, stall_seconds, cancel_token)
+
+    fingerprint = {
+        'initial_temp': initial_temp, 'cooling_rate': cooling_rate, 'min_temp': min_temp,
+        'iterations_per_temp': iterations_per_temp, 'max_iterations': max_iterations,
+        'depots': list(data['depots']), 'demands': list(data['demands']),
+        'num_vehicles': data['num_vehicles'], 'robust': robust_evaluator is not None,
+    }
+    # 先恢复检查点（含随机数状态），再决定是否需要构造初始解
+    resumed = checkpoint.begin('cvrp', fingerprint) if checkpoint is not None else None
+    if resumed is not None:
+        return _continue_cvrp(data, evaluate, plot, cooling_rate, min_temp, iterations_per_temp,
+                              max_iterations, telemetry, checkpoint, resumed, budget, incumbent)
+
+    if initial_solution is not None:
+        current_solution = {depot: list(initial_solution.get(depot, [])) for depot in data['depots']}
+    else:
+        current_solution = build_initial_solution(data)
+
+    current_cost, current_plan = evaluate(data, current_solution)
 
     if current_plan is None:
         # 尝试通过邻域扰动修复初始解
         repaired = generate_neighbor_solution(current_solution, data, attempts=1000)
         if repaired is not None:
             current_solution = {d: r.copy() for d, r in repaired.items()}
-            current_cost, current_plan = evaluate_solution(data, current_solution)
+            current_cost, current_plan = evaluate(data, current_solution)
 
     if current_plan is None:
         print("初始解不可行（容量/车辆限制），请检查数据或增加车辆数量。")
         return {}, {}
 
-    best_solution = {depot: route.copy() for depot, route in current_solution.items()}
-    best_plan = clone_vehicle_plan(current_plan)
-    best_cost = current_cost
-    
-    # 记录每一代的成本数据
-    iteration_costs = [current_cost]  # 记录每一代的当前成本
-    best_costs = [best_cost]  # 记录每一代的最优成本
-    temperatures = [initial_temp]  # 记录每一代的温度
-    iteration_count = 0
+    state = {
+        'current_solution': current_solution,
+        'current_plan': current_plan,
+        'current_cost': current_cost,
+        'best_solution': {depot: route.copy() for depot, route in current_solution.items()},
+        'best_plan': clone_vehicle_plan(current_plan),
+        'best_cost': current_cost,
+        'temp': initial_temp,
+        'total_iterations': 0,
+        'moves': (0, 0, 0),
+        'last_improvement': 0,
+    }
+    return _continue_cvrp(data, evaluate, plot, cooling_rate, min_temp, iterations_per_temp,
+                          max_iterations, telemetry, checkpoint, state, budget, incumbent)
+
+
+def _continue_cvrp(data, evaluate, plot, cooling_rate, min_temp, iterations_per_temp, max_iterations,
+                   telemetry, checkpoint, state, budget=None, incumbent=None):
+    """从给定的搜索状态（新建或检查点恢复）运行模拟退火主循环并输出结果"""
+    current_solution = state['current_solution']
+    current_plan = state['current_plan']
+    current_cost = state['current_cost']
+    best_solution = state['best_solution']
+    best_plan = state['best_plan']
+    best_cost = state['best_cost']
+    temp = state['temp']
+    total_iterations = state['total_iterations']
+    moves_proposed, moves_accepted, moves_infeasible = state['moves']
+    last_improvement = state['last_improvement']
+    last_improvement_time = time.monotonic()
+    stop_reason = None
+    if incumbent is not None:
+        incumbent.offer(best_cost, {'routes': best_solution, 'vehicle_plan': best_plan}, total_iterations)
+    
+    # 收敛数据只写入有界的遥测缓冲，不再逐代累积列表。
+    # 仅用于绘图时只记录采样点（0 到 max_iterations 至多 CONVERGENCE_PLOT_POINTS + 1 个）与结束时的一条，
+    # 不额外记录改进点，保证缓冲不会挤掉起始迭代
+    plot_buffer = None
+    if plot and telemetry is None:
+        plot_buffer = telemetry = TelemetrySink(
+            buffer_size=CONVERGENCE_PLOT_POINTS + 2,
+            sample_every=max(1, math.ceil(max_iterations / CONVERGENCE_PLOT_POINTS)),
+        )
+    record_improvements = plot_buffer is None
+    if telemetry is not None:
+        telemetry.record('cvrp', total_iterations, force=True, current_cost=current_cost, best_cost=best_cost,
+                         temperature=temp)
     
     # 模拟退火主循环
-    temp = initial_temp
-    total_iterations = 0
     while temp > min_temp and total_iterations < max_iterations:
         for _ in range(iterations_per_temp):
+            if budget is not None:
+                stop_reason = budget.stop_reason(total_iterations, last_improvement, last_improvement_time)
+                if stop_reason is not None:
+                    break
             total_iterations += 1
-            iteration_count += 1
+            moves_proposed += 1
 
             neighbor_solution = generate_neighbor_solution(current_solution, data, attempts=100)
             if neighbor_solution is None:
                 # 无法生成有效邻域解，跳过本次尝试
+                moves_infeasible += 1
                 continue
 
-            neighbor_cost, neighbor_plan = evaluate_solution(data, neighbor_solution)
+            neighbor_cost, neighbor_plan = evaluate(data, neighbor_solution)
             if neighbor_plan is None:
+                moves_infeasible += 1
                 continue
 
             # 计算成本差
@@ -451,7 +567,9 @@ def solve_cvrp():
                 if random.random() < prob:
                     accept = True
 
+            improved = False
             if accept:
+                moves_accepted += 1
                 current_solution = {d: r.copy() for d, r in neighbor_solution.items()}
                 current_plan = clone_vehicle_plan(neighbor_plan)
                 current_cost = neighbor_cost
@@ -461,20 +579,74 @@ def solve_cvrp():
                     best_solution = {depot: route.copy() for depot, route in current_solution.items()}
                     best_plan = clone_vehicle_plan(neighbor_plan)
                     best_cost = current_cost
-
-            # 记录当前迭代的成本数据
-            iteration_costs.append(current_cost)
-            best_costs.append(best_cost)
-            temperatures.append(temp)
+                    improved = True
+                    last_improvement = total_iterations
+                    last_improvement_time = time.monotonic()
+                    if incumbent is not None:
+                        incumbent.offer(best_cost, {'routes': best_solution, 'vehicle_plan': best_plan},
+                                        total_iterations)
+
+            # 记录当前迭代的成本数据（按采样率；外部遥测在最优解改进时总是记录）
+            if telemetry is not None and ((improved and record_improvements) or telemetry.wants(total_iterations)):
+                telemetry.record('cvrp', total_iterations, force=True, current_cost=current_cost,
+                                 best_cost=best_cost, temperature=temp)
 
             if total_iterations >= max_iterations:
                 break
 
+        if stop_reason is not None:
+            break
+
         # 降温
         temp *= cooling_rate
-    
+
+        # 温度段之间是安全点：此时保存的状态与随机数足以精确地继续后续迭代
+        if checkpoint is not None:
+            checkpoint.maybe_save(total_iterations, lambda: {
+                'current_solution': current_solution,
+                'current_plan': current_plan,
+                'current_cost': current_cost,
+                'best_solution': best_solution,
+                'best_plan': best_plan,
+                'best_cost': best_cost,
+                'temp': temp,
+                'total_iterations': total_iterations,
+                'moves': (moves_proposed, moves_accepted, moves_infeasible),
+                'last_improvement': last_improvement,
+            })
+
+    if incumbent is not None:
+        incumbent.finish(stop_reason)
+    if stop_reason == 'cancelled':
+        if telemetry is not None:
+            telemetry.flush()
+        raise OptimizationCancelled(budget.cancel_token.reason or "路径优化已取消")
+    if checkpoint is not None:
+        checkpoint.complete()
+    if stop_reason is not None:
+        count('cvrp.early_stops')
+        print(f"提前停止（{STOP_REASONS[stop_reason]}），共迭代 {total_iterations} 次")
+
+    count('cvrp.moves_proposed', moves_proposed)
+    count('cvrp.moves_accepted', moves_accepted)
+    count('cvrp.moves_infeasible', moves_infeasible)
+    
+    if telemetry is not None:
+        telemetry.flush()
+
     # 绘制模拟退火算法收敛图
-    plot_sa_convergence(iteration_costs, best_costs, temperatures, iteration_count)
+    if plot_buffer is not None:
+        if not plot_buffer.wants(total_iterations):
+            plot_buffer.record('cvrp', total_iterations, force=True, current_cost=current_cost,
+                               best_cost=best_cost, temperature=temp)
+        samples = plot_buffer.records('cvrp')
+        plot_sa_convergence(
+            [entry['current_cost'] for entry in samples],
+            [entry['best_cost'] for entry in samples],
+            [entry['temperature'] for entry in samples],
+            total_iterations,
+            iterations=[entry['iteration'] for entry in samples],
+        )
     
     # 输出最优解
     total_vehicles = 0
@@ -506,6 +678,7 @@ def solve_cvrp():
     
     return best_solution, best_plan
 
+@profiled('cvrp.crossing_check')
 def has_crossing_paths_simple(data, vehicle_routes):
     "简化版交叉检测：只检查主要路径段"
     if len(vehicle_routes) < 2:
@@ -586,6 +759,7 @@ def visualize_solution(data, solution, vehicle_plan=None):
     y = [coord[1] for coord in coordinates]
     
     # 创建正方形图形
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(10, 10))
     
     # 设置更密集的网格线
@@ -687,6 +861,7 @@ def plot_vehicle_utilization(data, vehicle_routes):
     utilization_rates = [item[1] for item in utilizations]
     
     # 创建图形
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(10, 6))
     
     # 绘制横向柱状图
@@ -735,13 +910,15 @@ def plot_vehicle_utilization(data, vehicle_routes):
     print(f"最高利用率: {max_utilization:.1f}% (车辆 {utilization_rates.index(max_utilization) + 1})")
     print(f"最低利用率: {min_utilization:.1f}% (车辆 {utilization_rates.index(min_utilization) + 1})")
 
-def plot_sa_convergence(iteration_costs, best_costs, temperatures, iteration_count):
-    """绘制模拟退火算法成本收敛图"""
+def plot_sa_convergence(iteration_costs, best_costs, temperatures, iteration_count, iterations=None):
+    """绘制模拟退火算法成本收敛图；iterations 为各采样点对应的迭代编号，缺省时按顺序编号"""
     # 创建图形
+    plt = _pyplot()
     fig, ax = plt.subplots(figsize=(12, 6))
     
     # 绘制成本收敛图
-    iterations = range(len(iteration_costs))
+    if iterations is None:
+        iterations = range(len(iteration_costs))
     ax.plot(iterations, iteration_costs, 'b-', linewidth=1, alpha=0.7, label='当前成本')
     ax.plot(iterations, best_costs, 'r-', linewidth=2, label='最优成本')
     
@@ -781,8 +958,14 @@ def plot_sa_convergence(iteration_costs, best_costs, temperatures, iteration_cou
     print(f"成本优化幅度: {improvement:.1f}%")
 
 if __name__ == '__main__':
+    # 带参数运行时等同于 cli.py route（非交互式批处理），否则按默认文件求解并绘图
+    if len(sys.argv) > 1:
+        from cli import main as cli_main
+
+        sys.exit(cli_main(["route", *sys.argv[1:]]))
+
     data = create_data_model()
-    solution, vehicle_plan = solve_cvrp()
+    solution, vehicle_plan = solve_cvrp(data)
 
     # 从最优执行计划提取车辆路径用于打印和利用率分析
     vehicle_routes = []
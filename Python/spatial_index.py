@@ -0,0 +1,63 @@
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 度量名称到 Minkowski p 值的映射，网络距离默认使用曼哈顿距离
+METRICS = {
+    "manhattan": 1,
+    "l1": 1,
+    "euclidean": 2,
+    "l2": 2,
+}
+
+
+class SpatialIndex:
+    """基于 KD 树的二维空间索引，支持 L1/L2 度量下的批量 k 近邻与半径查询"""
+
+    def __init__(self, points, ids: Optional[Sequence] = None, metric: str = "manhattan"):
+        metric_key = (metric or "").lower()
+        if metric_key not in METRICS:
+            raise ValueError(f"不支持的距离度量: {metric}")
+
+        self.points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if len(self.points) == 0:
+            raise ValueError("空间索引至少需要一个点")
+
+        self.ids = list(ids) if ids is not None else list(range(len(self.points)))
+        if len(self.ids) != len(self.points):
+            raise ValueError("ids 与坐标数量不一致")
+
+        self.metric = metric_key
+        self._p = METRICS[metric_key]
+        # scipy.spatial 导入耗时较长，首次建立索引时才加载
+        from scipy.spatial import cKDTree
+
+        self._tree = cKDTree(self.points)
+
+    @classmethod
+    def from_locations(cls, locations: Iterable, metric: str = "manhattan") -> "SpatialIndex":
+        """由 Location 对象序列构建索引，索引编号与地点ID一一对应"""
+        locations = list(locations)
+        points = [(loc.x, loc.y) for loc in locations]
+        return cls(points, ids=[loc.id for loc in locations], metric=metric)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def query(self, points, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """批量 k 近邻查询，返回 (距离, 索引位置)；k=1 时为一维数组，否则形状为 (n, k)"""
+        query_points = np.asarray(points, dtype=float).reshape(-1, 2)
+        k = max(1, min(int(k), len(self.ids)))
+        distances, indices = self._tree.query(query_points, k=k, p=self._p, workers=-1)
+        return np.asarray(distances), np.asarray(indices)
+
+    def nearest_ids(self, points) -> List:
+        """返回每个查询点最近设施的ID"""
+        _, indices = self.query(points, k=1)
+        return [self.ids[idx] for idx in indices]
+
+    def query_radius(self, points, radius: float) -> List[np.ndarray]:
+        """批量半径查询，返回每个查询点半径内(含边界)所有点的索引位置"""
+        query_points = np.asarray(points, dtype=float).reshape(-1, 2)
+        neighbors = self._tree.query_ball_point(query_points, r=radius, p=self._p, workers=-1)
+        return [np.asarray(sorted(items), dtype=int) for items in neighbors]
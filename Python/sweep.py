@@ -0,0 +1,260 @@
+import argparse
+import inspect
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from locations import load_locations_from_file
+from network_model import LogisticsNetwork
+from optimizers.base_optimizer import get_optimizer
+from optimizers.cost_model import HubCostModel
+from optimizers.kmeans_sa_optimizer import KMeansSimulatedAnnealingOptimizer
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# 工作进程内共享的预计算状态，由 _init_worker 设置（fork 时直接继承，spawn 时每个进程只传输一次）
+_WORKER_STATE: Dict = {}
+
+RESULT_COLUMNS = [
+    "scenario", "chain", "optimizer", "hub_count", "active_hubs", "total_cost",
+    "build_cost", "supplier_cost", "store_cost", "runtime", "warm_started", "error",
+]
+
+
+def expand_grid(grid: Dict[str, Iterable]) -> List[Dict]:
+    """将 {参数名: 取值列表} 按笛卡尔积展开为场景列表，最后一个参数变化最快"""
+    if not grid:
+        return [{}]
+    names = list(grid)
+    values = [list(grid[name]) for name in names]
+    if any(not options for options in values):
+        raise ValueError("参数网格中存在空的取值列表")
+    return [dict(zip(names, combination)) for combination in product(*values)]
+
+
+def _scenario_chains(scenarios: List[Dict], grid_names: List[str]) -> List[List[Tuple[int, Dict]]]:
+    """除最后一个参数外其余取值相同的相邻场景组成一条链，链内依次热启动，链之间可并行"""
+    chains: List[List[Tuple[int, Dict]]] = []
+    outer_names = grid_names[:-1]
+    previous_key = None
+    for index, scenario in enumerate(scenarios):
+        key = tuple(repr(scenario.get(name)) for name in outer_names)
+        if not chains or key != previous_key:
+            chains.append([])
+        chains[-1].append((index, scenario))
+        previous_key = key
+    return chains
+
+
+def run_sweep(
+    network: LogisticsNetwork,
+    grid: Dict[str, Iterable],
+    optimizer: str = "kmeans_sa",
+    workers: Optional[int] = None,
+    warm_start: bool = True,
+    base_options: Optional[Dict] = None,
+    output: Optional[str] = None,
+) -> "pd.DataFrame":
+    """对参数网格中的每个场景运行中转点优化，返回每个场景一行的结果表
+
+    grid 的键可以是 unit_transport_cost、hub_counts 或优化器 optimize 的任意关键字参数。
+    距离矩阵、各单位运输成本下的成本模型以及各中转点数量的 K-means 聚类只计算一次并在场景间共享
+    （base_options 中 share_clusterings 为 False 时聚类不共享，每个组合各自计算）；
+    warm_start 为 True 时链内每个场景以前一场景的最佳方案热启动；workers 大于1时各链在多个进程中并行。
+    output 指定时结果另存为 CSV。
+    """
+    if not isinstance(network, LogisticsNetwork):
+        raise TypeError("network 必须是 LogisticsNetwork 类型")
+
+    optimizer_cls = get_optimizer(optimizer)
+    base_options = dict(base_options or {})
+    scenarios = expand_grid(grid)
+
+    accepted = inspect.signature(optimizer_cls.optimize).parameters
+    requested = {name for scenario in scenarios for name in scenario} | set(base_options)
+    unknown = sorted(requested - set(accepted))
+    if unknown:
+        raise ValueError(f"优化器 {optimizer} 不支持参数: {', '.join(unknown)}")
+
+    # 共享预计算：距离矩阵、各单位运输成本的成本模型、各中转点数量的聚类
+    if not network.distance_matrix:
+        network.calculate_distances()
+    for unit_cost in sorted({_option(scenario, base_options, "unit_transport_cost", 1.0) for scenario in scenarios}):
+        HubCostModel.for_network(network, unit_transport_cost=unit_cost)
+
+    if ("clusterings" in accepted and "clusterings" not in base_options
+            and base_options.get("share_clusterings", True)):
+        hub_counts = set()
+        for scenario in scenarios:
+            counts = _option(scenario, base_options, "hub_counts", None)
+            hub_counts.update(counts if counts is not None else range(1, len(network.wholesalers) + 1))
+        restarts = max(_option(scenario, base_options, "kmeans_restarts", 5) for scenario in scenarios)
+        base_options["clusterings"] = KMeansSimulatedAnnealingOptimizer.precompute_clusterings(
+            network, sorted(hub_counts), restarts
+        )
+
+    chains = _scenario_chains(scenarios, list(grid))
+    use_warm_start = warm_start and optimizer_cls.supports_warm_start
+    state = {
+        "network": network,
+        "optimizer": optimizer,
+        "base_options": base_options,
+        "warm_start": use_warm_start,
+    }
+
+    if workers is not None and workers > 1 and len(chains) > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(state,)) as pool:
+            chain_rows = list(pool.map(_run_chain, range(len(chains)), chains))
+    else:
+        _init_worker(state)
+        chain_rows = [_run_chain(chain_index, chain) for chain_index, chain in enumerate(chains)]
+
+    import pandas as pd
+
+    rows = sorted((row for rows in chain_rows for row in rows), key=lambda row: row["scenario"])
+    parameter_columns = list(dict.fromkeys(name for scenario in scenarios for name in scenario))
+    table = pd.DataFrame(rows, columns=RESULT_COLUMNS[:2] + parameter_columns + RESULT_COLUMNS[2:])
+
+    if output:
+        table.to_csv(output, index=False, encoding="utf-8-sig")
+    return table
+
+
+def _option(scenario: Dict, base_options: Dict, name: str, default):
+    return scenario.get(name, base_options.get(name, default))
+
+
+def _init_worker(state: Dict) -> None:
+    _WORKER_STATE.clear()
+    _WORKER_STATE.update(state)
+
+
+def _run_chain(chain_index: int, chain: List[Tuple[int, Dict]]) -> List[Dict]:
+    network = _WORKER_STATE["network"]
+    optimizer_cls = get_optimizer(_WORKER_STATE["optimizer"])
+    base_options = _WORKER_STATE["base_options"]
+
+    rows = []
+    previous_best = None
+    for scenario_index, scenario in chain:
+        options = {**base_options, **scenario}
+        warm_started = bool(_WORKER_STATE["warm_start"] and previous_best)
+        if warm_started:
+            options["warm_start"] = previous_best
+
+        row = {
+            "scenario": scenario_index,
+            "chain": chain_index,
+            **{name: _format_value(value) for name, value in scenario.items()},
+            "optimizer": optimizer_cls.name,
+            "warm_started": warm_started,
+            "error": None,
+        }
+
+        start_time = time.time()
+        try:
+            best_solution, _ = optimizer_cls.optimize(network, **options)
+        except (RuntimeError, ValueError) as exc:
+            row.update(runtime=time.time() - start_time, error=str(exc))
+            rows.append(row)
+            continue
+
+        row.update(
+            runtime=time.time() - start_time,
+            hub_count=best_solution["hub_count"],
+            active_hubs=",".join(best_solution["active_hubs"]),
+            total_cost=best_solution["total_cost"],
+            build_cost=best_solution["build_cost"],
+            supplier_cost=best_solution["supplier_cost"],
+            store_cost=best_solution["store_cost"],
+        )
+        rows.append(row)
+        previous_best = best_solution
+
+    return rows
+
+
+def _format_value(value):
+    if isinstance(value, (list, tuple, range)):
+        return ",".join(str(item) for item in value)
+    return value
+
+
+def _parse_scalar(text: str):
+    lowered = text.strip().lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered in ("none", "all"):
+        return None
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            continue
+    return text.strip()
+
+
+def _parse_hub_counts(text: str) -> Optional[List[int]]:
+    """解析中转点数量集合："3" -> [3]，"1-3" -> [1, 2, 3]，"all" -> None（全部数量）"""
+    text = text.strip().lower()
+    if text == "all":
+        return None
+    if "-" in text:
+        low, high = (int(part) for part in text.split("-", 1))
+        return list(range(low, high + 1))
+    return [int(text)]
+
+
+def parse_grid(param_specs: Iterable[str]) -> Dict[str, List]:
+    """解析命令行参数 NAME=V1,V2,... 为参数网格（hub_counts 的每个取值为 "3"、"1-3" 或 "all"）"""
+    grid: Dict[str, List] = {}
+    for spec in param_specs:
+        if "=" not in spec:
+            raise ValueError(f"参数格式应为 NAME=V1,V2,...: {spec}")
+        name, values = spec.split("=", 1)
+        name = name.strip()
+        parse = _parse_hub_counts if name == "hub_counts" else _parse_scalar
+        grid[name] = [parse(value) for value in values.split(",") if value.strip()]
+    return grid
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="中转点选址参数扫描")
+    parser.add_argument("--locations", default="locations.csv", help="地点数据文件 (默认: locations.csv)")
+    parser.add_argument("--optimizer", default="kmeans_sa", help="优化器名称 (默认: kmeans_sa)")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2",
+                        help="参数取值列表，可重复指定；例如 --param unit_transport_cost=0.5,1,2 --param hub_counts=1-3,all")
+    parser.add_argument("--workers", type=int, default=None, help="并行进程数 (默认: 单进程)")
+    parser.add_argument("--no-warm-start", action="store_true", help="不使用相邻场景的结果热启动")
+    parser.add_argument("--output", default="sweep_results.csv", help="结果CSV文件 (默认: sweep_results.csv)")
+    args = parser.parse_args(argv)
+
+    try:
+        grid = parse_grid(args.param)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    locations = load_locations_from_file(args.locations)
+    if not locations:
+        print(f"未能从 {args.locations} 加载有效地点数据", file=sys.stderr)
+        return 1
+
+    network = LogisticsNetwork(locations)
+    table = run_sweep(
+        network,
+        grid,
+        optimizer=args.optimizer,
+        workers=args.workers,
+        warm_start=not args.no_warm_start,
+        output=args.output,
+    )
+    print(table.to_string(index=False))
+    print(f"\n共 {len(table)} 个场景，结果已保存到 {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+"""收敛遥测：有界环形缓冲 + 采样 + 流式输出
+
+求解器只调用 TelemetrySink.record；记录按 sample_every 采样（最优成本改进时总是记录），
+内存中只保留最近 buffer_size 条，同时按批追加到 JSONL / Arrow 文件或逐条交给回调，
+长时间运行时内存占用恒定。另一个进程可以用本模块的 watch / plot 命令实时查看或事后绘图:
+
+    python Python/telemetry.py watch cvrp_telemetry.jsonl
+    python Python/telemetry.py plot cvrp_telemetry.jsonl --source cvrp
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+class TelemetrySink:
+    """遥测记录接收器
+
+    path 以 .arrow 结尾时写 Arrow IPC 流（需要 pyarrow），否则写 JSONL；callback 对每条采样记录调用一次。
+    文件写入按 flush_every 条批量进行并立即刷新到磁盘，外部查看器可以边写边读。
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        callback: Optional[Callable[[Dict], None]] = None,
+        buffer_size: int = 1000,
+        sample_every: int = 1,
+        flush_every: int = 100,
+    ):
+        if buffer_size <= 0:
+            raise ValueError("buffer_size 必须大于0")
+        if sample_every <= 0:
+            raise ValueError("sample_every 必须大于0")
+
+        self.path = path
+        self.callback = callback
+        self.sample_every = int(sample_every)
+        self.flush_every = max(1, int(flush_every))
+        self.buffer = deque(maxlen=buffer_size)
+        self.recorded = 0
+        self._pending: List[Dict] = []
+        self._file = None
+        self._arrow_writer = None
+        self._arrow_schema = None
+        self._closed = False
+
+    def wants(self, iteration: int) -> bool:
+        """该迭代是否落在采样点上；热循环中可先判断再组装记录"""
+        return iteration % self.sample_every == 0
+
+    def record(self, source: str, iteration: int, force: bool = False, **fields) -> None:
+        """记录一条遥测；不在采样点上且未 force 时直接忽略"""
+        if not force and iteration % self.sample_every:
+            return
+        if self._closed:
+            raise RuntimeError("遥测接收器已关闭")
+
+        entry = {"source": source, "iteration": iteration, "time": time.time(), **fields}
+        self.buffer.append(entry)
+        self.recorded += 1
+
+        if self.callback is not None:
+            self.callback(entry)
+        if self.path is not None:
+            self._pending.append(entry)
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+
+    def records(self, source: Optional[str] = None) -> List[Dict]:
+        """环形缓冲中保留的记录（最近 buffer_size 条）"""
+        if source is None:
+            return list(self.buffer)
+        return [entry for entry in self.buffer if entry["source"] == source]
+
+    def flush(self) -> None:
+        if not self._pending or self.path is None:
+            return
+        if self.path.endswith(".arrow"):
+            self._write_arrow(self._pending)
+        else:
+            if self._file is None:
+                self._file = open(self.path, "w", encoding="utf-8")
+            self._file.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in self._pending)
+            self._file.flush()
+        self._pending = []
+
+    def _write_arrow(self, entries: List[Dict]) -> None:
+        try:
+            import pyarrow as pa
+        except ImportError as exc:
+            raise ImportError("写入 Arrow 格式需要安装 pyarrow，或改用 .jsonl 文件") from exc
+
+        if self._arrow_writer is None:
+            table = pa.Table.from_pylist(entries)
+            self._arrow_schema = table.schema
+            self._file = open(self.path, "wb")
+            self._arrow_writer = pa.ipc.new_stream(self._file, self._arrow_schema)
+        else:
+            # 字段以首批记录为准，缺失的字段写为空值
+            table = pa.Table.from_pylist(entries, schema=self._arrow_schema)
+        self._arrow_writer.write_table(table)
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self.flush()
+        if self._arrow_writer is not None:
+            self._arrow_writer.close()
+        if self._file is not None:
+            self._file.close()
+        self._closed = True
+
+    def __enter__(self) -> "TelemetrySink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def read_records(path: str, source: Optional[str] = None) -> List[Dict]:
+    """读取遥测文件（JSONL 或 Arrow）中的全部记录"""
+    if path.endswith(".arrow"):
+        import pyarrow as pa
+
+        with open(path, "rb") as f:
+            entries = pa.ipc.open_stream(f).read_all().to_pylist()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    return [entry for entry in entries if source is None or entry.get("source") == source]
+
+
+def follow(path: str, poll_interval: float = 0.5, idle_timeout: Optional[float] = None) -> Iterator[Dict]:
+    """持续读取正在写入的 JSONL 遥测文件；idle_timeout 秒内没有新记录时结束"""
+    position = 0
+    partial = ""
+    last_update = time.time()
+    while True:
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                f.seek(position)
+                chunk = f.read()
+                position = f.tell()
+            if chunk:
+                last_update = time.time()
+                lines = (partial + chunk).split("\n")
+                partial = lines.pop()
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+                continue
+        if idle_timeout is not None and time.time() - last_update > idle_timeout:
+            return
+        time.sleep(poll_interval)
+
+
+def _format_record(entry: Dict) -> str:
+    fields = " ".join(
+        f"{name}={value:.4g}" if isinstance(value, float) else f"{name}={value}"
+        for name, value in entry.items()
+        if name not in ("source", "iteration", "time")
+    )
+    return f"[{entry.get('source')}] 迭代 {entry.get('iteration')}: {fields}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="查看求解器遥测")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    watch_parser = subparsers.add_parser("watch", help="实时跟踪 JSONL 遥测文件")
+    watch_parser.add_argument("path")
+    watch_parser.add_argument("--interval", type=float, default=0.5, help="轮询间隔秒数 (默认: 0.5)")
+    watch_parser.add_argument("--idle-timeout", type=float, default=None, help="无新记录多少秒后退出 (默认: 一直跟踪)")
+
+    plot_parser = subparsers.add_parser("plot", help="绘制收敛曲线")
+    plot_parser.add_argument("path")
+    plot_parser.add_argument("--source", default="cvrp", help="记录来源 (默认: cvrp)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "watch":
+        try:
+            for entry in follow(args.path, args.interval, args.idle_timeout):
+                print(_format_record(entry), flush=True)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    entries = read_records(args.path, args.source)
+    if not entries:
+        print(f"{args.path} 中没有来源为 {args.source} 的记录", file=sys.stderr)
+        return 1
+
+    from solve import plot_sa_convergence
+
+    plot_sa_convergence(
+        [entry["current_cost"] for entry in entries],
+        [entry["best_cost"] for entry in entries],
+        [entry.get("temperature") for entry in entries],
+        entries[-1]["iteration"],
+        iterations=[entry["iteration"] for entry in entries],
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from anytime import SearchBudget
+from locations import Location
+from network_model import LogisticsNetwork
+from optimizers.batched_annealing import anneal_assignment_array, anneal_hub_subset, batched_simulated_annealing
+from optimizers.cost_model import HubCostModel
+from telemetry import TelemetrySink
+
+
+def _random_instance(seed, hub_count=4, store_count=30):
+    rng = np.random.default_rng(seed)
+    store_costs = rng.uniform(1, 20, size=(hub_count, store_count))
+    initial = np.arange(store_count) % hub_count
+    return store_costs, initial
+
+
+def test_expired_budget_stops_batched_and_scalar_chains():
+    store_costs, initial = _random_instance(0)
+    budget = SearchBudget(time_limit=0)
+    telemetry = TelemetrySink(sample_every=1)
+
+    best_assignments, _ = batched_simulated_annealing(
+        store_costs, np.tile(initial, (4, 1)), 100.0, 0.99, 10000,
+        rng=np.random.default_rng(1), budget=budget, telemetry=telemetry,
+    )
+    assert (best_assignments == initial).all()
+    assert [entry["iteration"] for entry in telemetry.records()] == [0]
+
+    best_assignment, _ = anneal_assignment_array(store_costs, initial, 100.0, 0.99, 10000, budget=budget)
+    assert (best_assignment == initial).all()
+
+
+def test_stall_budget_ends_batched_run_early():
+    store_costs, initial = _random_instance(2)
+    telemetry = TelemetrySink(sample_every=1)
+    batched_simulated_annealing(
+        store_costs, np.tile(initial, (3, 1)), 1.0, 0.9, 5000,
+        rng=np.random.default_rng(3), budget=SearchBudget(stall_iterations=50), telemetry=telemetry,
+    )
+    assert telemetry.records()[-1]["iteration"] < 5000
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_batched_costs_match_cost_model_and_keep_hubs_open(seed):
+    rng = np.random.default_rng(seed)
+    locations = [Location("M1", "供应商", "manufacturer", 0, 0)]
+    locations += [
+        Location(f"W{i}", f"中转点{i}", "wholesaler", *rng.uniform(0, 100, 2), build_cost=float(rng.uniform(0, 50)))
+        for i in range(4)
+    ]
+    locations += [Location(f"S{i}", f"门店{i}", "store", *rng.uniform(0, 100, 2), capacity=1) for i in range(25)]
+    network = LogisticsNetwork(locations)
+    network.calculate_distances()
+    cost_model = HubCostModel.for_network(network)
+
+    hub_subset = ["W0", "W1", "W2", "W3"]
+    store_ids = list(cost_model.stores)
+    hub_idx = cost_model.hub_indices(hub_subset)
+    subset_costs = cost_model.store_costs[np.ix_(hub_idx, cost_model.store_indices(store_ids))]
+    initial = np.arange(len(store_ids)) % len(hub_subset)
+
+    best_assignments, best_costs = batched_simulated_annealing(
+        subset_costs, np.tile(initial, (6, 1)), 50.0, 0.95, 2000, rng=np.random.default_rng(seed),
+    )
+    for assignment, store_cost in zip(best_assignments, best_costs):
+        assert len(np.unique(assignment)) == len(hub_subset)
+        store_assignments = {store_id: hub_subset[pos] for store_id, pos in zip(store_ids, assignment)}
+        breakdown = cost_model.breakdown(hub_subset, store_assignments)
+        assert store_cost + cost_model.fixed_cost(hub_idx) == pytest.approx(breakdown["total_cost"])
+
+    initial_assignment = {store_id: hub_subset[pos] for store_id, pos in zip(store_ids, initial)}
+    store_assignments, breakdown = anneal_hub_subset(
+        cost_model, hub_subset, [initial_assignment], 6, 50.0, 0.95, 2000, rng=np.random.default_rng(seed),
+    )
+    assert set(store_assignments.values()) == set(hub_subset)
+    assert breakdown == cost_model.breakdown(hub_subset, store_assignments)
+    assert breakdown["total_cost"] == pytest.approx(best_costs.min() + cost_model.fixed_cost(hub_idx))
@@ -0,0 +1,77 @@
+import json
+
+from benchmarks.compare import EXIT_INVALID, EXIT_OK, EXIT_REGRESSION, compare_reports, main
+
+
+def _report(throughputs, rss_growths=None, case="kmeans_sa", scale="1k"):
+    samples = []
+    for position, throughput in enumerate(throughputs):
+        sample = {"throughput": {"subsets_per_second": throughput}, "quality": 100.0}
+        if rss_growths is not None:
+            sample["rss_growth_mb"] = rss_growths[position]
+        samples.append(sample)
+    return {"results": [{"case": case, "scale": scale, "samples": samples}]}
+
+
+def _write(tmp_path, name, report):
+    path = tmp_path / name
+    path.write_text(json.dumps(report), encoding="utf-8")
+    return str(path)
+
+
+def _by_metric(comparisons):
+    return {item.metric: item for item in comparisons}
+
+
+def test_significant_throughput_drop_is_a_regression(tmp_path):
+    baseline = _report([100.0, 101.0, 99.0, 100.5])
+    candidate = _report([70.0, 71.0, 69.5, 70.5])
+
+    comparisons, missing = compare_reports(baseline, candidate)
+    assert _by_metric(comparisons)["subsets_per_second"].regression
+    assert missing == []
+    assert main([_write(tmp_path, "base.json", baseline), _write(tmp_path, "cand.json", candidate)]) == EXIT_REGRESSION
+
+
+def test_noise_below_threshold_passes(tmp_path):
+    baseline = _report([100.0, 103.0, 97.0, 101.0])
+    candidate = _report([98.0, 102.0, 96.0, 99.0])
+
+    comparisons, _ = compare_reports(baseline, candidate)
+    assert not any(item.regression for item in comparisons)
+    assert main([_write(tmp_path, "base.json", baseline), _write(tmp_path, "cand.json", candidate)]) == EXIT_OK
+
+
+def test_memory_metric_skipped_when_baseline_lacks_rss_growth(tmp_path):
+    baseline = _report([100.0, 100.0, 100.0])
+    candidate = _report([100.0, 100.0, 100.0], rss_growths=[500.0, 510.0, 505.0])
+
+    comparisons, _ = compare_reports(baseline, candidate)
+    assert "rss_growth_mb" not in _by_metric(comparisons)
+    assert set(_by_metric(comparisons)) == {"subsets_per_second", "quality"}
+    assert main([_write(tmp_path, "base.json", baseline), _write(tmp_path, "cand.json", candidate)]) == EXIT_OK
+
+
+def test_memory_growth_below_floor_is_not_a_regression():
+    baseline = _report([100.0, 100.0, 100.0], rss_growths=[10.0, 10.0, 10.0])
+    candidate = _report([100.0, 100.0, 100.0], rss_growths=[12.0, 12.0, 12.0])
+
+    comparisons, _ = compare_reports(baseline, candidate)
+    memory = _by_metric(comparisons)["rss_growth_mb"]
+    assert memory.degradation > memory.threshold
+    assert not memory.regression
+
+
+def test_no_comparable_cases_is_invalid(tmp_path):
+    baseline = _report([100.0, 100.0], case="kmeans_sa")
+    candidate = _report([100.0, 100.0], case="tabu")
+
+    comparisons, missing = compare_reports(baseline, candidate)
+    assert comparisons == []
+    assert missing == [("kmeans_sa", "1k")]
+    assert main([_write(tmp_path, "base.json", baseline), _write(tmp_path, "cand.json", candidate)]) == EXIT_INVALID
+
+
+def test_unreadable_report_is_invalid(tmp_path):
+    baseline = _write(tmp_path, "base.json", _report([100.0, 100.0]))
+    assert main([baseline, str(tmp_path / "missing.json")]) == EXIT_INVALID
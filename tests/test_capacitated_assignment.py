@@ -0,0 +1,61 @@
+import pytest
+
+from locations import Location
+from network_model import LogisticsNetwork
+from optimizers.capacitated_assignment import solve_capacitated_assignment
+from optimizers.cost_model import HubCostModel
+from optimizers.kmeans_sa_optimizer import KMeansSimulatedAnnealingOptimizer
+from optimizers.tabu_search_optimizer import TabuSearchOptimizer
+
+
+def _network(demands, capacities=(10, 10)):
+    locations = [Location("M1", "供应商", "manufacturer", 0, 0)]
+    locations += [
+        Location(f"W{i}", f"中转点{i}", "wholesaler", 10 * i, 0, capacity=capacity)
+        for i, capacity in enumerate(capacities, start=1)
+    ]
+    locations += [
+        Location(f"S{i}", f"门店{i}", "store", 5 * i, 3, capacity=demand)
+        for i, demand in enumerate(demands, start=1)
+    ]
+    network = LogisticsNetwork(locations)
+    network.calculate_distances()
+    return network
+
+
+def _loads(network, assignments):
+    loads = {}
+    for store_id, hub_id in assignments.items():
+        loads[hub_id] = loads.get(hub_id, 0) + network.locations[store_id].capacity
+    return loads
+
+
+def test_rounding_never_overloads_hub():
+    # 总需求 20 恰好等于总容量，但 7/7/6 无法单源放入两个容量为 10 的中转点
+    network = _network([7, 7, 6])
+    cost_model = HubCostModel.for_network(network, ["M1"], 1.0)
+    assert solve_capacitated_assignment(cost_model, ["W1", "W2"]) is None
+
+    with pytest.raises(RuntimeError):
+        KMeansSimulatedAnnealingOptimizer.optimize(network, hub_counts=[2])
+
+
+def test_assignment_respects_capacity_when_feasible():
+    network = _network([7, 3, 6, 4])
+    cost_model = HubCostModel.for_network(network, ["M1"], 1.0)
+    assignments = solve_capacitated_assignment(cost_model, ["W1", "W2"])
+
+    assert assignments is not None
+    assert set(assignments) == {"S1", "S2", "S3", "S4"}
+    assert all(load <= 10 for load in _loads(network, assignments).values())
+    assert set(assignments.values()) == {"W1", "W2"}
+
+
+def test_tabu_rejects_overloaded_final_assignment():
+    network = _network([7, 7, 6])
+    with pytest.raises(RuntimeError):
+        TabuSearchOptimizer.optimize(network, hub_counts=[2])
+
+    network = _network([7, 3, 6, 4])
+    best_solution, _ = TabuSearchOptimizer.optimize(network, hub_counts=[2])
+    assert all(load <= 10 for load in _loads(network, best_solution["store_assignments"]).values())
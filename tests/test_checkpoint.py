@@ -0,0 +1,123 @@
+import contextlib
+import io
+import os
+import random
+
+import numpy as np
+import pytest
+
+from checkpoint import Checkpointer
+from locations import Location
+from network_model import LogisticsNetwork
+from optimizers.kmeans_sa_optimizer import KMeansSimulatedAnnealingOptimizer
+from solve import create_data_model, solve_cvrp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _InterruptingCheckpointer(Checkpointer):
+    """第 interrupt_after 次保存后模拟进程被中断"""
+
+    def __init__(self, path, interrupt_after, **kwargs):
+        super().__init__(path, **kwargs)
+        self.interrupt_after = interrupt_after
+
+    def save(self, iteration, state):
+        super().save(iteration, state)
+        if self.saves == self.interrupt_after:
+            raise KeyboardInterrupt
+
+
+def _hub_network():
+    rng = np.random.default_rng(3)
+    locations = [Location("M1", "供应商", "manufacturer", 50, 50)]
+    locations += [
+        Location(f"W{i}", f"中转点{i}", "wholesaler", *rng.uniform(0, 100, 2), build_cost=float(rng.uniform(0, 20)))
+        for i in range(6)
+    ]
+    locations += [
+        Location(f"S{i}", f"门店{i}", "store", *rng.uniform(0, 100, 2), capacity=float(rng.integers(1, 5)))
+        for i in range(40)
+    ]
+    network = LogisticsNetwork(locations)
+    network.calculate_distances()
+    return network
+
+
+def _optimize_hubs(network, **kwargs):
+    random.seed(5)
+    np.random.seed(5)
+    return KMeansSimulatedAnnealingOptimizer.optimize(
+        network, hub_counts=[2, 3], iterations=200, kmeans_restarts=2, use_bounds=False, **kwargs
+    )
+
+
+def test_hub_optimizer_resumes_to_uninterrupted_result(tmp_path):
+    network = _hub_network()
+    expected, expected_evaluated = _optimize_hubs(network)
+
+    path = str(tmp_path / "hubs.ckpt")
+    with pytest.raises(KeyboardInterrupt):
+        _optimize_hubs(network, checkpoint=_InterruptingCheckpointer(
+            path, interrupt_after=9, every_seconds=None, every_iterations=1
+        ))
+    assert os.path.exists(path)
+
+    random.seed(99)
+    np.random.seed(99)
+    checkpoint = Checkpointer(path, every_seconds=None, every_iterations=1)
+    resumed, resumed_evaluated = KMeansSimulatedAnnealingOptimizer.optimize(
+        network, hub_counts=[2, 3], iterations=200, kmeans_restarts=2, use_bounds=False, checkpoint=checkpoint
+    )
+
+    assert checkpoint.resumed
+    assert resumed["total_cost"] == expected["total_cost"]
+    assert resumed["active_hubs"] == expected["active_hubs"]
+    assert resumed["store_assignments"] == expected["store_assignments"]
+    assert [s["total_cost"] for s in resumed_evaluated] == [s["total_cost"] for s in expected_evaluated]
+    assert not os.path.exists(path)
+
+
+def test_hub_optimizer_rejects_checkpoint_with_other_parameters(tmp_path):
+    network = _hub_network()
+    path = str(tmp_path / "hubs.ckpt")
+    with pytest.raises(KeyboardInterrupt):
+        _optimize_hubs(network, checkpoint=_InterruptingCheckpointer(
+            path, interrupt_after=2, every_seconds=None, every_iterations=1
+        ))
+
+    with pytest.raises(ValueError, match="运行参数与本次不一致"):
+        KMeansSimulatedAnnealingOptimizer.optimize(
+            network, hub_counts=[2, 3], iterations=300, kmeans_restarts=2, use_bounds=False,
+            checkpoint=Checkpointer(path, every_seconds=None, every_iterations=1),
+        )
+
+
+def test_solve_cvrp_resumes_to_uninterrupted_result(tmp_path):
+    data = create_data_model(
+        os.path.join(ROOT, "optimized_hubs.xlsx"), os.path.join(ROOT, "car.xlsx"), os.path.join(ROOT, "locations.csv")
+    )
+
+    def run(checkpoint=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return solve_cvrp(data, plot=False, max_iterations=3000, checkpoint=checkpoint)
+
+    random.seed(7)
+    np.random.seed(7)
+    expected = run()
+
+    path = str(tmp_path / "routes.ckpt")
+    random.seed(7)
+    np.random.seed(7)
+    with pytest.raises(KeyboardInterrupt):
+        run(_InterruptingCheckpointer(path, interrupt_after=3, every_seconds=None, every_iterations=300))
+    assert os.path.exists(path)
+
+    random.seed(123)
+    np.random.seed(123)
+    checkpoint = Checkpointer(path, every_seconds=None, every_iterations=300)
+    resumed = run(checkpoint)
+
+    assert checkpoint.resumed
+    assert resumed[0] == expected[0]
+    assert not os.path.exists(path)
@@ -0,0 +1,108 @@
+import json
+import os
+
+import pytest
+
+from cli import EXIT_INFEASIBLE, EXIT_INPUT, EXIT_OK, EXIT_USAGE, CliError, main, parse_args, parse_hub_counts
+from locations import Location, save_locations_to_file
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOCATIONS = os.path.join(ROOT, "locations.csv")
+
+
+@pytest.mark.parametrize("text, expected", [
+    (None, None),
+    ("", None),
+    ("all", None),
+    ("ALL", None),
+    ("2", [2]),
+    ("1,2,4", [1, 2, 4]),
+    ("1-3", [1, 2, 3]),
+    ("1-3,5", [1, 2, 3, 5]),
+    (" 4 , 2,, 2 ", [2, 4]),
+    ([3, 1, 3], [1, 3]),
+])
+def test_parse_hub_counts(text, expected):
+    assert parse_hub_counts(text) == expected
+
+
+def test_parse_hub_counts_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_hub_counts("1-x")
+
+
+def _config(tmp_path, config):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return str(path)
+
+
+def test_config_precedence(tmp_path):
+    config = _config(tmp_path, {
+        "seed": 3,
+        "max-iterations": 100,
+        "hub_counts": "1-2",
+        "route": {"max_iterations": 200, "cooling_rate": 0.9},
+        "options": {"iterations": 50},
+    })
+
+    args = parse_args(["--config", config, "route", "--max-iterations", "300"])
+    # 命令行 > 子命令一节 > 顶层键 > 解析器默认值
+    assert args.max_iterations == 300
+    assert args.cooling_rate == 0.9
+    assert args.seed == 3
+    assert args.initial_temp == 100
+    # 顶层键只要是某个子命令的选项即可，其他子命令忽略它
+    assert not hasattr(args, "hub_counts")
+    assert args.options == {"iterations": 50}
+
+    args = parse_args(["--config", config, "route"])
+    assert args.max_iterations == 200
+
+    args = parse_args(["--config", config, "optimize-hubs"])
+    assert args.hub_counts == "1-2"
+    assert args.seed == 3
+
+
+def test_config_errors(tmp_path):
+    with pytest.raises(CliError) as error:
+        parse_args(["--config", _config(tmp_path, {"route": {"hub_counts": "1"}}), "route"])
+    assert error.value.exit_code == EXIT_USAGE
+
+    with pytest.raises(CliError) as error:
+        parse_args(["--config", _config(tmp_path, {"options": [1, 2]}), "optimize-hubs"])
+    assert error.value.exit_code == EXIT_USAGE
+
+    with pytest.raises(CliError) as error:
+        parse_args(["--config", str(tmp_path / "missing.json"), "load"])
+    assert error.value.exit_code == EXIT_INPUT
+
+    broken = tmp_path / "broken.json"
+    broken.write_text("{", encoding="utf-8")
+    assert main(["--config", str(broken), "load"]) == EXIT_USAGE
+
+
+def test_exit_codes(tmp_path):
+    output = tmp_path / "hubs.json"
+    assert main([
+        "optimize-hubs", "--locations", LOCATIONS, "--hub-counts", "1", "--seed", "1", "--quiet",
+        "--option", "iterations=50", "--output", str(output),
+    ]) == EXIT_OK
+    assert json.loads(output.read_text(encoding="utf-8"))["best"]["hub_count"] == 1
+
+    assert main(["load", "--locations", str(tmp_path / "missing.csv"), "--quiet"]) == EXIT_INPUT
+    assert main(["optimize-hubs", "--locations", LOCATIONS, "--option", "iterations", "--quiet"]) == EXIT_USAGE
+    assert main(["optimize-hubs", "--locations", LOCATIONS, "--option", "unknown=1", "--quiet"]) == EXIT_USAGE
+    with pytest.raises(SystemExit) as error:
+        main(["route", "--max-iterations", "many"])
+    assert error.value.code == EXIT_USAGE
+
+    # 中转点总容量低于门店总需求：没有可行方案
+    infeasible = str(tmp_path / "infeasible.csv")
+    save_locations_to_file([
+        Location("M1", "供应商", "manufacturer", 0, 0),
+        Location("W1", "中转点", "wholesaler", 10, 0, capacity=1),
+        Location("S1", "门店1", "store", 5, 5, capacity=5),
+        Location("S2", "门店2", "store", 15, 5, capacity=5),
+    ], infeasible)
+    assert main(["optimize-hubs", "--locations", infeasible, "--quiet"]) == EXIT_INFEASIBLE
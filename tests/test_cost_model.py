@@ -0,0 +1,28 @@
+from locations import Location
+from network_model import LogisticsNetwork
+from optimizers.cost_model import HubCostModel
+
+
+def _network():
+    network = LogisticsNetwork([
+        Location("M1", "供应商", "manufacturer", 0, 0),
+        Location("W1", "中转点1", "wholesaler", 10, 0, capacity=5, build_cost=40.0),
+        Location("W2", "中转点2", "wholesaler", 0, 10, build_cost=10.0),
+        Location("S1", "门店1", "store", 10, 5, capacity=2),
+    ])
+    network.calculate_distances()
+    return network
+
+
+def test_cached_model_is_reused_until_location_attributes_change():
+    network = _network()
+    model = HubCostModel.for_network(network)
+    assert HubCostModel.for_network(network) is model
+
+    network.locations["W1"].build_cost = 0
+    rebuilt = HubCostModel.for_network(network)
+    assert rebuilt is not model
+    assert rebuilt.breakdown(["W1"], {"S1": "W1"})["build_cost"] == 0
+
+    network.locations["W1"].capacity = 1
+    assert HubCostModel.for_network(network) is not rebuilt
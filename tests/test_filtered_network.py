@@ -0,0 +1,67 @@
+import pytest
+
+from locations import Location
+from network_model import LogisticsNetwork
+
+
+def _network():
+    network = LogisticsNetwork([
+        Location("M1", "供应商", "manufacturer", 0, 0),
+        Location("W1", "中转点1", "wholesaler", 1, 1),
+        Location("W2", "中转点2", "wholesaler", 6, 0),
+        Location("S1", "门店1", "store", 3, 3),
+        Location("S2", "门店2", "store", 5, 2),
+    ])
+    network.calculate_distances()
+    return network
+
+
+def test_filtered_network_ignores_later_parent_moves():
+    parent = _network()
+    child = parent.create_filtered_network(["W1"])
+    assert child.distance_matrix["W1"]["S1"] == 4
+
+    parent.move_location("S1", 10, 10)
+
+    assert parent.distance_matrix["W1"]["S1"] == 18
+    assert child.distance_matrix["W1"]["S1"] == 4
+    assert child.distance_matrix.submatrix(["W1"], ["S1", "S2"]).tolist() == [[4, 5]]
+    assert child.distance_matrix.values[child.distance_matrix.ids.index("W1"),
+                                        child.distance_matrix.ids.index("S1")] == 4
+
+
+def test_filtered_network_survives_parent_removal():
+    parent = _network()
+    child = parent.create_filtered_network(["W1", "W2"])
+
+    parent.remove_location("S1")
+    parent.remove_location("W2")
+
+    assert "S1" in child.distance_matrix
+    assert child.distance_matrix["W1"]["S1"] == 4
+    assert child.distance_matrix["W2"]["S1"] == 6
+    assert child.distance_matrix.submatrix(["W2"], ["S2"]).tolist() == [[3]]
+    with pytest.raises(KeyError):
+        parent.distance_matrix["W1"]["S1"]
+
+    child.move_location("S2", 0, 0)
+    assert child.distance_matrix["W1"]["S2"] == 2
+    assert child.distance_matrix["W2"]["S1"] == 6
+
+
+def test_filtered_network_edits_stay_copy_on_write():
+    parent = _network()
+    child = parent.create_filtered_network(["W1", "W2"])
+    view = child.distance_matrix
+
+    child.move_location("S1", 0, 0)
+    child.add_location(Location("S3", "门店3", "store", 6, 4))
+    child.remove_location("W2")
+
+    assert child.distance_matrix is view
+    assert set(view.ids) == {"M1", "W1", "S1", "S2", "S3"}
+    coords = {loc_id: (loc.x, loc.y) for loc_id, loc in child.locations.items()}
+    expected = [[abs(coords[a][0] - coords[b][0]) + abs(coords[a][1] - coords[b][1]) for b in view.ids]
+                for a in view.ids]
+    assert view.values.tolist() == expected
+    assert parent.distance_matrix["W1"]["S1"] == 4
@@ -0,0 +1,51 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from locations import Location
+from network_model import LogisticsNetwork
+from optimizers.cost_model import HubCostModel
+from optimizers.kmeans_sa_optimizer import KMeansSimulatedAnnealingOptimizer
+
+
+def _cost_model(seed):
+    rng = np.random.default_rng(seed)
+    locations = [Location("M1", "供应商", "manufacturer", *rng.uniform(0, 100, 2))]
+    locations += [
+        Location(f"W{i}", f"中转点{i}", "wholesaler", *rng.uniform(0, 100, 2), build_cost=float(rng.uniform(0, 80)))
+        for i in range(4)
+    ]
+    locations += [Location(f"S{i}", f"门店{i}", "store", *rng.uniform(0, 100, 2), capacity=1) for i in range(6)]
+    network = LogisticsNetwork(locations)
+    network.calculate_distances()
+    return HubCostModel.for_network(network)
+
+
+def _subset_optimum(cost_model, hub_subset):
+    """穷举所有门店分配（要求每个中转点至少服务一个门店，与优化器的约束一致）得到组合的真实最优成本"""
+    stores = list(cost_model.stores)
+    best = np.inf
+    for positions in itertools.product(range(len(hub_subset)), repeat=len(stores)):
+        if len(set(positions)) < len(hub_subset):
+            continue
+        assignments = {store_id: hub_subset[pos] for store_id, pos in zip(stores, positions)}
+        best = min(best, cost_model.breakdown(hub_subset, assignments)["total_cost"])
+    return best
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_lower_bounds_never_exceed_brute_force_optimum(seed):
+    cost_model = _cost_model(seed)
+    hubs = list(cost_model.candidate_hubs)
+
+    for hub_count in range(1, len(hubs) + 1):
+        count_optimum = np.inf
+        for hub_subset in itertools.combinations(hubs, hub_count):
+            optimum = _subset_optimum(cost_model, hub_subset)
+            bound = KMeansSimulatedAnnealingOptimizer._subset_lower_bound(cost_model, hub_subset)
+            assert bound <= optimum + 1e-9
+            count_optimum = min(count_optimum, optimum)
+
+        count_bound = KMeansSimulatedAnnealingOptimizer._hub_count_lower_bound(cost_model, hub_count)
+        assert count_bound <= count_optimum + 1e-9
@@ -0,0 +1,77 @@
+import random
+
+import numpy as np
+import pytest
+
+from anytime import CancellationToken, Incumbent, OptimizationCancelled
+from locations import Location
+from network_model import LogisticsNetwork
+from optimizers.kmeans_sa_optimizer import KMeansSimulatedAnnealingOptimizer
+
+
+def _network():
+    rng = np.random.default_rng(11)
+    locations = [Location("M1", "供应商", "manufacturer", 50, 50)]
+    locations += [
+        Location(f"W{i}", f"中转点{i}", "wholesaler", *rng.uniform(0, 100, 2), build_cost=float(rng.uniform(0, 30)))
+        for i in range(5)
+    ]
+    locations += [Location(f"S{i}", f"门店{i}", "store", *rng.uniform(0, 100, 2), capacity=1) for i in range(30)]
+    network = LogisticsNetwork(locations)
+    network.calculate_distances()
+    return network
+
+
+def _optimize(network, **kwargs):
+    random.seed(1)
+    np.random.seed(1)
+    return KMeansSimulatedAnnealingOptimizer.optimize(
+        network, hub_counts=[1, 2, 3], iterations=100, kmeans_restarts=1, **kwargs
+    )
+
+
+def test_progress_events_follow_count_lifecycle():
+    events = []
+    _optimize(_network(), use_bounds=False, progress=events.append)
+
+    names = [event["event"] for event in events if event["event"] != "incumbent"]
+    expected = []
+    for subsets in (5, 10, 10):
+        expected += ["count_started"] + ["subset"] * subsets + ["count_finished"]
+    assert names == expected + ["finished"]
+
+    started = [event["hub_count"] for event in events if event["event"] == "count_started"]
+    finished = [event["hub_count"] for event in events if event["event"] == "count_finished"]
+    assert started == finished == [1, 2, 3]
+    assert events[-1]["subsets_remaining"] == 0
+    assert events[-1]["subsets_done"] == 25
+
+
+@pytest.mark.parametrize("use_bounds", [False, True])
+def test_subsets_remaining_never_increases(use_bounds):
+    events = []
+    _optimize(_network(), use_bounds=use_bounds, progress=events.append)
+
+    remaining = [event["subsets_remaining"] for event in events]
+    assert remaining[0] <= 25
+    assert all(later <= earlier for earlier, later in zip(remaining, remaining[1:]))
+    assert remaining[-1] == 0
+
+
+def test_cancel_from_progress_callback_raises_with_incumbent():
+    token = CancellationToken()
+    incumbent = Incumbent()
+    events = []
+
+    def on_progress(event):
+        events.append(event)
+        if event["event"] == "subset" and event["subsets_done"] == 3:
+            token.cancel("测试取消")
+
+    with pytest.raises(OptimizationCancelled):
+        _optimize(_network(), use_bounds=False, progress=on_progress, cancel_token=token, incumbent=incumbent)
+
+    assert incumbent.stop_reason == "cancelled"
+    assert incumbent.snapshot() is not None
+    assert [event["event"] for event in events].count("subset") == 3
+    assert all(event["event"] != "finished" for event in events)